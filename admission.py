@@ -0,0 +1,179 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class AdmissionError(RuntimeError):
+    """Request refused before doing any work; retry_after is a hint in seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimitedError(AdmissionError):
+    pass
+
+
+class OverloadedError(AdmissionError):
+    def __init__(self, message, retry_after, engine, reason):
+        super().__init__(message, retry_after)
+        self.engine = engine
+        self.reason = reason
+
+
+class RateLimiter:
+    """Token bucket per client, where a request costs base_cost plus one token per character.
+
+    Buckets hold up to burst tokens and refill at rate tokens per second. Only
+    the most recently seen max_clients are tracked; a client that was evicted
+    simply starts again with a full bucket. rate <= 0 disables limiting.
+    """
+
+    def __init__(self, rate, burst, base_cost=0, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.base_cost = base_cost
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.counters = {'allowed': 0, 'limited': 0}
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def cost(self, chars):
+        # A request larger than the bucket drains it completely rather than never fitting
+        return min(self.burst, self.base_cost + chars)
+
+    def acquire(self, client, chars):
+        """Take tokens for a request or raise RateLimitedError saying when it would fit"""
+        if not self.enabled:
+            return
+        cost = self.cost(chars)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= cost:
+                tokens -= cost
+                self.counters['allowed'] += 1
+                limited = False
+            else:
+                self.counters['limited'] += 1
+                limited = True
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        if limited:
+            raise RateLimitedError('Rate limit exceeded; slow down and retry later', (cost - tokens) / self.rate)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, clients=len(self._buckets), rate=self.rate, burst=self.burst)
+
+
+class _EngineSlots:
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.hold_ewma = None
+        self.rejected = {'queue_full': 0, 'timeout': 0}
+        self.admitted = 0
+
+
+class EngineLimiter:
+    """Cap on concurrent syntheses per engine, with a bounded queue of waiters.
+
+    Interactive callers wait at most wait_timeout, and are refused at once when
+    max_waiting callers are already queued, so overload turns into fast 503s
+    instead of ever-growing latency. Background work (queued jobs, batches)
+    passes block=True: it still occupies a slot, but waits as long as needed.
+    """
+
+    def __init__(self, limits, max_waiting=32, wait_timeout=10, hold_alpha=0.2):
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.hold_alpha = hold_alpha
+        self._condition = threading.Condition()
+        self._engines = {engine: _EngineSlots(limit) for engine, limit in limits.items()}
+
+    def _retry_after(self, slots):
+        # Time for the queue ahead to drain at the current per-slot hold time
+        hold = slots.hold_ewma or 1.0
+        return hold * (slots.waiting + 1) / max(1, slots.limit)
+
+    def acquire(self, engine, block=False):
+        """Take a slot for engine, waiting in its queue if needed; returns the wait in seconds"""
+        slots = self._engines.get(engine)
+        if slots is None or not slots.limit:
+            return 0.0
+        started = time.monotonic()
+        with self._condition:
+            if slots.active < slots.limit and not slots.waiting:
+                slots.active += 1
+                slots.admitted += 1
+                return 0.0
+            if not block and slots.waiting >= self.max_waiting:
+                slots.rejected['queue_full'] += 1
+                raise OverloadedError(f'{engine} is saturated; try again shortly', self._retry_after(slots), engine, 'queue_full')
+            slots.waiting += 1
+            try:
+                deadline = None if block else started + self.wait_timeout
+                while slots.active >= slots.limit:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        slots.rejected['timeout'] += 1
+                        raise OverloadedError(f'{engine} is saturated; try again shortly', self._retry_after(slots), engine, 'timeout')
+                    self._condition.wait(remaining)
+            finally:
+                slots.waiting -= 1
+            slots.active += 1
+            slots.admitted += 1
+        return time.monotonic() - started
+
+    def release(self, engine, held_seconds=None):
+        slots = self._engines.get(engine)
+        if slots is None or not slots.limit:
+            return
+        with self._condition:
+            slots.active -= 1
+            if held_seconds is not None:
+                if slots.hold_ewma is None:
+                    slots.hold_ewma = held_seconds
+                else:
+                    slots.hold_ewma += self.hold_alpha * (held_seconds - slots.hold_ewma)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, engine, block=False):
+        """Hold one of engine's slots for the duration of the block; yields the time spent queued"""
+        waited = self.acquire(engine, block)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(engine, time.monotonic() - started)
+
+    def stats(self):
+        with self._condition:
+            return {
+                engine: {
+                    'limit': slots.limit,
+                    'active': slots.active,
+                    'waiting': slots.waiting,
+                    'max_waiting': self.max_waiting,
+                    'admitted': slots.admitted,
+                    'rejected': dict(slots.rejected),
+                    'hold_ewma': round(slots.hold_ewma, 4) if slots.hold_ewma is not None else None
+                }
+                for engine, slots in self._engines.items()
+            }
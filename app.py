@@ -1,26 +1,103 @@
 import os
-import io
 import base64
-from flask import Flask, render_template, request, jsonify, send_file
-import tempfile
-import pyttsx3
-from gtts import gTTS
-import soundfile as sf
-import numpy as np
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context, url_for, has_request_context, g
 from werkzeug.utils import secure_filename
+import sys
+import json
+import argparse
 import threading
+import atexit
 import time
 import uuid
-import shutil
+import socket
+import ipaddress
+import contextvars
+from urllib.parse import quote, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from audio_cache import AudioCache, make_cache_key
+from gtts_client import GTTSClient
+from engine_router import EngineRouter, EngineUnavailableError
+from voice_registry import VoiceRegistry, describe_pyttsx3_voices
+from artifacts import ArtifactRegistry, ARTIFACT_ID_PATTERN
+from audio_processing import OUTPUT_FORMATS, MIMETYPE_FORMATS, parse_output_options, variant_key, transcode, audio_layout, stitch_audio_segments, encode_mp3, strip_mp3_metadata
+from pyttsx3_pool import Pyttsx3WorkerPool
+from batch_jobs import BatchManager, parse_jsonl
+from job_queue import JobQueue
+from text_processing import segment_runs
+from text_normalization import normalize_text, normalization_stats
+from metrics import Metrics
+from admission import RateLimiter, EngineLimiter, AdmissionError, OverloadedError
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['AUDIO_CACHE_DIR'] = os.environ.get('TTS_CACHE_DIR', os.path.join('cache', 'audio'))
+app.config['AUDIO_CACHE_MEMORY_ITEMS'] = int(os.environ.get('TTS_CACHE_MEMORY_ITEMS', 256))
+app.config['AUDIO_CACHE_MEMORY_BYTES'] = int(os.environ.get('TTS_CACHE_MEMORY_MB', 64)) * 1024 * 1024
+app.config['AUDIO_CACHE_DISK_BYTES'] = int(os.environ.get('TTS_CACHE_DISK_MB', 512)) * 1024 * 1024
+app.config['SEGMENT_MAX_CHARS'] = int(os.environ.get('TTS_SEGMENT_MAX_CHARS', 400))
+# Runs of another script (e.g. English inside Marathi) with at least this many words are synthesized in that language
+app.config['MIXED_SCRIPT_MIN_WORDS'] = int(os.environ.get('TTS_MIXED_SCRIPT_MIN_WORDS', 3))
+app.config['SEGMENT_RETRIES'] = int(os.environ.get('TTS_SEGMENT_RETRIES', 2))
+app.config['SYNTHESIS_WORKERS'] = int(os.environ.get('TTS_SYNTHESIS_WORKERS', 8))
+# Served with send_file, which resolves relative paths against the app root rather than the working directory
+app.config['ARTIFACT_DIR'] = os.path.abspath(os.environ.get('TTS_ARTIFACT_DIR', 'artifacts'))
+app.config['ARTIFACT_TTL_SECONDS'] = int(os.environ.get('TTS_ARTIFACT_TTL_SECONDS', 3600))
+app.config['ARTIFACT_DB_PATH'] = os.environ.get('TTS_ARTIFACT_DB', os.path.join('data', 'artifacts.sqlite3'))  # empty keeps the registry in memory
+app.config['ARTIFACT_MAX_DISK_BYTES'] = int(os.environ.get('TTS_ARTIFACT_MAX_DISK_MB', 1024)) * 1024 * 1024
+app.config['ARTIFACT_JANITOR_INTERVAL'] = float(os.environ.get('TTS_ARTIFACT_JANITOR_INTERVAL', 60))
+app.config['SESSION_COOKIE'] = os.environ.get('TTS_SESSION_COOKIE', 'tts_session')
+app.config['PYTTSX3_WORKERS'] = int(os.environ.get('TTS_PYTTSX3_WORKERS', os.cpu_count() or 2))
+app.config['PYTTSX3_JOB_TIMEOUT'] = float(os.environ.get('TTS_PYTTSX3_JOB_TIMEOUT', 60))
+app.config['PYTTSX3_QUEUE_TIMEOUT'] = float(os.environ.get('TTS_PYTTSX3_QUEUE_TIMEOUT', 120))
+app.config['PYTTSX3_MAX_JOBS_PER_WORKER'] = int(os.environ.get('TTS_PYTTSX3_MAX_JOBS_PER_WORKER', 200))
+# Where offline workers render before handing back bytes; empty means /dev/shm when available
+app.config['PYTTSX3_SCRATCH_DIR'] = os.environ.get('TTS_PYTTSX3_SCRATCH_DIR') or None
+app.config['BATCH_DIR'] = os.path.abspath(os.environ.get('TTS_BATCH_DIR', 'batches'))  # Absolute for send_file, like ARTIFACT_DIR
+app.config['BATCH_MAX_ITEMS'] = int(os.environ.get('TTS_BATCH_MAX_ITEMS', 10000))
+app.config['BATCH_CONCURRENCY'] = int(os.environ.get('TTS_BATCH_CONCURRENCY', 8))
+app.config['BATCH_GTTS_CONCURRENCY'] = int(os.environ.get('TTS_BATCH_GTTS_CONCURRENCY', 4))
+app.config['BATCH_RETENTION_SECONDS'] = int(os.environ.get('TTS_BATCH_RETENTION_SECONDS', 86400))
+app.config['JOB_DB_PATH'] = os.environ.get('TTS_JOB_DB', os.path.join('data', 'jobs.sqlite3'))
+app.config['JOB_SHORT_TEXT_CHARS'] = int(os.environ.get('TTS_JOB_SHORT_TEXT_CHARS', 500))
+app.config['JOB_SHORT_WORKERS'] = int(os.environ.get('TTS_JOB_SHORT_WORKERS', 2))
+app.config['JOB_LONG_WORKERS'] = int(os.environ.get('TTS_JOB_LONG_WORKERS', 1))
+app.config['JOB_RETENTION_SECONDS'] = int(os.environ.get('TTS_JOB_RETENTION_SECONDS', 86400))
+app.config['JOB_LEASE_SECONDS'] = int(os.environ.get('TTS_JOB_LEASE_SECONDS', 60))
+# Callback hosts allowed even when they resolve to private/loopback addresses (e.g. an internal service)
+app.config['CALLBACK_ALLOWED_HOSTS'] = {
+    host.strip().lower() for host in os.environ.get('TTS_CALLBACK_ALLOWED_HOSTS', '').split(',') if host.strip()
+}
+app.config['STREAM_FIRST_SEGMENT_CHARS'] = int(os.environ.get('TTS_STREAM_FIRST_SEGMENT_CHARS', 120))
+app.config['GTTS_BASE_URL'] = os.environ.get('TTS_GTTS_BASE_URL')  # e.g. http://127.0.0.1:8765 for a stand-in server
+app.config['GTTS_POOL_SIZE'] = int(os.environ.get('TTS_GTTS_POOL_SIZE', 16))
+app.config['GTTS_MAX_CONCURRENCY'] = int(os.environ.get('TTS_GTTS_MAX_CONCURRENCY', 8))
+app.config['GTTS_TIMEOUT'] = float(os.environ.get('TTS_GTTS_TIMEOUT', 10))
+app.config['GTTS_MAX_RETRIES'] = int(os.environ.get('TTS_GTTS_MAX_RETRIES', 3))
+app.config['ROUTER_WINDOW'] = int(os.environ.get('TTS_ROUTER_WINDOW', 20))
+app.config['ROUTER_FAILURE_RATE'] = float(os.environ.get('TTS_ROUTER_FAILURE_RATE', 0.5))
+app.config['ROUTER_CONSECUTIVE_FAILURES'] = int(os.environ.get('TTS_ROUTER_CONSECUTIVE_FAILURES', 5))
+app.config['ROUTER_OPEN_SECONDS'] = float(os.environ.get('TTS_ROUTER_OPEN_SECONDS', 30))
+app.config['ROUTER_PROBE_INTERVAL'] = float(os.environ.get('TTS_ROUTER_PROBE_INTERVAL', 5))
+app.config['ROUTER_SCOPE_QUORUM'] = int(os.environ.get('TTS_ROUTER_SCOPE_QUORUM', 3))
+app.config['WARM_UP'] = os.environ.get('TTS_WARM_UP', '1').lower() not in ('0', 'false', 'no')
+app.config['DRAIN_TIMEOUT'] = float(os.environ.get('TTS_DRAIN_TIMEOUT', 30))
+app.config['TRACE_SAMPLE_RATE'] = float(os.environ.get('TTS_TRACE_SAMPLE_RATE', 0))  # fraction of requests logged as traces
+app.config['TRACE_LOG'] = os.environ.get('TTS_TRACE_LOG', '-')  # '-' prints traces to stdout
+app.config['RATE_LIMIT_CHARS_PER_SECOND'] = float(os.environ.get('TTS_RATE_LIMIT_CHARS_PER_SECOND', 200))  # 0 disables
+app.config['RATE_LIMIT_BURST_CHARS'] = int(os.environ.get('TTS_RATE_LIMIT_BURST_CHARS', 10000))
+app.config['RATE_LIMIT_REQUEST_COST_CHARS'] = int(os.environ.get('TTS_RATE_LIMIT_REQUEST_COST_CHARS', 100))
+app.config['RATE_LIMIT_MAX_CLIENTS'] = int(os.environ.get('TTS_RATE_LIMIT_MAX_CLIENTS', 10000))
+app.config['API_KEY_HEADER'] = os.environ.get('TTS_API_KEY_HEADER', 'X-API-Key')
+app.config['GTTS_MAX_INFLIGHT'] = int(os.environ.get('TTS_GTTS_MAX_INFLIGHT', 16))
+app.config['PYTTSX3_MAX_INFLIGHT'] = int(os.environ.get('TTS_PYTTSX3_MAX_INFLIGHT', 2 * app.config['PYTTSX3_WORKERS']))
+app.config['ADMISSION_MAX_WAITING'] = int(os.environ.get('TTS_ADMISSION_MAX_WAITING', 32))
+app.config['ADMISSION_WAIT_SECONDS'] = float(os.environ.get('TTS_ADMISSION_WAIT_SECONDS', 10))
 
-# Initialize pyttsx3 engine for offline TTS
-pyttsx3_engine = None
+# Pool of pyttsx3 worker processes for offline TTS, started on first use
+pyttsx3_pool = None
+pyttsx3_pool_failed = False
 engine_lock = threading.Lock()
-available_voices = []
 
 # Language and accent configurations
 LANGUAGE_CONFIG = {
@@ -82,100 +159,138 @@ VOICE_CONFIG = {
     }
 }
 
-def get_pyttsx3_engine():
-    global pyttsx3_engine, available_voices
-    if pyttsx3_engine is None:
+# Languages each engine can actually pronounce; automatic routing never sends text elsewhere
+ENGINE_LANGUAGES = {
+    'gtts': set(LANGUAGE_CONFIG),
+    'pyttsx3': {'english'}
+}
+
+# Container format each engine produces natively
+ENGINE_FORMATS = {
+    'gtts': 'mp3',
+    'pyttsx3': 'wav'
+}
+
+# gTTS's own MP3 parameters; offline segments in a stream are encoded to match (constant bitrate)
+STREAM_MP3_SAMPLE_RATE = 24000
+STREAM_MP3_BITRATE = 32
+
+def build_voice_responses(snapshot):
+    """Capability endpoint payloads for one voice catalog; rebuilt only when the voices change"""
+    distinct = snapshot.distinct_genders
+    
+    capabilities = {}
+    for lang_key, lang_config in LANGUAGE_CONFIG.items():
+        capabilities[lang_key] = {}
+        for accent_key in lang_config['accents']:
+            has_distinct = distinct and lang_key != 'marathi'
+            capabilities[lang_key][accent_key] = {
+                'gtts_distinct_voices': lang_key == 'english',  # Only English has some variation
+                'pyttsx3_distinct_voices': has_distinct,
+                'recommended_engine': 'pyttsx3' if has_distinct else 'gtts',
+                'limitation': 'Same voice for both genders' if lang_key == 'marathi' else None
+            }
+    
+    engines = [{
+        'id': 'gtts',
+        'name': 'Google Text-to-Speech',
+        'description': 'High-quality online TTS (limited voice gender distinction)',
+        'quality': 'high',
+        'speed': 'medium',
+        'languages': list(LANGUAGE_CONFIG.keys()),
+        'voice_options': ['female', 'male'],
+        'accent_support': True,
+        'limitations': 'Same voice for male/female in some languages'
+    }]
+    if snapshot.voices is not None:
+        voice_options = [gender for gender in ('female', 'male') if snapshot.grouped[gender]] or ['default']
+        engines.append({
+            'id': 'pyttsx3',
+            'name': 'System TTS',
+            'description': 'Offline system-based TTS with distinct voices (English only)',
+            'quality': 'medium',
+            'speed': 'fast',
+            'languages': ['english'],  # pyttsx3 mainly supports English
+            'voice_options': voice_options,
+            'accent_support': False,
+            'voices_detail': snapshot.voices,
+            'limitations': 'English only, uses system voices'
+        })
+    
+    voices_info = {
+        'gtts': {},
+        'pyttsx3': {
+            'female': [v['name'] for v in snapshot.grouped['female']],
+            'male': [v['name'] for v in snapshot.grouped['male']],
+            'other': [v['name'] for v in snapshot.grouped['unknown']]
+        }
+    }
+    for lang_key, lang_config in LANGUAGE_CONFIG.items():
+        voices_info['gtts'][lang_key] = {}
+        for accent_key, accent_config in lang_config['accents'].items():
+            if lang_key == 'marathi':
+                voices_info['gtts'][lang_key][accent_key] = {
+                    'female': f"Google {lang_config['name']} ({accent_config['name']}) - Default Voice",
+                    'male': f"Google {lang_config['name']} ({accent_config['name']}) - Default Voice (Same as Female)"
+                }
+            else:
+                voices_info['gtts'][lang_key][accent_key] = {
+                    'female': f"Google {lang_config['name']} Female ({accent_config['name']})",
+                    'male': f"Google {lang_config['name']} Male ({accent_config['name']}) - Limited Variation"
+                }
+    
+    return {
+        'voice_capabilities': capabilities,
+        'engines': {'engines': engines},
+        'voices': voices_info
+    }
+
+# Indexed system voices and prebuilt capability responses, swapped atomically on reload
+voice_registry = VoiceRegistry(build_voice_responses)
+
+def reload_voices(voices):
+    """Reindex when a (re)spawned pyttsx3 worker reports a different set of system voices"""
+    if voice_registry.load(voices):
+        print(f"Voice registry loaded {len(voice_registry.voices)} voices (version {voice_registry.version})")
+
+def select_default_pyttsx3_voice(voices):
+    """Voice id the workers start with (prefer female if available)"""
+    described = describe_pyttsx3_voices(voices)
+    for voice in described:
+        if voice['gender'] == 'female':
+            return voice['id']
+    return described[0]['id'] if described else None
+
+def get_pyttsx3_pool():
+    """Start the pyttsx3 worker pool on first use and load the system voice catalog"""
+    global pyttsx3_pool, pyttsx3_pool_failed
+    if pyttsx3_pool is None and not pyttsx3_pool_failed:
         with engine_lock:
-            if pyttsx3_engine is None:
+            if pyttsx3_pool is None and not pyttsx3_pool_failed:
+                pool = Pyttsx3WorkerPool(
+                    app.config['PYTTSX3_WORKERS'],
+                    job_timeout=app.config['PYTTSX3_JOB_TIMEOUT'],
+                    queue_timeout=app.config['PYTTSX3_QUEUE_TIMEOUT'],
+                    max_jobs_per_worker=app.config['PYTTSX3_MAX_JOBS_PER_WORKER'],
+                    rate=180,  # Speed of speech
+                    volume=1.0,  # Volume (0.0 to 1.0)
+                    on_voices=reload_voices,
+                    scratch_root=app.config['PYTTSX3_SCRATCH_DIR']
+                )
                 try:
-                    pyttsx3_engine = pyttsx3.init()
-                    # Get available voices and categorize them
-                    voices = pyttsx3_engine.getProperty('voices')
-                    available_voices = []
-                    
-                    if voices:
-                        for i, voice in enumerate(voices):
-                            voice_info = {
-                                'id': voice.id,
-                                'name': voice.name,
-                                'index': i,
-                                'gender': 'unknown',
-                                'language': 'english',  # pyttsx3 mainly supports English
-                                'accent': 'system'
-                            }
-                            
-                            # Try to determine gender from voice name/id
-                            name_lower = voice.name.lower()
-                            if any(keyword in name_lower for keyword in ['female', 'woman', 'zira', 'hazel', 'susan', 'anna', 'eva', 'cortana']):
-                                voice_info['gender'] = 'female'
-                            elif any(keyword in name_lower for keyword in ['male', 'man', 'david', 'mark', 'george', 'james']):
-                                voice_info['gender'] = 'male'
-                            
-                            # Try to determine accent from voice name
-                            if any(keyword in name_lower for keyword in ['us', 'american', 'united states']):
-                                voice_info['accent'] = 'usa'
-                            elif any(keyword in name_lower for keyword in ['uk', 'british', 'england']):
-                                voice_info['accent'] = 'uk'
-                            elif any(keyword in name_lower for keyword in ['india', 'indian']):
-                                voice_info['accent'] = 'india'
-                            
-                            available_voices.append(voice_info)
-                        
-                        # Set default voice (prefer female if available)
-                        default_voice = None
-                        for voice in available_voices:
-                            if voice['gender'] == 'female':
-                                default_voice = voice
-                                break
-                        if not default_voice and available_voices:
-                            default_voice = available_voices[0]
-                        
-                        if default_voice:
-                            pyttsx3_engine.setProperty('voice', default_voice['id'])
-                    
-                    # Set speech rate and volume for better quality
-                    pyttsx3_engine.setProperty('rate', 180)  # Speed of speech
-                    pyttsx3_engine.setProperty('volume', 1.0)  # Volume (0.0 to 1.0)
-                    print(f"Pyttsx3 engine initialized successfully with {len(available_voices)} voices")
+                    reload_voices(pool.start(select_default_pyttsx3_voice))
+                    pyttsx3_pool = pool
+                    print(f"Pyttsx3 worker pool started ({pool.size} workers) with {len(voice_registry.voices)} voices")
                     
                 except Exception as e:
                     print(f"Error initializing pyttsx3: {e}")
-                    pyttsx3_engine = None
-    return pyttsx3_engine
-
-def set_pyttsx3_voice(gender='female', language='english', accent='usa'):
-    """Set pyttsx3 voice based on gender, language and accent preference"""
-    engine = get_pyttsx3_engine()
-    if engine and available_voices:
-        # Find voice by preferences (language, accent, gender)
-        preferred_voices = []
-        
-        # First try to match language, accent, and gender
-        for v in available_voices:
-            if (v['language'] == language and 
-                v['accent'] == accent and 
-                v['gender'] == gender):
-                preferred_voices.append(v)
-        
-        # If no exact match, try language and gender
-        if not preferred_voices:
-            for v in available_voices:
-                if v['language'] == language and v['gender'] == gender:
-                    preferred_voices.append(v)
-        
-        # If still no match, try just gender
-        if not preferred_voices:
-            preferred_voices = [v for v in available_voices if v['gender'] == gender]
-        
-        # Final fallback to any available voice
-        if not preferred_voices:
-            preferred_voices = available_voices
-        
-        if preferred_voices:
-            selected_voice = preferred_voices[0]
-            engine.setProperty('voice', selected_voice['id'])
-            return selected_voice['name'], selected_voice['gender']
-    return None, 'unknown'
+                    # Don't respawn a failing driver on every request
+                    pyttsx3_pool_failed = True
+    return pyttsx3_pool
+
+def select_pyttsx3_voice(gender='female', language='english', accent='usa'):
+    """Pick the best matching pyttsx3 voice without touching the engine"""
+    return voice_registry.select(gender, language, accent)
 
 def has_distinct_voices(language, accent):
     """Check if we have distinct male/female voices for a language/accent combination"""
@@ -183,244 +298,1225 @@ def has_distinct_voices(language, accent):
         return False  # gTTS doesn't provide distinct male/female voices for Marathi
     
     # Check if pyttsx3 has distinct voices
-    female_voices = [v for v in available_voices if v['gender'] == 'female']
-    male_voices = [v for v in available_voices if v['gender'] == 'male']
-    
-    return len(female_voices) > 0 and len(male_voices) > 0
+    return voice_registry.has_distinct_genders()
+
+# pyttsx3 workers are spawned, so when this file is run as a script ('python app.py',
+# the batch CLI) each worker re-runs it as '__mp_main__'; they only need its definitions
+SERVICE_PROCESS = __name__ != '__mp_main__'
+
+def probe_engine(engine, scope):
+    """Background recovery check for an open circuit; raises if the engine is still failing"""
+    if engine == 'gtts':
+        lang_code, tld = scope.split(':', 1) if scope else ('en', 'com')
+        gtts_client.synthesize('Health check.', lang_code, tld)
+    else:
+        pool = get_pyttsx3_pool()
+        if pool is None:
+            raise RuntimeError('pyttsx3 engine unavailable')
+        pool.synthesize('Health check.')
+
+if SERVICE_PROCESS:
+    # Create necessary directories
+    os.makedirs('uploads', exist_ok=True)
+
+    # Content-addressed cache of synthesized audio, shared by both engines
+    audio_cache = AudioCache(
+        app.config['AUDIO_CACHE_DIR'],
+        max_memory_items=app.config['AUDIO_CACHE_MEMORY_ITEMS'],
+        max_memory_bytes=app.config['AUDIO_CACHE_MEMORY_BYTES'],
+        max_disk_bytes=app.config['AUDIO_CACHE_DISK_BYTES']
+    )
+
+    # Shared keep-alive session for gTTS requests, with retries and coalescing of identical calls
+    gtts_client = GTTSClient(
+        base_url=app.config['GTTS_BASE_URL'],
+        pool_size=app.config['GTTS_POOL_SIZE'],
+        max_concurrency=app.config['GTTS_MAX_CONCURRENCY'],
+        timeout=app.config['GTTS_TIMEOUT'],
+        max_retries=app.config['GTTS_MAX_RETRIES']
+    )
+
+    # Per-engine circuit breakers and latency tracking used to order engines for each request
+    engine_router = EngineRouter(
+        probe_engine,
+        window_size=app.config['ROUTER_WINDOW'],
+        failure_rate_threshold=app.config['ROUTER_FAILURE_RATE'],
+        consecutive_failures=app.config['ROUTER_CONSECUTIVE_FAILURES'],
+        open_seconds=app.config['ROUTER_OPEN_SECONDS'],
+        probe_interval=app.config['ROUTER_PROBE_INTERVAL'],
+        scope_quorum=app.config['ROUTER_SCOPE_QUORUM']
+    )
+    engine_router.register('pyttsx3')
+    for language, accents in VOICE_CONFIG.items():
+        for genders in accents.values():
+            for tld in sum(genders.values(), []):
+                engine_router.register('gtts', f"{LANGUAGE_CONFIG[language]['code']}:{tld}")
+
+    # Generated audio served by id from /audio/<id>, expired and evicted by a background janitor
+    artifact_registry = ArtifactRegistry(
+        app.config['ARTIFACT_DIR'],
+        ttl_seconds=app.config['ARTIFACT_TTL_SECONDS'],
+        max_disk_bytes=app.config['ARTIFACT_MAX_DISK_BYTES'],
+        db_path=app.config['ARTIFACT_DB_PATH'] or None,
+        janitor_interval=app.config['ARTIFACT_JANITOR_INTERVAL']
+    )
+
+    # Bulk jobs submitted through /batch_speech or the batch CLI
+    batch_manager = BatchManager(
+        app.config['BATCH_DIR'],
+        lambda options: synthesize_speech(options),
+        max_concurrency=app.config['BATCH_CONCURRENCY'],
+        engine_concurrency={
+            'gtts': app.config['BATCH_GTTS_CONCURRENCY'],
+            'pyttsx3': app.config['PYTTSX3_WORKERS']
+        },
+        retention_seconds=app.config['BATCH_RETENTION_SECONDS']
+    )
+
+    # Persistent queue behind asynchronous /generate_speech requests
+    job_queue = JobQueue(
+        app.config['JOB_DB_PATH'],
+        lambda payload: run_speech_job(payload),
+        lane_workers={
+            'short': app.config['JOB_SHORT_WORKERS'],
+            'long': app.config['JOB_LONG_WORKERS']
+        },
+        retention_seconds=app.config['JOB_RETENTION_SECONDS'],
+        lease_seconds=app.config['JOB_LEASE_SECONDS'],
+        callback_validator=lambda callback_url: validate_callback_url(callback_url)
+    )
+
+    # Worker pool that synthesizes the segments of long texts concurrently
+    synthesis_executor = ThreadPoolExecutor(
+        max_workers=app.config['SYNTHESIS_WORKERS'],
+        thread_name_prefix='tts-segment'
+    )
+
+# Per-client request budget (in characters) and per-engine concurrency caps for interactive requests
+rate_limiter = RateLimiter(
+    app.config['RATE_LIMIT_CHARS_PER_SECOND'],
+    app.config['RATE_LIMIT_BURST_CHARS'],
+    base_cost=app.config['RATE_LIMIT_REQUEST_COST_CHARS'],
+    max_clients=app.config['RATE_LIMIT_MAX_CLIENTS']
+)
+engine_limiter = EngineLimiter(
+    {'gtts': app.config['GTTS_MAX_INFLIGHT'], 'pyttsx3': app.config['PYTTSX3_MAX_INFLIGHT']},
+    max_waiting=app.config['ADMISSION_MAX_WAITING'],
+    wait_timeout=app.config['ADMISSION_WAIT_SECONDS']
+)
+
+# Hot-path stage timings and counters served at /metrics
+metrics = Metrics(trace_sample_rate=app.config['TRACE_SAMPLE_RATE'], trace_log=app.config['TRACE_LOG'])
+request_seconds = metrics.histogram(
+    'tts_http_request_duration_seconds', 'HTTP request latency, including streamed bodies', ('endpoint', 'method', 'status')
+)
+response_bytes_total = metrics.counter(
+    'tts_http_response_bytes_total', 'Response body bytes for responses with a known length', ('endpoint',)
+)
+audio_bytes_total = metrics.counter(
+    'tts_audio_bytes_total', 'Synthesized audio bytes produced', ('engine', 'format', 'mode')
+)
+fallbacks_total = metrics.counter(
+    'tts_engine_fallbacks_total', 'Syntheses (or stream segments) retried on another engine', ('from_engine', 'to_engine', 'language')
+)
+engine_failures_total = metrics.counter(
+    'tts_engine_failures_total', 'Synthesis attempts that failed on an engine', ('engine', 'language', 'accent')
+)
+segment_retries_total = metrics.counter(
+    'tts_segment_retries_total', 'Segment attempts that raised and were retried or given up', ('engine',)
+)
+metrics.gauge(
+    'tts_audio_cache_events_total', 'Audio cache hits, misses, stores and evictions', ('event',),
+    collect=lambda: {(name,): value for name, value in audio_cache.stats().items() if name in audio_cache.counters},
+    kind='counter'
+)
+metrics.gauge(
+    'tts_gtts_client_events_total', 'gTTS client requests, upstream calls, retries, coalesced requests and failures', ('event',),
+    collect=lambda: {(name,): value for name, value in gtts_client.stats().items() if name != 'inflight'},
+    kind='counter'
+)
+metrics.gauge(
+    'tts_text_normalization_cache_total', 'Memoized text normalization lookups', ('result',),
+    collect=lambda: {(result,): normalization_stats()[result] for result in ('hits', 'misses')},
+    kind='counter'
+)
+metrics.gauge(
+    'tts_gtts_client_inflight', 'Distinct gTTS requests in flight',
+    collect=lambda: {(): gtts_client.stats()['inflight']}
+)
+metrics.gauge(
+    'tts_circuit_open', '1 while an engine (or engine scope) circuit is not closed', ('engine', 'scope'),
+    collect=lambda: {
+        (engine, scope): int(entry['state'] != 'closed')
+        for engine, engine_stats in engine_router.stats().items()
+        for scope, entry in [('', engine_stats)] + list(engine_stats['scopes'].items())
+        if 'state' in entry
+    }
+)
+admission_wait_seconds = metrics.histogram(
+    'tts_admission_wait_seconds', 'Time spent queued for an engine slot', ('engine',)
+)
+admission_rejections_total = metrics.counter(
+    'tts_admission_rejections_total', 'Requests refused because an engine was saturated', ('engine', 'reason')
+)
+rate_limited_total = metrics.counter(
+    'tts_rate_limited_total', 'Requests refused by the per-client rate limiter', ('endpoint',)
+)
+metrics.gauge(
+    'tts_engine_slots', 'Engine concurrency: limit, active and waiting requests', ('engine', 'state'),
+    collect=lambda: {
+        (engine, state): entry[state]
+        for engine, entry in engine_limiter.stats().items()
+        for state in ('limit', 'active', 'waiting', 'max_waiting')
+    }
+)
+metrics.gauge(
+    'tts_rate_limit_clients', 'Clients with a tracked rate limit bucket',
+    collect=lambda: {(): rate_limiter.stats()['clients']}
+)
+metrics.gauge(
+    'tts_artifact_disk_bytes', 'Bytes of generated audio kept for download',
+    collect=lambda: {(): artifact_registry.stats()['disk_bytes']}
+)
+metrics.gauge(
+    'tts_jobs', 'Queued, running and finished jobs by lane', ('lane', 'status'),
+    collect=lambda: {(lane, status): count for lane, counts in job_queue.stats().items() for status, count in counts.items()}
+)
 
-# Create necessary directories
-os.makedirs('uploads', exist_ok=True)
-os.makedirs('static/audio', exist_ok=True)
+def write_audio_file(output_path, audio_bytes):
+    """Write synthesized audio to the path the caller expects"""
+    with metrics.stage('file_write'):
+        with open(output_path, 'wb') as audio_file:
+            audio_file.write(audio_bytes)
 
-print("Text-to-Speech Web App initialized with enhanced voice differentiation")
-print("Languages: English, Marathi")
-print("Accents: USA, UK, Indian")
-print("Note: Voice gender distinction varies by engine and language")
+# Startup progress behind /health/ready; heavy modules and engines load in the background
+startup_state = {
+    'started': time.time(),
+    'ready_event': threading.Event(),
+    'steps': {}
+}
+
+def run_warm_up_step(name, step):
+    started = time.monotonic()
+    try:
+        step()
+        status = 'ok'
+    except Exception as e:
+        status = f'failed: {e}'
+    startup_state['steps'][name] = {'status': status, 'seconds': round(time.monotonic() - started, 3)}
+
+def warm_up():
+    """Pay the first-use costs (codec and HTTP imports, pyttsx3 workers) before traffic needs them.
+
+    The service reports ready once the online path is warm; the offline engine
+    keeps starting afterwards, and requests that need it wait for it.
+    """
+    # The imports below are unused on purpose: importing them now is the warm-up
+    def load_codecs():
+        import numpy  # noqa: F401
+        import soundfile  # noqa: F401
+
+    def load_gtts():
+        import gtts  # noqa: F401
+        gtts_client.session
+
+    run_warm_up_step('codecs', load_codecs)
+    run_warm_up_step('gtts', load_gtts)
+    # Log before signalling ready, so the line is out before anything waiting on readiness writes its own output
+    print(f"Ready after {time.time() - startup_state['started']:.2f}s")
+    startup_state['ready_event'].set()
+
+    def start_pyttsx3():
+        if get_pyttsx3_pool() is None:
+            raise RuntimeError('pyttsx3 engine unavailable')
+
+    run_warm_up_step('pyttsx3', start_pyttsx3)
+
+services_lock = threading.Lock()
+services_state = {'started': False, 'stopped': False}
+
+def create_app():
+    """WSGI entry point: start this process's background services and return the app.
+
+    Call it once per serving process, after any fork (gunicorn 'app:create_app()'
+    without preload). Engines, caches and worker pools are then private to the
+    process, so server workers never share pyttsx3 or voice state.
+    """
+    with services_lock:
+        if not services_state['started']:
+            services_state['started'] = True
+            job_queue.start()
+            engine_router.start()
+            artifact_registry.start()
+            if app.config['WARM_UP']:
+                threading.Thread(target=warm_up, name='tts-warm-up', daemon=True).start()
+            else:
+                # Lazy mode: everything loads on first use, so there is nothing to wait for
+                startup_state['ready_event'].set()
+            atexit.register(shutdown_services)
+    return app
+
+def shutdown_services(timeout=None):
+    """Drain in-flight work, then stop background threads and engine processes.
+
+    Queue workers finish their current job (unstarted jobs stay queued for the
+    next process), running batches get until the timeout, and the pyttsx3
+    workers are stopped once the syntheses in flight complete.
+    """
+    with services_lock:
+        if services_state['stopped'] or not services_state['started']:
+            return
+        services_state['stopped'] = True
+    
+    timeout = app.config['DRAIN_TIMEOUT'] if timeout is None else timeout
+    deadline = time.time() + timeout
+    startup_state['ready_event'].clear()  # Fail readiness so no new traffic is routed here
+    print(f"Draining in-flight work (up to {timeout:.0f}s)")
+    
+    job_queue.stop(timeout)
+    if not batch_manager.wait(max(0, deadline - time.time())):
+        print("Batches still running at shutdown; unfinished items are abandoned")
+    engine_router.stop()
+    artifact_registry.stop()
+    synthesis_executor.shutdown(wait=True, cancel_futures=True)
+    if pyttsx3_pool is not None:
+        pyttsx3_pool.shutdown()
+    print("Shutdown complete")
+
+if SERVICE_PROCESS:
+    print("Text-to-Speech Web App initialized with enhanced voice differentiation")
+    print("Languages: English, Marathi")
+    print("Accents: USA, UK, Indian")
+    print("Note: Voice gender distinction varies by engine and language")
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def parse_speech_request(data):
+    """Validate a speech request payload and fill in defaults; raises ValueError with a user-facing message"""
+    if not isinstance(data, dict):
+        raise ValueError('Request must be a JSON object')
+    
+    text = str(data.get('text') or '').strip()
+    if not text:
+        raise ValueError('No text provided')
+    
+    if len(text) > 5000:
+        raise ValueError('Text too long. Maximum 5000 characters allowed.')
+    
+    output_format, output_rate, output_bitrate = parse_output_options(
+        data.get('format'), data.get('sample_rate'), data.get('bitrate')
+    )
+    if output_bitrate is not None and 'bitrate_range' not in OUTPUT_FORMATS.get(output_format, {}):
+        # Without a format the engine decides, and its WAV output has no bitrate to set
+        compressed = ', '.join(name for name, spec in OUTPUT_FORMATS.items() if 'bitrate_range' in spec)
+        raise ValueError(f'bitrate needs a compressed format; set format to one of: {compressed}')
+    
+    return {
+        'text': text,
+        'engine': data.get('engine', 'gtts'),  # Default to gTTS; 'auto' picks the fastest healthy engine
+        'voice_gender': data.get('voice_gender', 'female'),  # Default to female
+        'language': data.get('language', 'english'),  # Default to English
+        'accent': data.get('accent', 'usa'),  # Default to USA
+        'format': output_format,
+        'sample_rate': output_rate,
+        'bitrate': output_bitrate
+    }
+
+def gtts_scope(lang_code, tld):
+    """Router scope for one gTTS language/TLD combination"""
+    return f'{lang_code}:{tld}'
+
+def route_engines(requested_engine, voice_gender, language, accent):
+    """Engines to try for a request in order, skipping those with open circuits.
+
+    An explicitly requested engine is always a candidate and goes first while
+    healthy; fallbacks (and every engine, for 'auto') must support the language
+    and are ordered by expected latency.
+    """
+    gtts_voice = resolve_gtts_voice(voice_gender, language, accent)
+    scopes = {'gtts': gtts_scope(gtts_voice['lang_code'], gtts_voice['tld']), 'pyttsx3': None}
+    candidates = {}
+    for engine, scope in scopes.items():
+        if engine == 'pyttsx3' and pyttsx3_pool_failed:
+            continue
+        if engine == requested_engine or language in ENGINE_LANGUAGES[engine]:
+            candidates[engine] = scope
+    return engine_router.route(candidates, preferred=None if requested_engine == 'auto' else requested_engine)
+
+def synthesize_speech(options, interactive=False):
+    """Synthesize with the requested engine (falling back to the other) and encode to the requested format.
+
+    Audio stays in memory from the engine to the returned 'audio' bytes;
+    callers decide whether it is written anywhere.
+
+    Interactive requests give up on an engine whose admission queue is full or
+    too slow and try the next; background work waits for a slot instead.
+    """
+    text = options['text']
+    tts_engine = options['engine']
+    voice_gender = options['voice_gender']
+    language = options['language']
+    accent = options['accent']
+    generators = {'gtts': generate_with_gtts, 'pyttsx3': generate_with_pyttsx3}
+    
+    engines = route_engines(tts_engine, voice_gender, language, accent)
+    if not engines:
+        raise EngineUnavailableError('No TTS engine is currently available; try again shortly')
+    
+    audio = None
+    saturated = []
+    for position, engine_used in enumerate(engines):
+        try:
+            with engine_limiter.slot(engine_used, block=not interactive) as waited:
+                admission_wait_seconds.observe(waited, engine=engine_used)
+                with metrics.bind(engine=engine_used, language=language, accent=accent):
+                    audio, voice_used, actual_gender = generators[engine_used](text, voice_gender, language, accent)
+        except OverloadedError as e:
+            admission_rejections_total.inc(engine=engine_used, reason=e.reason)
+            saturated.append(e)
+        else:
+            if audio is not None:
+                break
+            engine_failures_total.inc(engine=engine_used, language=language, accent=accent)
+        if position + 1 < len(engines):
+            fallbacks_total.inc(from_engine=engine_used, to_engine=engines[position + 1], language=language)
+        print(f"{engine_used} {'saturated' if saturated and saturated[-1].engine == engine_used else 'failed'}, trying next engine")
+    
+    if audio is None:
+        if len(saturated) == len(engines):
+            raise min(saturated, key=lambda e: e.retry_after)
+        raise RuntimeError('Failed to generate speech with all available engines')
+    
+    # Transcode only when the client asked for something other than the engine's native output;
+    # without a format, a requested sample rate still applies, in the engine's own format
+    audio_format = options['format'] or ENGINE_FORMATS[engine_used]
+    sample_rate = channels = None
+    if audio_format != ENGINE_FORMATS[engine_used] or options['sample_rate'] or options['bitrate']:
+        if audio_format == 'pcm':
+            # Raw PCM has no header, so keep its layout to decode the artifact again for other formats
+            sample_rate, channels = audio_layout(audio)
+            sample_rate = options['sample_rate'] or sample_rate
+        with metrics.stage('transcode', engine=engine_used, language=language, accent=accent):
+            audio = transcode(audio, audio_format, options['sample_rate'], options['bitrate'])
+    audio_bytes_total.inc(len(audio), engine=engine_used, format=audio_format, mode='file')
+    
+    return {
+        'audio': audio,
+        'engine_used': engine_used,
+        'voice_used': voice_used,
+        'actual_gender': actual_gender,
+        'format': audio_format,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'mimetype': OUTPUT_FORMATS[audio_format]['mimetype'],
+        'extension': OUTPUT_FORMATS[audio_format]['extension']
+    }
+
+def session_owner():
+    """Opaque id of the browser session making this request, issued on first use.
+
+    Artifacts are recorded against it so /download_audio without an id returns
+    this session's latest audio rather than whatever anyone generated last.
+    """
+    if 'session_owner' not in g:
+        owner = request.cookies.get(app.config['SESSION_COOKIE'], '')
+        if not ARTIFACT_ID_PATTERN.match(owner):
+            owner = uuid.uuid4().hex
+            g.new_session_owner = owner
+        g.session_owner = owner
+    return g.session_owner
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.trace = metrics.start_trace(method=request.method, path=request.path)
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency once the body has been sent, so streamed responses are timed in full"""
+    started, trace = g.get('request_started'), g.get('trace')
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    method, status = request.method, response.status_code
+    if response.content_length is not None:
+        response_bytes_total.inc(response.content_length, endpoint=endpoint)
+    
+    def finish():
+        if started is not None:
+            request_seconds.observe(time.perf_counter() - started, endpoint=endpoint, method=method, status=status)
+        metrics.finish_trace(trace, endpoint=endpoint, status=status)
+    
+    response.call_on_close(finish)
+    return response
+
+@app.after_request
+def set_session_cookie(response):
+    owner = g.pop('new_session_owner', None)
+    if owner is not None:
+        response.set_cookie(app.config['SESSION_COOKIE'], owner, max_age=30 * 86400, httponly=True, samesite='Lax')
+    return response
+
+def audio_url_for(artifact_id):
+    """Public URL of an artifact, also usable from background threads without a request context"""
+    if has_request_context():
+        return url_for('get_audio', artifact_id=artifact_id)
+    return f'/audio/{artifact_id}'
+
+def create_speech(options, owner=None, interactive=False, persist=True, ttl_seconds=None):
+    """Synthesize a validated request and describe the result; returns (response, audio bytes).
+
+    With persist the audio is also written once, as an artifact owned by the
+    given session, and the response carries its id and URL.
+    """
+    text = options['text']
+    tts_engine = options['engine']
+    voice_gender = options['voice_gender']
+    language = options['language']
+    accent = options['accent']
+    
+    print(f"Generating speech for text: {text[:50]}... using {tts_engine} with {voice_gender} {language} ({accent}) voice")
+    
+    # Check if distinct voices are available for this combination
+    has_distinct = has_distinct_voices(language, accent)
+    
+    result = synthesize_speech(options, interactive)
+    audio = result['audio']
+    
+    print("Speech generation completed successfully")
+    
+    # Add warning if gender distinction isn't available
+    warning = None
+    if not has_distinct and tts_engine == 'gtts':
+        if language == 'marathi':
+            warning = "Note: Google TTS uses the same voice for both male and female in Marathi"
+        else:
+            warning = f"Note: Limited voice variation available for {language} ({accent}) accent"
+    
+    response = {
+        'success': True,
+        'format': result['format'],
+        'mimetype': result['mimetype'],
+        'size': len(audio),
+        'message': 'Speech generated successfully!',
+        'engine_used': result['engine_used'],
+        'voice_used': result['voice_used'],
+        'voice_gender': voice_gender,
+        'actual_gender': result['actual_gender'],
+        'language': language,
+        'accent': accent,
+        'warning': warning,
+        'has_distinct_voices': has_distinct
+    }
+    
+    if persist:
+        artifact_id, output_path = artifact_registry.new_artifact()
+        write_audio_file(output_path, audio)
+        with metrics.stage('artifact_register', engine=result['engine_used'], language=language, accent=accent):
+            artifact_registry.register(
+                artifact_id,
+                output_path,
+                result['mimetype'],
+                result['extension'],
+                owner=owner,
+                ttl_seconds=ttl_seconds,
+                format=result['format'],
+                sample_rate=result['sample_rate'],
+                channels=result['channels'],
+                engine=result['engine_used'],
+                language=language,
+                accent=accent
+            )
+        response['artifact_id'] = artifact_id
+        response['audio_url'] = audio_url_for(artifact_id)
+    
+    return response, audio
+
+def run_speech_job(payload):
+    """Job queue handler: the same work as a synchronous /generate_speech request"""
+    # Keep the audio as long as the job record, so a completed job never points at an expired URL
+    ttl_seconds = max(app.config['ARTIFACT_TTL_SECONDS'], app.config['JOB_RETENTION_SECONDS'])
+    response, _ = create_speech(parse_speech_request(payload), payload.get('owner'), ttl_seconds=ttl_seconds)
+    return response
+
+def job_lane(options):
+    """Short texts get their own lane so they are never stuck behind long ones"""
+    return 'short' if len(options['text']) <= app.config['JOB_SHORT_TEXT_CHARS'] else 'long'
+
+def validate_callback_url(callback_url):
+    if callback_url is None:
+        return None
+    parsed = urlparse(str(callback_url))
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError('callback_url must be an absolute http(s) URL')
+    host = parsed.hostname.lower()
+    if host in app.config['CALLBACK_ALLOWED_HOSTS']:
+        return str(callback_url)
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (ValueError, socket.gaierror):
+        raise ValueError('callback_url host could not be resolved')
+    for address in addresses:
+        # Drop an IPv6 zone suffix ("fe80::1%eth0") before parsing
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ValueError('callback_url must not point at a private, loopback or link-local address')
+    return str(callback_url)
+
+def client_id():
+    """Rate limit key: the API key when one is sent, otherwise the client address"""
+    api_key = request.headers.get(app.config['API_KEY_HEADER'])
+    return f'key:{api_key}' if api_key else f'ip:{request.remote_addr}'
+
+def admission_error_response(error):
+    """429 for a client over its rate limit, 503 for a saturated engine; both say when to retry"""
+    response = jsonify({'error': str(error), 'retry_after': round(error.retry_after, 3)})
+    response.status_code = 503 if isinstance(error, OverloadedError) else 429
+    response.headers['Retry-After'] = error.retry_after_header
+    return response
+
+def admit_client(text_chars):
+    try:
+        rate_limiter.acquire(client_id(), text_chars)
+    except AdmissionError:
+        rate_limited_total.inc(endpoint=request.url_rule.rule)
+        raise
+
 @app.route('/generate_speech', methods=['POST'])
 def generate_speech():
     try:
         data = request.get_json()
-        text = data.get('text', '').strip()
-        tts_engine = data.get('engine', 'gtts')  # Default to gTTS
-        voice_gender = data.get('voice_gender', 'female')  # Default to female
-        language = data.get('language', 'english')  # Default to English
-        accent = data.get('accent', 'usa')  # Default to USA
-        
-        if not text:
-            return jsonify({'error': 'No text provided'}), 400
-        
-        if len(text) > 5000:
-            return jsonify({'error': 'Text too long. Maximum 5000 characters allowed.'}), 400
-        
-        print(f"Generating speech for text: {text[:50]}... using {tts_engine} with {voice_gender} {language} ({accent}) voice")
-        
-        # Generate unique filename to avoid conflicts
-        unique_id = str(uuid.uuid4())[:8]
-        output_path = os.path.join('static', 'audio', f'output_{unique_id}.wav')
-        voice_used = None
-        actual_gender = voice_gender
-        
-        # Check if distinct voices are available for this combination
-        has_distinct = has_distinct_voices(language, accent)
-        
-        if tts_engine == 'gtts':
-            success, voice_used, actual_gender = generate_with_gtts(text, output_path, voice_gender, language, accent)
-            if not success:
-                print("gTTS failed, falling back to pyttsx3")
-                success, voice_used, actual_gender = generate_with_pyttsx3(text, output_path, voice_gender, language, accent)
-        else:
-            success, voice_used, actual_gender = generate_with_pyttsx3(text, output_path, voice_gender, language, accent)
-            if not success:
-                print("pyttsx3 failed, falling back to gTTS")
-                success, voice_used, actual_gender = generate_with_gtts(text, output_path, voice_gender, language, accent)
-        
-        if not success:
-            return jsonify({'error': 'Failed to generate speech with both engines'}), 500
+        try:
+            with metrics.stage('validate'):
+                options = parse_speech_request(data)
+                callback_url = validate_callback_url(data.get('callback_url'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Read the generated audio file
-        with open(output_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
+        try:
+            admit_client(len(options['text']))
+        except AdmissionError as e:
+            return admission_error_response(e)
         
-        # Convert to base64 for web transmission
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+        # Asynchronous mode: persist the job and answer immediately
+        if data.get('async') or request.args.get('async') is not None:
+            lane = job_lane(options)
+            job_id = job_queue.enqueue(dict(options, owner=session_owner()), lane, callback_url)
+            print(f"Queued speech job {job_id} in {lane} lane")
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'lane': lane,
+                'status_url': url_for('get_job', job_id=job_id)
+            }), 202
         
-        # Clean up the temporary file
+        # persist=false skips the artifact: the audio is returned in this response and never written
+        persist = data.get('persist', True) not in (False, 'false', 0, '0')
         try:
-            os.remove(output_path)
-            # Also try to remove MP3 version if it exists
-            mp3_path = output_path.replace('.wav', '.mp3')
-            if os.path.exists(mp3_path):
-                os.remove(mp3_path)
-        except:
-            pass
+            response, audio = create_speech(options, session_owner(), interactive=True, persist=persist)
+        except AdmissionError as e:
+            return admission_error_response(e)
+        except EngineUnavailableError as e:
+            return jsonify({'error': str(e)}), 503
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 500
         
-        print("Speech generation completed successfully")
+        # Legacy clients still expect the audio inlined as base64
+        if data.get('inline_audio'):
+            with metrics.stage('base64', engine=response['engine_used'], language=response['language'], accent=response['accent']):
+                response['audio_data'] = base64.b64encode(audio).decode('utf-8')
+        elif not persist:
+            audio_response = Response(audio, mimetype=response['mimetype'])
+            audio_response.headers['Content-Disposition'] = f"inline; filename=generated_speech.{OUTPUT_FORMATS[response['format']]['extension']}"
+            audio_response.headers['X-Engine-Used'] = response['engine_used']
+            audio_response.headers['X-Voice-Used'] = quote(response['voice_used'])
+            audio_response.headers['X-Actual-Gender'] = response['actual_gender']
+            return audio_response
         
-        # Add warning if gender distinction isn't available
-        warning = None
-        if not has_distinct and tts_engine == 'gtts':
-            if language == 'marathi':
-                warning = "Note: Google TTS uses the same voice for both male and female in Marathi"
-            else:
-                warning = f"Note: Limited voice variation available for {language} ({accent}) accent"
-        
-        return jsonify({
-            'success': True,
-            'audio_data': audio_base64,
-            'message': 'Speech generated successfully!',
-            'engine_used': tts_engine,
-            'voice_used': voice_used,
-            'voice_gender': voice_gender,
-            'actual_gender': actual_gender,
-            'language': language,
-            'accent': accent,
-            'warning': warning,
-            'has_distinct_voices': has_distinct
-        })
+        return jsonify(response)
         
     except Exception as e:
         print(f"Error generating speech: {str(e)}")
         return jsonify({'error': f'Error generating speech: {str(e)}'}), 500
 
-def generate_with_gtts(text, output_path, voice_gender='female', language='english', accent='usa'):
-    """Generate speech using Google Text-to-Speech (online)"""
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Status of an asynchronous speech job, with the artifact details once completed"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    result = job.get('result')
+    if result and result.get('artifact_id') and artifact_registry.get(result['artifact_id']) is None:
+        # Evicted for the disk quota before the job was purged
+        result.pop('audio_url', None)
+        result['expired'] = True
+    return jsonify(job)
+
+def synthesize_with_retries(synthesize_segment, segment, index, retries):
+    """Synthesize one segment, retrying it independently of the others"""
+    attempts = retries + 1
+    for attempt in range(attempts):
+        try:
+            return synthesize_segment(segment, index)
+        except Exception as e:
+            segment_retries_total.inc(engine=metrics.labels().get('engine', ''))
+            print(f"Segment {index} failed (attempt {attempt + 1}/{attempts}): {e}")
+            if attempt + 1 == attempts:
+                raise
+
+def iter_synthesized_segments(segments, synthesize_segment, retries=0):
+    """Synthesize segments concurrently and yield their audio in the original order.
+
+    Each segment gets up to retries extra attempts of its own, so a transient
+    failure only redoes that piece; segments that already succeeded are served
+    from the cache on the next attempt of the whole request. gTTS segments pass
+    0 because GTTSClient already retries upstream errors with backoff.
+    """
+    if not segments:
+        raise ValueError('No speakable text after segmentation')
+
+    if len(segments) == 1:
+        yield synthesize_with_retries(synthesize_segment, segments[0], 0, retries)
+        return
+
+    # Each segment runs in a copy of this context so its stage timings keep the request's labels and trace
+    futures = [
+        synthesis_executor.submit(
+            contextvars.copy_context().run, synthesize_with_retries, synthesize_segment, segment, index, retries
+        )
+        for index, segment in enumerate(segments)
+    ]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        # Stop queued work if the consumer gave up (failure or client disconnect)
+        for future in futures:
+            future.cancel()
+
+def synthesize_segments(segments, synthesize_segment, retries=0):
+    """Synthesize all segments and return their audio in the original order"""
+    return list(iter_synthesized_segments(segments, synthesize_segment, retries))
+
+def synthesize_gtts_segment(text, lang_code, tld):
+    """Return MP3 bytes for one segment from gTTS, consulting the cache first"""
+    cache_key = make_cache_key(text, 'gtts', lang=lang_code, tld=tld)
+    with metrics.stage('cache_lookup', engine='gtts'):
+        cached_audio = audio_cache.get(cache_key)
+    if cached_audio is not None:
+        return cached_audio
+
+    scope = gtts_scope(lang_code, tld)
+    if not engine_router.available('gtts', scope):
+        raise RuntimeError(f'gTTS circuit open for {scope}')
+
+    started = time.monotonic()
     try:
-        # Get language configuration
-        lang_config = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG['english'])
-        accent_config = lang_config['accents'].get(accent, lang_config['accents']['usa'] if 'usa' in lang_config['accents'] else list(lang_config['accents'].values())[0])
-        
-        # Get voice configuration for gender and accent
-        voice_config = VOICE_CONFIG.get(language, {}).get(accent, {}).get(voice_gender, ['com'])
-        selected_tld = voice_config[0] if voice_config else accent_config['tld']
-        
-        # Create descriptive voice name with limitation note for certain languages
-        accent_name = accent_config['name']
-        lang_name = lang_config['name']
-        
-        if language == 'marathi':
-            voice_name = f"Google {lang_name} ({accent_name}) - Default Voice"
-            actual_gender = 'default'  # gTTS doesn't distinguish for Marathi
-        else:
-            voice_name = f"Google {lang_name} ({voice_gender.title()} - {accent_name})"
-            actual_gender = voice_gender
+        with metrics.stage('gtts_upstream', engine='gtts'):
+            audio_bytes = gtts_client.synthesize(text, lang_code, tld)
+    except Exception as e:
+        engine_router.record('gtts', scope, False, time.monotonic() - started, str(e))
+        raise
+    engine_router.record('gtts', scope, True, time.monotonic() - started)
+
+    with metrics.stage('cache_store', engine='gtts'):
+        audio_cache.put(cache_key, audio_bytes)
+    return audio_bytes
+
+def synthesize_pyttsx3_segment(text, voice_id):
+    """Return WAV bytes for one segment from pyttsx3, consulting the cache first"""
+    cache_key = make_cache_key(text, 'pyttsx3', voice=voice_id or 'default')
+    with metrics.stage('cache_lookup', engine='pyttsx3'):
+        cached_audio = audio_cache.get(cache_key)
+    if cached_audio is not None:
+        return cached_audio
+
+    pool = get_pyttsx3_pool()
+    if pool is None:
+        raise RuntimeError('pyttsx3 engine unavailable')
+    if not engine_router.available('pyttsx3'):
+        raise RuntimeError('pyttsx3 circuit open')
+
+    started = time.monotonic()
+    try:
+        # The worker returns the audio once it has seen the utterance finish
+        with metrics.stage('pyttsx3_synthesis', engine='pyttsx3'):
+            audio_bytes = pool.synthesize(text, voice_id)
+        if not audio_bytes:
+            raise RuntimeError('pyttsx3 produced no audio')
+        engine_router.record('pyttsx3', None, True, time.monotonic() - started)
+    except Exception as e:
+        engine_router.record('pyttsx3', None, False, time.monotonic() - started, str(e))
+        raise
+
+    with metrics.stage('cache_store', engine='pyttsx3'):
+        audio_cache.put(cache_key, audio_bytes)
+    return audio_bytes
+
+def resolve_gtts_voice(voice_gender='female', language='english', accent='usa'):
+    """Resolve the gTTS language code, TLD and display name for a voice request"""
+    # Get language configuration
+    lang_config = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG['english'])
+    accent_config = lang_config['accents'].get(accent, lang_config['accents']['usa'] if 'usa' in lang_config['accents'] else list(lang_config['accents'].values())[0])
+    
+    # Get voice configuration for gender and accent
+    voice_config = VOICE_CONFIG.get(language, {}).get(accent, {}).get(voice_gender, ['com'])
+    # Prefer the first TLD whose circuit is closed so one failing Google domain doesn't take the voice down
+    selected_tld = next(
+        (tld for tld in voice_config if engine_router.available('gtts', gtts_scope(lang_config['code'], tld))),
+        voice_config[0]
+    ) if voice_config else accent_config['tld']
+    
+    # Create descriptive voice name with limitation note for certain languages
+    accent_name = accent_config['name']
+    lang_name = lang_config['name']
+    
+    if language == 'marathi':
+        voice_name = f"Google {lang_name} ({accent_name}) - Default Voice"
+        actual_gender = 'default'  # gTTS doesn't distinguish for Marathi
+    else:
+        voice_name = f"Google {lang_name} ({voice_gender.title()} - {accent_name})"
+        actual_gender = voice_gender
+    
+    # Runs of text routed to another language keep the accent when that language has it
+    tlds = {
+        other_config['code']: other_config['accents'].get(accent, next(iter(other_config['accents'].values())))['tld']
+        for other_config in LANGUAGE_CONFIG.values()
+    }
+    tlds[lang_config['code']] = selected_tld
+    
+    return {
+        'lang_code': lang_config['code'],
+        'tld': selected_tld,
+        'tlds': tlds,
+        'voice_name': voice_name,
+        'actual_gender': actual_gender
+    }
+
+def generate_with_gtts(text, voice_gender='female', language='english', accent='usa'):
+    """Generate speech using Google Text-to-Speech (online); returns (MP3 bytes or None, voice name, gender)"""
+    try:
+        voice = resolve_gtts_voice(voice_gender, language, accent)
         
-        # Create gTTS object
-        tts = gTTS(
-            text=text, 
-            lang=lang_config['code'], 
-            slow=False, 
-            tld=selected_tld
+        with metrics.stage('normalize'):
+            runs = normalize_text(text, voice['lang_code'], app.config['MIXED_SCRIPT_MIN_WORDS'])
+        with metrics.stage('segment'):
+            segments = segment_runs(runs, app.config['SEGMENT_MAX_CHARS'])
+        audio_segments = synthesize_segments(
+            segments,
+            lambda segment, index: synthesize_gtts_segment(segment[1], segment[0], voice['tlds'][segment[0]])
         )
+        with metrics.stage('stitch'):
+            audio_bytes = stitch_audio_segments(audio_segments, 'mp3')
         
-        # Save to a temporary MP3 file first
-        temp_mp3 = output_path.replace('.wav', '.mp3')
-        tts.save(temp_mp3)
-        
-        # Copy MP3 as WAV (browsers handle both formats)
-        shutil.copy(temp_mp3, output_path)
-        
-        return True, voice_name, actual_gender
+        return audio_bytes, voice['voice_name'], voice['actual_gender']
         
     except Exception as e:
         print(f"gTTS error: {e}")
-        return False, None, 'unknown'
+        return None, None, 'unknown'
+
+def resolve_pyttsx3_voice(voice_gender='female', language='english', accent='usa'):
+    """Resolve the pyttsx3 voice id and display name for a voice request"""
+    selected_voice = select_pyttsx3_voice(voice_gender, language, accent)
+    if selected_voice:
+        voice_name, actual_gender = selected_voice['name'], selected_voice['gender']
+    else:
+        voice_name = f"System TTS ({voice_gender.title()} {accent.upper()})"
+        actual_gender = voice_gender
+    
+    # Note: pyttsx3 primarily supports English, so for Marathi it will use English pronunciation
+    if language == 'marathi':
+        voice_name += " (English pronunciation)"
+    
+    return {
+        'lang_code': LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG['english'])['code'],
+        'voice_id': selected_voice['id'] if selected_voice else None,
+        'voice_name': voice_name,
+        'actual_gender': actual_gender
+    }
 
-def generate_with_pyttsx3(text, output_path, voice_gender='female', language='english', accent='usa'):
-    """Generate speech using pyttsx3 (offline)"""
+def generate_with_pyttsx3(text, voice_gender='female', language='english', accent='usa'):
+    """Generate speech using pyttsx3 (offline); returns (WAV bytes or None, voice name, gender)"""
     try:
-        engine = get_pyttsx3_engine()
-        if engine is None:
-            return False, None, 'unknown'
-        
-        # Set voice based on preferences
-        voice_name, actual_gender = set_pyttsx3_voice(voice_gender, language, accent)
-        if not voice_name:
-            voice_name = f"System TTS ({voice_gender.title()} {accent.upper()})"
-            actual_gender = voice_gender
-        
-        # Note: pyttsx3 primarily supports English, so for Marathi it will use English pronunciation
-        if language == 'marathi':
-            voice_name += " (English pronunciation)"
+        if get_pyttsx3_pool() is None:
+            return None, None, 'unknown'
         
-        # Save to file
-        engine.save_to_file(text, output_path)
-        engine.runAndWait()
+        voice = resolve_pyttsx3_voice(voice_gender, language, accent)
         
-        # Wait a bit for file to be written
-        time.sleep(0.5)
+        # System voices only pronounce English, so numbers and symbols are always spelled out in English
+        with metrics.stage('normalize'):
+            runs = normalize_text(text, 'en')
+        with metrics.stage('segment'):
+            segments = segment_runs(runs, app.config['SEGMENT_MAX_CHARS'])
+        audio_segments = synthesize_segments(
+            segments,
+            lambda segment, index: synthesize_pyttsx3_segment(segment[1], voice['voice_id']),
+            retries=app.config['SEGMENT_RETRIES']
+        )
+        with metrics.stage('stitch'):
+            audio_bytes = stitch_audio_segments(audio_segments, 'wav')
         
-        # Check if file was created and has content
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-            return True, voice_name, actual_gender
-        else:
-            print("pyttsx3 failed to create audio file")
-            return False, None, 'unknown'
+        return audio_bytes, voice['voice_name'], voice['actual_gender']
             
     except Exception as e:
         print(f"pyttsx3 error: {e}")
-        return False, None, 'unknown'
+        return None, None, 'unknown'
+
+@app.route('/stream_speech', methods=['POST'])
+def stream_speech():
+    """Stream MP3 audio segment by segment so playback can start before synthesis finishes"""
+    try:
+        options = parse_speech_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    text = options['text']
+    tts_engine = options['engine']
+    voice_gender = options['voice_gender']
+    language = options['language']
+    accent = options['accent']
+    
+    try:
+        admit_client(len(text))
+    except AdmissionError as e:
+        return admission_error_response(e)
+    
+    print(f"Streaming speech for text: {text[:50]}... using {tts_engine} with {voice_gender} {language} ({accent}) voice")
+    
+    gtts_voice = resolve_gtts_voice(voice_gender, language, accent)
+    pyttsx3_voice = resolve_pyttsx3_voice(voice_gender, language, accent)
+    
+    # Segments are sent back to back, so each one's Xing/Info length frame is dropped;
+    # otherwise players trust the first segment's length and stop there
+    def synthesize_gtts(segment, index):
+        lang_code, spoken_text = segment
+        return strip_mp3_metadata(synthesize_gtts_segment(spoken_text, lang_code, gtts_voice['tlds'][lang_code]))
+    
+    def synthesize_pyttsx3(segment, index):
+        wav_bytes = synthesize_pyttsx3_segment(segment[1], pyttsx3_voice['voice_id'])
+        with metrics.stage('transcode'):
+            return strip_mp3_metadata(encode_mp3(wav_bytes, STREAM_MP3_SAMPLE_RATE, STREAM_MP3_BITRATE))
+    
+    engines = route_engines(tts_engine, voice_gender, language, accent)
+    if not engines:
+        return jsonify({'error': 'No TTS engine is currently available; try again shortly'}), 503
+    synthesizers = {
+        'gtts': synthesize_gtts,
+        # gTTS retries inside its client; only offline segments are retried here
+        'pyttsx3': lambda segment, index: synthesize_with_retries(
+            synthesize_pyttsx3, segment, index, app.config['SEGMENT_RETRIES']
+        )
+    }
+    
+    def synthesize_segment(segment, index):
+        # Both engines produce MP3 here, so a failed segment can fall back individually
+        for position, engine in enumerate(engines):
+            try:
+                with metrics.bind(engine=engine, language=language, accent=accent):
+                    return synthesizers[engine](segment, index)
+            except Exception as e:
+                engine_failures_total.inc(engine=engine, language=language, accent=accent)
+                if position + 1 == len(engines):
+                    raise
+                fallbacks_total.inc(from_engine=engine, to_engine=engines[position + 1], language=language)
+                print(f"Streaming segment {index} failed on {engine}, falling back: {e}")
+    
+    with metrics.stage('normalize', language=language, accent=accent):
+        runs = normalize_text(text, gtts_voice['lang_code'], app.config['MIXED_SCRIPT_MIN_WORDS'])
+    with metrics.stage('segment', language=language, accent=accent):
+        segments = segment_runs(
+            runs,
+            app.config['SEGMENT_MAX_CHARS'],
+            first_max_chars=app.config['STREAM_FIRST_SEGMENT_CHARS']
+        )
+    if not segments:
+        return jsonify({'error': 'No speakable text provided'}), 400
+    
+    # The stream holds a slot on the first engine that admits it; that engine leads, the rest are fallbacks
+    saturated = []
+    for engine in engines:
+        try:
+            admission_wait_seconds.observe(engine_limiter.acquire(engine), engine=engine)
+        except OverloadedError as e:
+            admission_rejections_total.inc(engine=engine, reason=e.reason)
+            saturated.append(e)
+            continue
+        engines = [engine] + [other for other in engines if other != engine]
+        break
+    if len(saturated) == len(engines):
+        return admission_error_response(min(saturated, key=lambda e: e.retry_after))
+    slot_started = time.monotonic()
+    voice = gtts_voice if engines[0] == 'gtts' else pyttsx3_voice
+    
+    def generate():
+        try:
+            for audio_bytes in iter_synthesized_segments(segments, synthesize_segment):
+                audio_bytes_total.inc(len(audio_bytes), engine=engines[0], format='mp3', mode='stream')
+                yield audio_bytes
+        except Exception as e:
+            # Headers are already sent; re-raising aborts the chunked body without its final chunk,
+            # so clients see a truncated transfer rather than a complete (but short) stream
+            print(f"Error streaming speech: {str(e)}")
+            raise
+    
+    response = Response(stream_with_context(generate()), mimetype='audio/mpeg')
+    response.call_on_close(lambda: engine_limiter.release(engines[0], time.monotonic() - slot_started))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from buffering the stream
+    response.headers['X-Engine-Used'] = engines[0]
+    response.headers['X-Voice-Used'] = quote(voice['voice_name'])
+    response.headers['X-Actual-Gender'] = voice['actual_gender']
+    response.headers['X-Segment-Count'] = str(len(segments))
+    return response
+
+def negotiate_audio_format(native_mimetype):
+    """Output format requested via ?format= or, failing that, by an Accept header that rules out native_mimetype"""
+    requested = request.args.get('format')
+    if requested:
+        return requested
+    accept = request.accept_mimetypes
+    # Media elements list several types (Firefox: audio/webm,audio/ogg,audio/wav,audio/*;q=0.9,...),
+    # so serve the stored audio whenever it is acceptable and transcode only when it is not
+    if not accept or accept.quality(native_mimetype.split(';')[0]):
+        return None
+    best = accept.best_match(list(MIMETYPE_FORMATS))
+    return MIMETYPE_FORMATS[best] if best else None
+
+def get_audio_variant(artifact, audio_format, sample_rate, bitrate):
+    """Encoded variant of an artifact, encoding it on first request and caching it alongside"""
+    key = variant_key(audio_format, sample_rate, bitrate)
+    variant = artifact_registry.get_variant(artifact['id'], key)
+    if variant is not None and os.path.exists(variant['path']):
+        return variant
+    
+    with open(artifact['path'], 'rb') as audio_file:
+        with metrics.stage('transcode', engine=artifact.get('engine'), language=artifact.get('language'), accent=artifact.get('accent')):
+            encoded = transcode(
+                audio_file.read(), audio_format, sample_rate, bitrate,
+                raw_sample_rate=artifact.get('sample_rate'), raw_channels=artifact.get('channels') or 1
+            )
+    variant_path = artifact_registry.variant_path(artifact['id'], key)
+    write_audio_file(variant_path, encoded)
+    return artifact_registry.add_variant(
+        artifact['id'],
+        key,
+        variant_path,
+        OUTPUT_FORMATS[audio_format]['mimetype'],
+        OUTPUT_FORMATS[audio_format]['extension']
+    )
+
+@app.route('/audio/<artifact_id>')
+def get_audio(artifact_id):
+    """Serve a generated artifact straight from disk with Range and ETag support"""
+    artifact = artifact_registry.get(artifact_id)
+    if artifact is None or not os.path.exists(artifact['path']):
+        return jsonify({'error': 'Audio not found or expired'}), 404
+    
+    try:
+        audio_format, sample_rate, bitrate = parse_output_options(
+            negotiate_audio_format(artifact['mimetype']), request.args.get('sample_rate'), request.args.get('bitrate')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    served = artifact
+    etag = artifact_id
+    if (audio_format and audio_format != artifact['format']) or sample_rate or bitrate:
+        try:
+            served = get_audio_variant(artifact, audio_format or artifact['format'], sample_rate, bitrate)
+        except Exception as e:
+            print(f"Error transcoding artifact {artifact_id}: {e}")
+            return jsonify({'error': f'Error transcoding audio: {str(e)}'}), 500
+        etag = f"{artifact_id}-{served['key']}"
+    
+    # Artifacts never change once written, so proxies may cache them for their lifetime
+    response = send_file(
+        served['path'],
+        mimetype=served['mimetype'],
+        as_attachment=request.args.get('download') is not None,
+        download_name=f"generated_speech.{served['extension']}",
+        conditional=True,
+        etag=etag,
+        max_age=app.config['ARTIFACT_TTL_SECONDS']
+    )
+    response.headers['Cache-Control'] = f"public, max-age={app.config['ARTIFACT_TTL_SECONDS']}, immutable"
+    response.vary.add('Accept')
+    return response
+
+def prepare_batch_items(raw_items, defaults=None):
+    """Validate batch items individually so one bad item doesn't reject the whole batch"""
+    if not isinstance(raw_items, list):
+        raise ValueError('Batch items must be a list')
+    if not raw_items:
+        raise ValueError('Batch contains no items')
+    if len(raw_items) > app.config['BATCH_MAX_ITEMS']:
+        raise ValueError(f"Batch too large. Maximum {app.config['BATCH_MAX_ITEMS']} items allowed.")
+    if defaults is not None and not isinstance(defaults, dict):
+        raise ValueError('Batch defaults must be an object')
+    
+    items = []
+    for index, raw_item in enumerate(raw_items):
+        if isinstance(raw_item, str):
+            raw_item = {'text': raw_item}
+        item_id = raw_item.get('id', index) if isinstance(raw_item, dict) else index
+        try:
+            payload = dict(defaults or {}, **raw_item) if isinstance(raw_item, dict) else raw_item
+            items.append({'id': item_id, 'options': parse_speech_request(payload)})
+        except ValueError as e:
+            items.append({'id': item_id, 'error': str(e)})
+    return items
+
+def read_batch_payload(body, is_jsonl):
+    """Items, defaults and archive flag from a JSON or JSON Lines batch body"""
+    if is_jsonl:
+        return parse_jsonl(body), {}, False
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f'Invalid JSON: {e}')
+    if isinstance(payload, list):
+        return payload, {}, False
+    if not isinstance(payload, dict):
+        raise ValueError('Batch must be a list of items or an object with an "items" list')
+    return payload.get('items'), payload.get('defaults') or {}, bool(payload.get('archive'))
+
+@app.route('/batch_speech', methods=['POST'])
+def batch_speech():
+    """Submit a bulk synthesis job; returns a batch id to poll"""
+    is_jsonl = request.mimetype in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines')
+    try:
+        raw_items, defaults, archive = read_batch_payload(request.get_data(as_text=True), is_jsonl)
+        items = prepare_batch_items(raw_items, defaults)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        admit_client(sum(len(item['options']['text']) for item in items if 'options' in item))
+    except AdmissionError as e:
+        return admission_error_response(e)
+    
+    archive = archive or request.args.get('archive') is not None
+    batch = batch_manager.submit(items, archive=archive)
+    batch_id = batch['batch_id']
+    print(f"Batch {batch_id} queued with {batch['total']} items ({batch['unique']} unique)")
+    
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'status_url': url_for('get_batch', batch_id=batch_id),
+        'archive_url': url_for('get_batch_archive', batch_id=batch_id) if archive else None,
+        'total': batch['total'],
+        'unique': batch['unique']
+    }), 202
+
+@app.route('/batch_speech/<batch_id>')
+def get_batch(batch_id):
+    """Progress and per-item results of a batch (?details=1 to list every item)"""
+    include_items = request.args.get('details') is not None
+    batch = batch_manager.get(batch_id)
+    if batch is not None:
+        return jsonify(batch_manager.manifest(batch, include_items=include_items))
+    
+    manifest = batch_manager.load_manifest(batch_id)
+    if manifest is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    if not include_items:
+        manifest.pop('items', None)
+    return jsonify(manifest)
+
+@app.route('/batch_speech/<batch_id>/archive')
+def get_batch_archive(batch_id):
+    """Download a finished batch as a zip of audio files plus manifest.json"""
+    batch = batch_manager.get(batch_id)
+    if batch is not None and batch['status'] in ('queued', 'running'):
+        return jsonify({'error': 'Batch is still running'}), 409
+    
+    archive_path = os.path.join(app.config['BATCH_DIR'], f'{secure_filename(batch_id)}.zip')
+    if not os.path.exists(archive_path):
+        return jsonify({'error': 'Archive not found'}), 404
+    return send_file(archive_path, mimetype='application/zip', as_attachment=True, download_name=f'batch_{batch_id}.zip')
 
 @app.route('/download_audio')
 def download_audio():
+    """Download an artifact by ?artifact_id=, or the latest one generated by this browser session"""
     try:
-        # Find the most recent audio file
-        audio_dir = os.path.join('static', 'audio')
-        audio_files = [f for f in os.listdir(audio_dir) if f.startswith('output_') and (f.endswith('.wav') or f.endswith('.mp3'))]
+        artifact_id = request.args.get('artifact_id')
+        if artifact_id:
+            artifact = artifact_registry.get(artifact_id)
+        else:
+            artifact = artifact_registry.latest_for_owner(session_owner())
         
-        if not audio_files:
+        if artifact is None:
             return jsonify({'error': 'No audio file found'}), 404
         
-        # Get the most recent file
-        audio_files.sort(key=lambda f: os.path.getmtime(os.path.join(audio_dir, f)), reverse=True)
-        latest_file = os.path.join(audio_dir, audio_files[0])
-        
-        return send_file(latest_file, as_attachment=True, download_name=f'generated_speech.{audio_files[0].split(".")[-1]}')
+        return send_file(artifact['path'], mimetype=artifact['mimetype'], as_attachment=True, download_name=f"generated_speech.{artifact['extension']}")
     except Exception as e:
         return jsonify({'error': f'Error downloading file: {str(e)}'}), 500
 
+@app.route('/metrics')
+def get_metrics():
+    """Stage timings, request latency and engine counters in the Prometheus text format (per process)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/health/live')
+def health_live():
+    """Liveness: the process is up and serving requests; never waits on engines"""
+    return jsonify({'status': 'alive', 'uptime': round(time.time() - startup_state['started'], 3)})
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness: warm-up has finished, so new traffic won't pay first-use costs"""
+    ready = startup_state['ready_event'].is_set()
+    body = {
+        'status': 'ready' if ready else 'starting',
+        'uptime': round(time.time() - startup_state['started'], 3),
+        'warm_up': startup_state['steps']
+    }
+    return jsonify(body), 200 if ready else 503
+
 @app.route('/health')
 def health():
     gtts_available = True
-    pyttsx3_available = get_pyttsx3_engine() is not None
+    # Report the pool as it is; starting it here would block the health check
+    pyttsx3_available = pyttsx3_pool is not None
     
     return jsonify({
         'status': 'healthy',
+        'ready': startup_state['ready_event'].is_set(),
         'engines': {
             'gtts': gtts_available,
             'pyttsx3': pyttsx3_available
         },
         'primary_engine': 'gtts' if gtts_available else 'pyttsx3',
-        'available_voices': len(available_voices),
+        'available_voices': len(voice_registry.voices),
         'languages': list(LANGUAGE_CONFIG.keys()),
         'total_voice_combinations': sum(len(lang['accents']) * 2 for lang in LANGUAGE_CONFIG.values()),
+        'cache': audio_cache.stats(),
+        'text_normalization': normalization_stats(),
+        'gtts_client': gtts_client.stats(),
+        'router': engine_router.stats(),
+        'pyttsx3_pool': pyttsx3_pool.stats() if pyttsx3_pool else None,
+        'jobs': job_queue.stats(),
+        'artifacts': artifact_registry.stats(),
+        'admission': {'rate_limit': rate_limiter.stats(), 'engines': engine_limiter.stats()},
         'voice_limitations': {
             'marathi_gtts': 'Same voice for male/female',
             'indian_english_gtts': 'Limited voice variation'
         }
     })
 
+def voice_registry_response(name):
+    """Serve a prebuilt capability response, answering 304 when the client's ETag is current"""
+    body, etag = voice_registry.response(name)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Revalidate, since voices can be reloaded
+    return response.make_conditional(request)
+
 @app.route('/voice_capabilities')
 def get_voice_capabilities():
     """Get detailed information about voice capabilities for each language/accent combination"""
-    capabilities = {}
-    
-    for lang_key, lang_config in LANGUAGE_CONFIG.items():
-        capabilities[lang_key] = {}
-        for accent_key, accent_config in lang_config['accents'].items():
-            has_distinct = has_distinct_voices(lang_key, accent_key)
-            capabilities[lang_key][accent_key] = {
-                'gtts_distinct_voices': lang_key == 'english',  # Only English has some variation
-                'pyttsx3_distinct_voices': has_distinct,
-                'recommended_engine': 'pyttsx3' if has_distinct else 'gtts',
-                'limitation': 'Same voice for both genders' if lang_key == 'marathi' else None
-            }
-    
-    return jsonify(capabilities)
+    return voice_registry_response('voice_capabilities')
 
 @app.route('/languages')
 def get_languages():
@@ -432,85 +1528,58 @@ def get_languages():
 @app.route('/engines')
 def get_engines():
     """Get available TTS engines with language and accent support"""
-    engines = []
-    
-    # Check gTTS availability
-    try:
-        from gtts import gTTS
-        engines.append({
-            'id': 'gtts',
-            'name': 'Google Text-to-Speech',
-            'description': 'High-quality online TTS (limited voice gender distinction)',
-            'quality': 'high',
-            'speed': 'medium',
-            'languages': list(LANGUAGE_CONFIG.keys()),
-            'voice_options': ['female', 'male'],
-            'accent_support': True,
-            'limitations': 'Same voice for male/female in some languages'
-        })
-    except:
-        pass
-    
-    # Check pyttsx3 availability
-    if get_pyttsx3_engine() is not None:
-        voice_options = []
-        female_voices = [v for v in available_voices if v['gender'] == 'female']
-        male_voices = [v for v in available_voices if v['gender'] == 'male']
-        
-        if female_voices:
-            voice_options.append('female')
-        if male_voices:
-            voice_options.append('male')
-        if not voice_options:
-            voice_options = ['default']
-        
-        engines.append({
-            'id': 'pyttsx3',
-            'name': 'System TTS',
-            'description': 'Offline system-based TTS with distinct voices (English only)',
-            'quality': 'medium',
-            'speed': 'fast',
-            'languages': ['english'],  # pyttsx3 mainly supports English
-            'voice_options': voice_options,
-            'accent_support': False,
-            'voices_detail': available_voices,
-            'limitations': 'English only, uses system voices'
-        })
-    
-    return jsonify({'engines': engines})
+    # Starts the offline engine on first use so its voices are part of the response
+    get_pyttsx3_pool()
+    return voice_registry_response('engines')
 
 @app.route('/voices')
 def get_voices():
     """Get detailed voice information"""
-    voices_info = {
-        'gtts': {},
-        'pyttsx3': {
-            'female': [v['name'] for v in available_voices if v['gender'] == 'female'],
-            'male': [v['name'] for v in available_voices if v['gender'] == 'male'],
-            'other': [v['name'] for v in available_voices if v['gender'] == 'unknown']
-        }
-    }
+    return voice_registry_response('voices')
+
+@app.route('/voices/reload', methods=['POST'])
+def reload_system_voices():
+    """Restart the pyttsx3 workers so newly installed or removed system voices are picked up"""
+    pool = get_pyttsx3_pool()
+    if pool is None:
+        return jsonify({'error': 'pyttsx3 engine unavailable'}), 503
+    pool.recycle_all()
+    return jsonify({'status': 'reloading', 'version': voice_registry.version}), 202
+
+def run_batch_cli(argv):
+    """Synthesize a JSON/JSONL file of items from the command line"""
+    parser = argparse.ArgumentParser(prog='app.py batch', description='Synthesize a batch of texts without starting the web server')
+    parser.add_argument('input', help='JSON list or JSON Lines file of items (strings or objects with text, engine, voice_gender, ...)')
+    parser.add_argument('--output-dir', required=True, help='directory to write audio files and manifest.json to')
+    parser.add_argument('--archive', help='also bundle the results and manifest into this zip file')
+    parser.add_argument('--concurrency', type=int, default=app.config['BATCH_CONCURRENCY'], help='maximum items synthesized at once')
+    args = parser.parse_args(argv)
     
-    # Build gTTS voice info for each language and accent
-    for lang_key, lang_config in LANGUAGE_CONFIG.items():
-        voices_info['gtts'][lang_key] = {}
-        for accent_key, accent_config in lang_config['accents'].items():
-            if lang_key == 'marathi':
-                voices_info['gtts'][lang_key][accent_key] = {
-                    'female': f"Google {lang_config['name']} ({accent_config['name']}) - Default Voice",
-                    'male': f"Google {lang_config['name']} ({accent_config['name']}) - Default Voice (Same as Female)"
-                }
-            else:
-                voices_info['gtts'][lang_key][accent_key] = {
-                    'female': f"Google {lang_config['name']} Female ({accent_config['name']})",
-                    'male': f"Google {lang_config['name']} Male ({accent_config['name']}) - Limited Variation"
-                }
+    with open(args.input, encoding='utf-8') as input_file:
+        body = input_file.read()
+    is_jsonl = args.input.endswith(('.jsonl', '.ndjson'))
+    try:
+        raw_items, defaults, _ = read_batch_payload(body, is_jsonl)
+        items = prepare_batch_items(raw_items, defaults)
+    except ValueError as e:
+        print(f"Invalid batch: {e}")
+        return 2
+    
+    batch_manager.max_concurrency = args.concurrency
+    
+    def progress(done, total):
+        print(f"[{done}/{total}] unique items processed")
     
-    return jsonify(voices_info)
+    manifest = batch_manager.run(items, args.output_dir, args.archive, progress)
+    print(f"Batch {manifest['status']}: {manifest['counts']['completed']} completed, {manifest['counts']['failed']} failed "
+          f"({manifest['total']} items, {manifest['unique']} unique)")
+    for failure in manifest['failures']:
+        print(f"- item {failure['id']}: {failure['error']}")
+    return 1 if manifest['counts']['failed'] else 0
 
 if __name__ == '__main__':
-    # Initialize pyttsx3 to get voice info
-    get_pyttsx3_engine()
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        sys.exit(run_batch_cli(sys.argv[2:]))
     
     print("Starting Enhanced Multi-Language Text-to-Speech Web App...")
     print("Available engines:")
@@ -521,4 +1590,7 @@ if __name__ == '__main__':
     print("- Marathi: Limited to single voice per engine")
     print("- Recommendation: Use System TTS for distinct male/female voices")
     print("\nNavigate to http://localhost:5000 to use the app")
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    print("(Development server; use 'gunicorn -c gunicorn.conf.py' in production)")
+    create_app()
+    # The reloader would start a second copy of every background service
+    app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,354 @@
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+ARTIFACT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS artifacts (
+    id TEXT PRIMARY KEY,
+    owner TEXT,
+    path TEXT NOT NULL,
+    mimetype TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    disk_bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL,
+    metadata TEXT NOT NULL,
+    variants TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS artifacts_owner ON artifacts (owner, created);
+CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created);
+CREATE INDEX IF NOT EXISTS artifacts_expires ON artifacts (expires);
+'''
+
+RECORD_COLUMNS = ('id', 'owner', 'path', 'mimetype', 'extension', 'size', 'created', 'expires')
+
+
+def _remove_files(record):
+    for path in [record['path']] + [variant['path'] for variant in record['variants'].values()]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ArtifactRegistry:
+    """Generated audio files kept on disk and addressed by an opaque id.
+
+    Every artifact is recorded with its owner session, format, size and
+    expiry, so serving one is a lookup by id (or by owner for their latest)
+    rather than a scan of the directory. With db_path the records are also
+    kept in SQLite, so every process sharing artifact_dir (e.g. another server
+    worker) can serve them and they survive a restart. Expired artifacts, and
+    the oldest ones once the directory exceeds max_disk_bytes, are deleted by a
+    background janitor rather than on the request path.
+    """
+
+    def __init__(self, artifact_dir, ttl_seconds=3600, max_disk_bytes=None, db_path=None, janitor_interval=60):
+        self.artifact_dir = artifact_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self.db_path = db_path
+        self.janitor_interval = janitor_interval
+
+        self._lock = threading.Lock()
+        self._records = {}
+        self._latest_by_owner = {}
+        self._disk_bytes = 0
+        self._expired = 0
+        self._evicted = 0
+        self._stopping = threading.Event()
+        self._janitor = None
+
+        os.makedirs(artifact_dir, exist_ok=True)
+        if db_path:
+            db_dir = os.path.dirname(db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            with self._connect() as conn:
+                conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_record(row):
+        record = dict(json.loads(row['metadata']), **{column: row[column] for column in RECORD_COLUMNS})
+        record['variants'] = json.loads(row['variants'])
+        return record
+
+    def new_artifact(self):
+        """Reserve an id and the path the audio should be written to"""
+        artifact_id = uuid.uuid4().hex
+        return artifact_id, os.path.join(self.artifact_dir, f'{artifact_id}.audio')
+
+    def register(self, artifact_id, path, mimetype, extension, owner=None, ttl_seconds=None, **metadata):
+        """Record a finished artifact so it can be served by id (for ttl_seconds, default the registry's TTL)"""
+        created = time.time()
+        record = dict(
+            metadata,
+            id=artifact_id,
+            owner=owner,
+            path=path,
+            mimetype=mimetype,
+            extension=extension,
+            size=os.path.getsize(path),
+            created=created,
+            expires=created + (self.ttl_seconds if ttl_seconds is None else ttl_seconds),
+            variants={}
+        )
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT INTO artifacts (id, owner, path, mimetype, extension, size, disk_bytes, created, expires, metadata) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (artifact_id, owner, path, mimetype, extension, record['size'], record['size'],
+                     created, record['expires'], json.dumps(metadata))
+                )
+        with self._lock:
+            self._records[artifact_id] = record
+            self._disk_bytes += record['size']
+            if owner:
+                self._latest_by_owner[owner] = artifact_id
+        return record
+
+    def _live(self, record):
+        # Another process may have deleted the files since this record was cached
+        if record is None or record['expires'] <= time.time() or not os.path.exists(record['path']):
+            return None
+        return record
+
+    def get(self, artifact_id):
+        """Look up a live artifact by id"""
+        if not ARTIFACT_ID_PATTERN.match(artifact_id or ''):
+            return None
+        with self._lock:
+            record = self._records.get(artifact_id)
+        if record is None and self.db_path:
+            with self._connect() as conn:
+                row = conn.execute('SELECT * FROM artifacts WHERE id = ?', (artifact_id,)).fetchone()
+            if row is not None:
+                loaded = self._row_to_record(row)
+                with self._lock:
+                    record = self._records.get(artifact_id)
+                    if record is None:
+                        record = self._records[artifact_id] = loaded
+                        self._disk_bytes += row['disk_bytes']
+        return self._live(record)
+
+    def latest_for_owner(self, owner):
+        """Most recent live artifact created by this owner session, if any"""
+        if not owner:
+            return None
+        if self.db_path:
+            # Always ask the database: another process may have registered something newer
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT id FROM artifacts WHERE owner = ? AND expires > ? ORDER BY created DESC LIMIT 1',
+                    (owner, time.time())
+                ).fetchone()
+            artifact_id = row['id'] if row else None
+        else:
+            with self._lock:
+                artifact_id = self._latest_by_owner.get(owner)
+        return self.get(artifact_id) if artifact_id else None
+
+    def variant_path(self, artifact_id, key):
+        """Path for an encoded variant stored alongside the artifact"""
+        return os.path.join(self.artifact_dir, f'{artifact_id}.{key}.audio')
+
+    def get_variant(self, artifact_id, key):
+        with self._lock:
+            record = self._records.get(artifact_id)
+            return record['variants'].get(key) if record else None
+
+    def add_variant(self, artifact_id, key, path, mimetype, extension):
+        """Remember an encoded variant so repeated format requests reuse it"""
+        variant = {
+            'key': key,
+            'path': path,
+            'mimetype': mimetype,
+            'extension': extension,
+            'size': os.path.getsize(path)
+        }
+        variants = None
+        if self.db_path:
+            # Merge into the stored variants in one write transaction: other processes add their own
+            # variants of the same artifact, and a lost entry would leave its file uncounted and undeleted
+            with self._connect() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute('SELECT variants FROM artifacts WHERE id = ?', (artifact_id,)).fetchone()
+                    if row is not None:
+                        variants = json.loads(row['variants'])
+                        previous = variants.get(key)
+                        variants[key] = variant
+                        conn.execute(
+                            'UPDATE artifacts SET variants = ?, disk_bytes = disk_bytes + ? WHERE id = ?',
+                            (json.dumps(variants), variant['size'] - (previous['size'] if previous else 0), artifact_id)
+                        )
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+        with self._lock:
+            record = self._records.get(artifact_id)
+            if record is None:
+                return variant
+            if variants is None:
+                variants = dict(record['variants'], **{key: variant})
+            added = sum(v['size'] for v in variants.values()) - sum(v['size'] for v in record['variants'].values())
+            record['variants'] = variants
+            self._disk_bytes += added
+        return variant
+
+    def _forget(self, artifact_ids):
+        with self._lock:
+            for artifact_id in artifact_ids:
+                record = self._records.pop(artifact_id, None)
+                if record is None:
+                    continue
+                self._disk_bytes -= record['size'] + sum(v['size'] for v in record['variants'].values())
+                if record['owner'] and self._latest_by_owner.get(record['owner']) == artifact_id:
+                    del self._latest_by_owner[record['owner']]
+
+    def _delete_rows(self, conn, where, params):
+        # DELETE ... RETURNING claims the rows, so only one process removes each artifact's files
+        rows = conn.execute(f'DELETE FROM artifacts WHERE {where} RETURNING *', params).fetchall()
+        records = [self._row_to_record(row) for row in rows]
+        self._forget([record['id'] for record in records])
+        for record in records:
+            _remove_files(record)
+        return len(records)
+
+    def _collect_db(self, now):
+        with self._connect() as conn:
+            expired = self._delete_rows(conn, 'expires <= ?', (now,))
+            evicted = 0
+            if self.max_disk_bytes is not None:
+                total = conn.execute('SELECT COALESCE(SUM(disk_bytes), 0) FROM artifacts').fetchone()[0]
+                if total > self.max_disk_bytes:
+                    victims = []
+                    for row in conn.execute('SELECT id, disk_bytes FROM artifacts ORDER BY created'):
+                        if total <= self.max_disk_bytes:
+                            break
+                        victims.append(row['id'])
+                        total -= row['disk_bytes']
+                    for start in range(0, len(victims), 500):
+                        chunk = victims[start:start + 500]
+                        evicted += self._delete_rows(conn, f"id IN ({','.join('?' * len(chunk))})", chunk)
+        # Drop cached records another process has already expired
+        with self._lock:
+            stale = [artifact_id for artifact_id, record in self._records.items() if record['expires'] <= now]
+        self._forget(stale)
+        return expired, evicted
+
+    def _collect_memory(self, now):
+        with self._lock:
+            expired = [record for record in self._records.values() if record['expires'] <= now]
+            evicted = []
+            if self.max_disk_bytes is not None:
+                total = self._disk_bytes - sum(r['size'] + sum(v['size'] for v in r['variants'].values()) for r in expired)
+                if total > self.max_disk_bytes:
+                    remaining = sorted(
+                        (r for r in self._records.values() if r['expires'] > now), key=lambda r: r['created']
+                    )
+                    for record in remaining:
+                        if total <= self.max_disk_bytes:
+                            break
+                        evicted.append(record)
+                        total -= record['size'] + sum(v['size'] for v in record['variants'].values())
+        self._forget([record['id'] for record in expired + evicted])
+        for record in expired + evicted:
+            _remove_files(record)
+        return len(expired), len(evicted)
+
+    def _sweep_orphans(self, now):
+        """Delete files older than the TTL that no record points at (e.g. from before a restart)"""
+        removed = 0
+        cutoff = now - self.ttl_seconds
+        with os.scandir(self.artifact_dir) as entries:
+            for entry in entries:
+                artifact_id = entry.name.split('.', 1)[0]
+                try:
+                    if not entry.is_file() or entry.stat().st_mtime > cutoff:
+                        continue
+                except OSError:
+                    continue
+                if self.get(artifact_id) is not None:
+                    continue
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def collect(self):
+        """Expire artifacts past their TTL, then evict the oldest until under the disk quota"""
+        now = time.time()
+        if self.db_path:
+            expired, evicted = self._collect_db(now)
+        else:
+            expired, evicted = self._collect_memory(now)
+        orphans = self._sweep_orphans(now)
+        with self._lock:
+            self._expired += expired
+            self._evicted += evicted
+        if expired or evicted or orphans:
+            print(f"Artifact janitor: {expired} expired, {evicted} evicted for disk quota, {orphans} orphaned file(s) removed")
+        return {'expired': expired, 'evicted': evicted, 'orphans': orphans}
+
+    def _janitor_loop(self):
+        while not self._stopping.wait(self.janitor_interval):
+            try:
+                self.collect()
+            except Exception as e:
+                print(f"Artifact janitor failed: {e}")
+
+    def start(self):
+        """Start the background janitor"""
+        if self._janitor is not None:
+            return
+        self._stopping.clear()
+        self._janitor = threading.Thread(target=self._janitor_loop, name='tts-artifact-janitor', daemon=True)
+        self._janitor.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._janitor is not None:
+            self._janitor.join()
+            self._janitor = None
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'cached_records': len(self._records),
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'expired': self._expired,
+                'evicted': self._evicted,
+                'persistent': bool(self.db_path)
+            }
+        if self.db_path:
+            with self._connect() as conn:
+                row = conn.execute('SELECT COUNT(*), COALESCE(SUM(disk_bytes), 0) FROM artifacts').fetchone()
+            stats['artifacts'], stats['disk_bytes'] = row[0], row[1]
+        else:
+            stats['artifacts'] = stats['cached_records']
+        return stats
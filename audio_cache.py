@@ -0,0 +1,177 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def normalize_cache_text(text):
+    """Collapse whitespace so trivially different inputs share a cache entry"""
+    return ' '.join(text.split())
+
+
+def make_cache_key(text, engine, **params):
+    """Build a content-addressed key from the text and the resolved voice parameters.
+
+    text should already be in the canonical form from text_normalization, so
+    inputs that read the same share a key.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(engine.encode('utf-8'))
+    for name in sorted(params):
+        hasher.update(b'\x00')
+        hasher.update(f"{name}={params[name]}".encode('utf-8'))
+    hasher.update(b'\x00')
+    hasher.update(normalize_cache_text(text).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class AudioCache:
+    """Two-tier cache for synthesized audio: a bounded in-memory LRU in front of a size-capped disk store"""
+
+    def __init__(self, cache_dir, max_memory_items=128, max_memory_bytes=64 * 1024 * 1024,
+                 max_disk_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> bytes, most recently used last
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> size, most recently used last
+        self._disk_bytes = 0
+
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0
+        }
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_disk_index()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.bin')
+
+    def _load_disk_index(self):
+        """Rebuild the disk index from a previous run, oldest files first"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.bin'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def get(self, key):
+        """Return cached audio bytes for key, or None on a miss"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return data
+
+            if key not in self._disk:
+                self.counters['misses'] += 1
+                return None
+            self._disk.move_to_end(key)
+
+        try:
+            with open(self._path_for(key), 'rb') as cached_file:
+                data = cached_file.read()
+        except OSError:
+            with self._lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+                self.counters['misses'] += 1
+            return None
+
+        with self._lock:
+            self.counters['disk_hits'] += 1
+            self._store_memory(key, data)
+        return data
+
+    def put(self, key, data):
+        """Store audio bytes in both tiers"""
+        if not data:
+            return
+
+        path = self._path_for(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as cached_file:
+                cached_file.write(data)
+            os.replace(temp_path, path)
+            on_disk = True
+        except OSError as e:
+            print(f"Audio cache write error: {e}")
+            on_disk = False
+
+        with self._lock:
+            self.counters['stores'] += 1
+            self._store_memory(key, data)
+            if on_disk:
+                previous = self._disk.pop(key, None)
+                if previous is not None:
+                    self._disk_bytes -= previous
+                self._disk[key] = len(data)
+                self._disk_bytes += len(data)
+                self._evict_disk()
+
+    def _store_memory(self, key, data):
+        # Entries larger than the whole memory tier only live on disk
+        if len(data) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        while self._memory and (len(self._memory) > self.max_memory_items or
+                                self._memory_bytes > self.max_memory_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.counters['memory_evictions'] += 1
+
+    def _evict_disk(self):
+        while self._disk and self._disk_bytes > self.max_disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.counters['disk_evictions'] += 1
+            try:
+                os.remove(self._path_for(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """Snapshot of counters and tier occupancy for /health"""
+        with self._lock:
+            lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+            hits = self.counters['memory_hits'] + self.counters['disk_hits']
+            return dict(
+                self.counters,
+                hit_ratio=round(hits / lookups, 4) if lookups else 0.0,
+                memory_items=len(self._memory),
+                memory_bytes=self._memory_bytes,
+                max_memory_items=self.max_memory_items,
+                max_memory_bytes=self.max_memory_bytes,
+                disk_items=len(self._disk),
+                disk_bytes=self._disk_bytes,
+                max_disk_bytes=self.max_disk_bytes
+            )
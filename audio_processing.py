@@ -0,0 +1,305 @@
+import io
+
+# numpy and soundfile are imported inside the functions that need them: they dominate
+# import time, and most requests (native format, single segment) never touch them
+
+# Output formats clients can ask for: soundfile container/subtype plus HTTP metadata.
+# Bitrate ranges (kbps) map onto libsndfile's 0..1 compression level for lossy codecs.
+OUTPUT_FORMATS = {
+    'wav': {
+        'format': 'WAV',
+        'subtype': 'PCM_16',
+        'mimetype': 'audio/wav',
+        'extension': 'wav'
+    },
+    'mp3': {
+        'format': 'MP3',
+        'subtype': 'MPEG_LAYER_III',
+        'mimetype': 'audio/mpeg',
+        'extension': 'mp3',
+        'bitrate_range': (32, 320)
+    },
+    'opus': {
+        'format': 'OGG',
+        'subtype': 'OPUS',
+        'mimetype': 'audio/ogg; codecs=opus',
+        'extension': 'opus',
+        'bitrate_range': (6, 256),
+        # The Opus encoder only runs at these rates
+        'sample_rates': (8000, 12000, 16000, 24000, 48000)
+    },
+    'ogg': {
+        'format': 'OGG',
+        'subtype': 'VORBIS',
+        'mimetype': 'audio/ogg',
+        'extension': 'ogg',
+        'bitrate_range': (45, 500)
+    },
+    'pcm': {
+        'format': 'RAW',
+        'subtype': 'PCM_16',
+        'mimetype': 'audio/L16',
+        'extension': 'pcm'
+    }
+}
+
+# Mimetypes accepted in an Accept header, mapped back to format names
+MIMETYPE_FORMATS = {
+    'audio/wav': 'wav',
+    'audio/x-wav': 'wav',
+    'audio/mpeg': 'mp3',
+    'audio/ogg': 'ogg',
+    'audio/opus': 'opus',
+    'audio/l16': 'pcm'
+}
+
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+
+def parse_output_options(audio_format=None, sample_rate=None, bitrate=None):
+    """Validate client encoding options; raises ValueError with a user-facing message"""
+    if audio_format is not None:
+        audio_format = str(audio_format).lower()
+        if audio_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported format '{audio_format}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
+
+    if sample_rate is not None:
+        try:
+            sample_rate = int(sample_rate)
+        except (TypeError, ValueError):
+            raise ValueError('sample_rate must be an integer')
+        if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+            raise ValueError(f'sample_rate must be between {MIN_SAMPLE_RATE} and {MAX_SAMPLE_RATE}')
+
+    if bitrate is not None:
+        try:
+            bitrate = int(bitrate)
+        except (TypeError, ValueError):
+            raise ValueError('bitrate must be an integer number of kbps')
+        if bitrate <= 0:
+            raise ValueError('bitrate must be positive')
+
+    return audio_format, sample_rate, bitrate
+
+
+def variant_key(audio_format, sample_rate=None, bitrate=None):
+    """Stable name for one encoded variant of an artifact"""
+    return f"{audio_format}-{sample_rate or 'native'}-{bitrate or 'default'}"
+
+
+def decode_audio(audio_bytes, raw_sample_rate=None, raw_channels=1):
+    """Decode engine output (MP3, WAV, AIFF, ...) to float32 PCM of shape (frames, channels).
+
+    Headerless 'pcm' audio says nothing about its layout, so decoding it needs
+    raw_sample_rate (and raw_channels when it is not mono).
+    """
+    import soundfile as sf
+    options = {}
+    if raw_sample_rate:
+        spec = OUTPUT_FORMATS['pcm']
+        options = dict(samplerate=raw_sample_rate, channels=raw_channels, format=spec['format'], subtype=spec['subtype'])
+    samples, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype='float32', always_2d=True, **options)
+    return samples, sample_rate
+
+
+def audio_layout(audio_bytes):
+    """(sample_rate, channels) of encoded audio, read from its header without decoding it"""
+    import soundfile as sf
+    info = sf.info(io.BytesIO(audio_bytes))
+    return info.samplerate, info.channels
+
+
+def resample(samples, source_rate, target_rate):
+    """Linear-interpolation resampling; adequate for speech"""
+    import numpy as np
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    frames = int(round(len(samples) * target_rate / source_rate))
+    source_positions = np.arange(len(samples)) / source_rate
+    target_positions = np.arange(frames) / target_rate
+    return np.stack(
+        [np.interp(target_positions, source_positions, samples[:, channel]) for channel in range(samples.shape[1])],
+        axis=1
+    ).astype(np.float32)
+
+
+def _compression_level(spec, bitrate):
+    low, high = spec['bitrate_range']
+    bitrate = min(max(bitrate, low), high)
+    # libsndfile rejects a level of exactly 1.0 for MP3
+    return min((high - bitrate) / (high - low), 0.99)
+
+
+def encode_audio(samples, sample_rate, audio_format, target_rate=None, bitrate=None):
+    """Encode PCM samples into audio_format, resampling first if needed"""
+    import soundfile as sf
+    spec = OUTPUT_FORMATS[audio_format]
+
+    target_rate = target_rate or sample_rate
+    supported_rates = spec.get('sample_rates')
+    if supported_rates and target_rate not in supported_rates:
+        # Round up to the nearest rate the codec supports so no bandwidth is lost
+        target_rate = next((rate for rate in supported_rates if rate >= target_rate), supported_rates[-1])
+    samples = resample(samples, sample_rate, target_rate)
+
+    options = {}
+    if bitrate and 'bitrate_range' in spec:
+        options['compression_level'] = _compression_level(spec, bitrate)
+        if audio_format == 'mp3':
+            options['bitrate_mode'] = 'CONSTANT'
+
+    output = io.BytesIO()
+    sf.write(output, samples, target_rate, format=spec['format'], subtype=spec['subtype'], **options)
+    return output.getvalue()
+
+
+def transcode(audio_bytes, audio_format, sample_rate=None, bitrate=None, raw_sample_rate=None, raw_channels=1):
+    """Decode engine output once and re-encode it in the requested format"""
+    samples, source_rate = decode_audio(audio_bytes, raw_sample_rate, raw_channels)
+    return encode_audio(samples, source_rate, audio_format, sample_rate, bitrate)
+
+
+# MPEG-1 and MPEG-2/2.5 Layer III bitrates (kbps) and sample rates by header index
+_MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_frame_length(header):
+    """Byte length of the Layer III frame starting with this 4-byte header, or None if it isn't one"""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x3
+    layer = (header[1] >> 1) & 0x3
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x1
+    return (144 if version == 3 else 72) * bitrate // sample_rate + padding
+
+
+def strip_mp3_metadata(mp3_bytes):
+    """Drop ID3 tags and the leading Xing/Info/VBRI frame so MP3s can be streamed back to back.
+
+    That frame states the length of one file; left in a joined stream, decoders
+    trust the first one and stop after the first segment.
+    """
+    start = 0
+    if mp3_bytes[:3] == b'ID3' and len(mp3_bytes) >= 10:
+        # ID3v2 size is four 7-bit "syncsafe" bytes, excluding the 10-byte header
+        size = 0
+        for byte in mp3_bytes[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        start = 10 + size + (10 if mp3_bytes[5] & 0x10 else 0)
+    end = len(mp3_bytes)
+    if end - start >= 128 and mp3_bytes[end - 128:end - 125] == b'TAG':
+        end -= 128
+
+    frame_length = _mp3_frame_length(mp3_bytes[start:start + 4])
+    if frame_length:
+        first_frame = mp3_bytes[start:start + frame_length]
+        # The tag sits right after the side information, at most 36 bytes into the frame
+        if any(tag in first_frame[:40] for tag in (b'Xing', b'Info', b'VBRI')):
+            start += frame_length
+    return mp3_bytes[start:end]
+
+
+def _mp3_layout(mp3_bytes):
+    """Header fields every frame shares (version, layer, bitrate, sample rate, channel mode).
+
+    None unless the bytes are whole frames that all agree, i.e. constant-bitrate
+    audio whose length a decoder can work out without an Xing/Info frame.
+    """
+    layout = None
+    position = 0
+    while position < len(mp3_bytes):
+        header = mp3_bytes[position:position + 4]
+        length = _mp3_frame_length(header)
+        if not length or position + length > len(mp3_bytes):
+            return None
+        # Ignore the bits that may vary between frames: CRC protection, padding, private, mode extension
+        frame_layout = (header[1] & 0xFE, header[2] & 0xFC, header[3] >> 6)
+        if layout is None:
+            layout = frame_layout
+        elif frame_layout != layout:
+            return None
+        position += length
+    return layout
+
+
+def _wav_parts(wav_bytes):
+    """(fmt chunk, sample data) of a RIFF/WAVE file, or None if it isn't one"""
+    if wav_bytes[:4] != b'RIFF' or wav_bytes[8:12] != b'WAVE':
+        return None
+    fmt = None
+    position = 12
+    while position + 8 <= len(wav_bytes):
+        chunk_id = wav_bytes[position:position + 4]
+        size = int.from_bytes(wav_bytes[position + 4:position + 8], 'little')
+        body = position + 8
+        if chunk_id == b'fmt ':
+            fmt = wav_bytes[body:body + size]
+        elif chunk_id == b'data':
+            if fmt is None or len(fmt) < 16:
+                return None
+            data = wav_bytes[body:min(body + size, len(wav_bytes))]
+            # Whole sample frames only, so the next segment's channels stay aligned
+            block_align = int.from_bytes(fmt[12:14], 'little') or 1
+            return fmt, data[:len(data) - len(data) % block_align]
+        position = body + size + (size & 1)
+    return None
+
+
+def _join_wav(fmt, data_parts):
+    data = b''.join(data_parts)
+    fmt_chunk = b'fmt ' + len(fmt).to_bytes(4, 'little') + fmt + b'\0' * (len(fmt) & 1)
+    data_chunk = b'data' + len(data).to_bytes(4, 'little') + data + b'\0' * (len(data) & 1)
+    return b'RIFF' + (4 + len(fmt_chunk) + len(data_chunk)).to_bytes(4, 'little') + b'WAVE' + fmt_chunk + data_chunk
+
+
+def stitch_audio_segments(audio_segments, audio_format):
+    """Concatenate per-segment audio into a single file in order.
+
+    Each engine file carries its own length header (the MP3 Xing/Info frame,
+    the WAV RIFF size), and a decoder given the bytes joined as they are stops
+    after the first one. MP3 segments with the same constant-bitrate layout are
+    joined frame by frame without those frames, and WAV segments in the same
+    sample format under one rewritten header; only segments that differ are
+    decoded and re-encoded, which costs time and, for MP3, a second lossy pass.
+    """
+    if len(audio_segments) == 1:
+        return audio_segments[0]
+
+    if audio_format == 'mp3':
+        stripped = [strip_mp3_metadata(segment_bytes) for segment_bytes in audio_segments]
+        layouts = {_mp3_layout(segment_bytes) for segment_bytes in stripped}
+        if len(layouts) == 1 and None not in layouts:
+            return b''.join(stripped)
+    elif audio_format == 'wav':
+        parts = [_wav_parts(segment_bytes) for segment_bytes in audio_segments]
+        if None not in parts and len({fmt for fmt, _ in parts}) == 1:
+            return _join_wav(parts[0][0], [data for _, data in parts])
+
+    import numpy as np
+    samples = []
+    sample_rate = None
+    for segment_bytes in audio_segments:
+        data, rate = decode_audio(segment_bytes)
+        if sample_rate is None:
+            sample_rate = rate
+        samples.append(resample(data, rate, sample_rate))
+    channels = max(data.shape[1] for data in samples)
+    samples = [np.repeat(data, channels, axis=1) if data.shape[1] < channels else data for data in samples]
+    return encode_audio(np.concatenate(samples), sample_rate, audio_format)
+
+
+def encode_mp3(audio_bytes, sample_rate=None, bitrate=None):
+    """Re-encode WAV audio as MP3 so it can share an MP3 stream with gTTS output"""
+    samples, source_rate = decode_audio(audio_bytes)
+    return encode_audio(samples, source_rate, 'mp3', sample_rate, bitrate)
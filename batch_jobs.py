@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.utils import secure_filename
+
+from text_normalization import normalize_unicode
+
+BATCH_ID_PATTERN_LENGTH = 32
+
+# Seconds between sweeps for batch outputs past their retention period
+PURGE_INTERVAL = 600
+
+# Request fields that determine the audio produced; two items agreeing on all of them are duplicates
+ITEM_IDENTITY_FIELDS = ('text', 'engine', 'voice_gender', 'language', 'accent', 'format', 'sample_rate', 'bitrate')
+
+
+def parse_jsonl(body):
+    """Parse a JSON Lines payload into a list of items, skipping blank lines"""
+    items = []
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Invalid JSON on line {line_number}: {e.msg}')
+    return items
+
+
+def item_identity(options):
+    # Items that differ only in Unicode form or whitespace are the same prompt
+    values = [options.get(field) for field in ITEM_IDENTITY_FIELDS]
+    values[0] = normalize_unicode(values[0] or '')
+    return json.dumps(values, ensure_ascii=False)
+
+
+class BatchManager:
+    """Runs bulk synthesis jobs in the background and tracks per-item progress by batch id.
+
+    synthesize(options) must return a dict with the audio bytes for one
+    validated item and at least engine_used, format and extension; it raises
+    on failure. Items that fail are recorded individually and never abort the
+    rest of the batch. manifest.json is rewritten as items finish,
+    so any process sharing batch_dir can report progress. Only unfinished
+    batches are held in memory; finished ones are read back from their
+    manifest, and their outputs are deleted after retention_seconds.
+    """
+
+    def __init__(self, batch_dir, synthesize, max_concurrency=4, engine_concurrency=None, retention_seconds=86400):
+        self.batch_dir = batch_dir
+        self.synthesize = synthesize
+        self.max_concurrency = max_concurrency
+        self.engine_concurrency = engine_concurrency or {}
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._threads = set()
+        self._last_purge = 0
+        os.makedirs(batch_dir, exist_ok=True)
+
+    def _new_batch(self, batch_id, items, output_dir, archive_path):
+        # Collapse identical items so each distinct prompt is synthesized once
+        unique = {}
+        entries = []
+        for index, item in enumerate(items):
+            entry = {
+                'index': index,
+                'id': item.get('id', index),
+                'status': 'pending',
+                'file': None,
+                'error': None,
+                'duplicate_of': None
+            }
+            options = item.get('options')
+            if options is None:
+                entry['status'] = 'failed'
+                entry['error'] = item.get('error', 'Invalid item')
+            else:
+                identity = item_identity(options)
+                if identity in unique:
+                    entry['duplicate_of'] = unique[identity]
+                else:
+                    unique[identity] = index
+            entries.append(entry)
+
+        return {
+            'batch_id': batch_id,
+            'status': 'queued',
+            'created': time.time(),
+            'finished': None,
+            'output_dir': output_dir,
+            'archive_path': archive_path,
+            'total': len(items),
+            'unique': len(unique),
+            'items': entries,
+            'options': [item.get('options') for item in items]
+        }
+
+    def _schedule(self, batch):
+        """Order unique items round-robin across engines so one engine's backlog can't starve the other"""
+        by_engine = {}
+        for entry in batch['items']:
+            if entry['status'] == 'pending' and entry['duplicate_of'] is None:
+                engine = batch['options'][entry['index']]['engine']
+                by_engine.setdefault(engine, []).append(entry)
+
+        ordered = []
+        queues = list(by_engine.values())
+        while any(queues):
+            for queue in queues:
+                if queue:
+                    ordered.append(queue.pop(0))
+        return ordered
+
+    def _file_name(self, entry, extension):
+        stem = secure_filename(str(entry['id'])) or str(entry['index'])
+        return f"{entry['index']:05d}_{stem}.{extension}"
+
+    def _run_item(self, batch, entry, semaphores):
+        options = batch['options'][entry['index']]
+        semaphore = semaphores.get(options['engine'])
+
+        with self._lock:
+            entry['status'] = 'running'
+        try:
+            if semaphore:
+                semaphore.acquire()
+            try:
+                result = self.synthesize(options)
+            finally:
+                if semaphore:
+                    semaphore.release()
+            # The manifest only lists the file once the entry is completed, so no temp file is needed
+            file_name = self._file_name(entry, result['extension'])
+            with open(os.path.join(batch['output_dir'], file_name), 'wb') as audio_file:
+                audio_file.write(result['audio'])
+            with self._lock:
+                entry.update(
+                    status='completed',
+                    file=file_name,
+                    engine_used=result.get('engine_used'),
+                    format=result.get('format')
+                )
+        except Exception as e:
+            with self._lock:
+                entry.update(status='failed', error=str(e))
+
+    def _resolve_duplicates(self, batch):
+        with self._lock:
+            for entry in batch['items']:
+                if entry['duplicate_of'] is not None:
+                    original = batch['items'][entry['duplicate_of']]
+                    entry.update(
+                        status=original['status'],
+                        file=original['file'],
+                        error=original['error'],
+                        engine_used=original.get('engine_used'),
+                        format=original.get('format')
+                    )
+
+    def _write_manifest(self, batch):
+        manifest = self.manifest(batch)
+        manifest_path = os.path.join(batch['output_dir'], 'manifest.json')
+        # Write then rename, so readers in other processes never see a partial file
+        temp_path = f'{manifest_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+        return manifest, manifest_path
+
+    def _write_outputs(self, batch):
+        manifest, manifest_path = self._write_manifest(batch)
+
+        if batch['archive_path']:
+            # Audio is already compressed, so store entries instead of deflating them again
+            with zipfile.ZipFile(batch['archive_path'], 'w', zipfile.ZIP_STORED) as archive:
+                archive.write(manifest_path, 'manifest.json')
+                for file_name in sorted({entry['file'] for entry in batch['items'] if entry['file']}):
+                    archive.write(os.path.join(batch['output_dir'], file_name), file_name)
+        return manifest
+
+    def _execute(self, batch, progress=None):
+        os.makedirs(batch['output_dir'], exist_ok=True)
+        with self._lock:
+            batch['status'] = 'running'
+        self._write_manifest(batch)
+
+        semaphores = {
+            engine: threading.BoundedSemaphore(limit)
+            for engine, limit in self.engine_concurrency.items() if limit
+        }
+        scheduled = self._schedule(batch)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='tts-batch') as executor:
+            futures = [executor.submit(self._run_item, batch, entry, semaphores) for entry in scheduled]
+            last_written = time.time()
+            for done, future in enumerate(futures, start=1):
+                future.result()
+                if progress:
+                    progress(done, len(futures))
+                if time.time() - last_written >= 1:
+                    self._write_manifest(batch)
+                    last_written = time.time()
+
+        self._resolve_duplicates(batch)
+        with self._lock:
+            failed = sum(1 for entry in batch['items'] if entry['status'] == 'failed')
+            batch['status'] = 'completed_with_errors' if failed else 'completed'
+            batch['finished'] = time.time()
+        return self._write_outputs(batch)
+
+    def submit(self, items, archive=False):
+        """Start a batch in the background and return its record"""
+        if time.time() - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = time.time()
+            self.purge_finished()
+
+        batch_id = uuid.uuid4().hex
+        output_dir = os.path.join(self.batch_dir, batch_id)
+        archive_path = os.path.join(self.batch_dir, f'{batch_id}.zip') if archive else None
+        batch = self._new_batch(batch_id, items, output_dir, archive_path)
+        with self._lock:
+            self._batches[batch_id] = batch
+
+        def run():
+            try:
+                self._execute(batch)
+            except Exception as e:
+                print(f"Batch {batch_id} failed: {e}")
+                with self._lock:
+                    batch['status'] = 'failed'
+                    batch['error'] = str(e)
+                    batch['finished'] = time.time()
+                try:
+                    self._write_manifest(batch)
+                except OSError as e:
+                    print(f"Could not write manifest for failed batch {batch_id}: {e}")
+            # Finished: lookups are served from manifest.json from here on
+            with self._lock:
+                self._batches.pop(batch_id, None)
+
+        thread = threading.Thread(target=run, name=f'tts-batch-{batch_id[:8]}', daemon=True)
+        with self._lock:
+            self._threads = {t for t in self._threads if t.is_alive()}
+            self._threads.add(thread)
+        thread.start()
+        return batch
+
+    def wait(self, timeout=None):
+        """Wait for running batches to finish, e.g. while draining before shutdown"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(None if deadline is None else max(0, deadline - time.time()))
+        return not any(thread.is_alive() for thread in threads)
+
+    def run(self, items, output_dir, archive_path=None, progress=None):
+        """Run a batch synchronously (CLI use) and return its manifest"""
+        batch = self._new_batch(uuid.uuid4().hex, items, output_dir, archive_path)
+        return self._execute(batch, progress)
+
+    def manifest(self, batch, include_items=True):
+        """Status summary for a batch; safe to call while it is running"""
+        with self._lock:
+            counts = {'pending': 0, 'running': 0, 'completed': 0, 'failed': 0}
+            for entry in batch['items']:
+                counts[entry['status']] = counts.get(entry['status'], 0) + 1
+            summary = {
+                'batch_id': batch['batch_id'],
+                'status': batch['status'],
+                'created': batch['created'],
+                'finished': batch['finished'],
+                'total': batch['total'],
+                'unique': batch['unique'],
+                'counts': counts,
+                'failures': [
+                    {'index': entry['index'], 'id': entry['id'], 'error': entry['error']}
+                    for entry in batch['items'] if entry['status'] == 'failed'
+                ]
+            }
+            if batch.get('error'):
+                summary['error'] = batch['error']
+            if include_items:
+                summary['items'] = [dict(entry) for entry in batch['items']]
+            return summary
+
+    def get(self, batch_id):
+        """Record of a batch still running in this process, or None"""
+        with self._lock:
+            return self._batches.get(batch_id)
+
+    def load_manifest(self, batch_id):
+        """Manifest of a finished batch from disk, e.g. after a restart"""
+        if len(batch_id) != BATCH_ID_PATTERN_LENGTH or not batch_id.isalnum():
+            return None
+        manifest_path = os.path.join(self.batch_dir, batch_id, 'manifest.json')
+        try:
+            with open(manifest_path, encoding='utf-8') as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+
+    def purge_finished(self):
+        """Delete batch outputs older than the retention period; returns how many batches were removed"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            active = set(self._batches)
+        removed = 0
+        try:
+            names = os.listdir(self.batch_dir)
+        except OSError:
+            return 0
+        for name in names:
+            batch_id, extension = os.path.splitext(name)
+            if batch_id in active or len(batch_id) != BATCH_ID_PATTERN_LENGTH or not batch_id.isalnum():
+                continue
+            path = os.path.join(self.batch_dir, name)
+            try:
+                if extension == '.zip':
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                    continue
+                manifest = self.load_manifest(batch_id) or {}
+                # A batch another process is still running keeps rewriting its manifest, so age it by that too
+                finished = manifest.get('finished') or os.path.getmtime(os.path.join(path, 'manifest.json'))
+            except OSError:
+                continue
+            if finished < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            print(f"Removed {removed} expired batch output(s)")
+        return removed
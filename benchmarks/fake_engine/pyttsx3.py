@@ -0,0 +1,69 @@
+"""Deterministic stand-in for pyttsx3, used by benchmarks/synthesis_bench.py.
+
+Put this directory first on PYTHONPATH and the app's pyttsx3 worker pool loads
+it instead of the real engine. Each utterance takes a fixed time per character
+and produces silent 16-bit WAV audio whose length follows the text, so runs are
+repeatable on any machine and need no system voices.
+
+    FAKE_PYTTSX3_MS_PER_CHAR   synthesis time per character (default 0.5)
+"""
+import os
+import time
+import wave
+
+MS_PER_CHAR = float(os.environ.get('FAKE_PYTTSX3_MS_PER_CHAR', 0.5))
+SAMPLE_RATE = 22050
+SECONDS_PER_CHAR = 0.06
+
+
+class Voice:
+    def __init__(self, voice_id, name):
+        self.id = voice_id
+        self.name = name
+
+
+VOICES = [
+    Voice('fake-female-us', 'Fake English (United States) female'),
+    Voice('fake-male-us', 'Fake English (United States) male'),
+    Voice('fake-female-uk', 'Fake English (UK) female'),
+    Voice('fake-male-uk', 'Fake English (UK) male')
+]
+
+
+class Engine:
+    def __init__(self):
+        self._properties = {'voices': VOICES, 'voice': VOICES[0].id, 'rate': 150, 'volume': 0.9}
+        self._queue = []
+        self._callbacks = {}
+
+    def setProperty(self, name, value):
+        self._properties[name] = value
+
+    def getProperty(self, name):
+        return self._properties.get(name)
+
+    def connect(self, topic, callback):
+        self._callbacks.setdefault(topic, []).append(callback)
+
+    def save_to_file(self, text, filename):
+        self._queue.append((text, filename))
+
+    def runAndWait(self):
+        queue, self._queue = self._queue, []
+        for text, filename in queue:
+            time.sleep(len(text) * MS_PER_CHAR / 1000)
+            frames = int(max(0.2, len(text) * SECONDS_PER_CHAR) * SAMPLE_RATE)
+            with wave.open(filename, 'wb') as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(SAMPLE_RATE)
+                wav_file.writeframes(b'\0\0' * frames)
+            for callback in self._callbacks.get('finished-utterance', []):
+                callback(name=None, completed=True)
+
+    def stop(self):
+        self._queue = []
+
+
+def init(driverName=None, debug=False):
+    return Engine()
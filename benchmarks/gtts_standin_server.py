@@ -0,0 +1,148 @@
+"""Local stand-in for the Google Translate TTS endpoint used by gTTS.
+
+Answers the batchexecute RPC that gTTS sends with a generated MP3 tone whose
+length follows the text, in the same response framing as the real service.
+Latency and failures can be injected to exercise the app's gTTS client
+(pooling, retries, backoff, coalescing) without touching the network.
+
+    python benchmarks/gtts_standin_server.py --port 8765 --latency 0.2 --error-rate 0.1
+    TTS_GTTS_BASE_URL=http://127.0.0.1:8765 python app.py
+"""
+import io
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+import numpy as np
+import soundfile as sf
+
+RPC_PATH = '/_/TranslateWebserverUi/data/batchexecute'
+SAMPLE_RATE = 24000
+SECONDS_PER_CHAR = 0.06
+# libsndfile's 0..1 compression level for 32 kbps within MPEG-2's 8..160 kbps range
+COMPRESSION_LEVEL = (160 - 32) / (160 - 8)
+
+
+def tone_mp3(text):
+    """MP3 tone roughly as long as text would take to speak"""
+    duration = max(0.2, len(text) * SECONDS_PER_CHAR)
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = (0.2 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    output = io.BytesIO()
+    # Constant 32 kbps, like the real service's output
+    sf.write(output, samples, SAMPLE_RATE, format='MP3', subtype='MPEG_LAYER_III',
+             bitrate_mode='CONSTANT', compression_level=COMPRESSION_LEVEL)
+    return output.getvalue()
+
+
+def rpc_response(audio_bytes):
+    """Frame audio the way batchexecute does: an anti-XSSI prefix, then length-prefixed JSON lines"""
+    payload = json.dumps([base64.b64encode(audio_bytes).decode('ascii')])
+    envelope = json.dumps([['wrb.fr', 'jQ1olc', payload, None, None, None, 'generic']], separators=(',', ':'))
+    return f")]}}'\n\n{len(envelope)}\n{envelope}\n".encode('utf-8')
+
+
+class StandinState:
+    def __init__(self, latency, error_rate, fail_first):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.audio = {}
+
+    def audio_for(self, text):
+        # The tone depends only on length, so encode once per length rather than per text
+        with self.lock:
+            audio_bytes = self.audio.get(len(text))
+        if audio_bytes is None:
+            audio_bytes = tone_mp3(text)
+            with self.lock:
+                self.audio[len(text)] = audio_bytes
+        return audio_bytes
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real endpoint
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type='application/json; charset=utf-8'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                with state.lock:
+                    body = json.dumps({'requests': state.requests}).encode('utf-8')
+                self._send(200, body)
+            else:
+                self._send(404, b'{}')
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+            if not self.path.startswith(RPC_PATH):
+                self._send(404, b'{}')
+                return
+
+            with state.lock:
+                state.requests += 1
+                request_number = state.requests
+
+            if state.latency:
+                time.sleep(state.latency)
+            if request_number <= state.fail_first or random.random() < state.error_rate:
+                self._send(503, b'{"error": "injected failure"}')
+                return
+
+            try:
+                rpc = json.loads(parse_qs(body)['f.req'][0])
+                text = json.loads(rpc[0][0][1])[0]
+            except (KeyError, IndexError, ValueError):
+                self._send(400, b'{"error": "malformed f.req"}')
+                return
+
+            self._send(200, rpc_response(state.audio_for(text)))
+
+    return Handler
+
+
+def serve(host='127.0.0.1', port=8765, latency=0.0, error_rate=0.0, fail_first=0):
+    """Start the stand-in in a background thread and return the server (port 0 picks a free one)"""
+    state = StandinState(latency, error_rate, fail_first)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, name='gtts-standin', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering each request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--fail-first', type=int, default=0, help='Answer the first N requests with 503')
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.error_rate, args.fail_first)
+    print(f"gTTS stand-in listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
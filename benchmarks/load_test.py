@@ -0,0 +1,168 @@
+"""Requests/sec of the production server (gunicorn) as the number of workers grows.
+
+For each worker count, starts gunicorn with gunicorn.conf.py against a local
+gTTS stand-in with a fixed upstream latency, waits for /health/ready, drives
+/generate_speech with unique texts (so every request reaches the engine) from
+a fixed number of concurrent clients, then stops the server with SIGTERM so
+the graceful drain is exercised too. Prints one JSON result per worker count.
+
+    python benchmarks/load_test.py --workers 1 2 4 --threads 1 --concurrency 16 --duration 10
+"""
+import os
+import sys
+import json
+import math
+import time
+import signal
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gtts_standin_server import serve
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, threads, upstream_url, work_dir):
+    port = free_port()
+    env = dict(
+        os.environ,
+        TTS_BIND=f'127.0.0.1:{port}',
+        TTS_SERVER_WORKERS=str(workers),
+        TTS_SERVER_THREADS=str(threads),
+        TTS_ACCESS_LOG='',
+        TTS_GTTS_BASE_URL=upstream_url,
+        TTS_GTTS_MAX_CONCURRENCY='64',
+        # Every request comes from 127.0.0.1: measure throughput, not the per-client rate limit or load shedding
+        TTS_RATE_LIMIT_CHARS_PER_SECOND='0',
+        TTS_GTTS_MAX_INFLIGHT='256',
+        TTS_PYTTSX3_MAX_INFLIGHT='256',
+        TTS_ADMISSION_MAX_WAITING='1024',
+        TTS_CACHE_DIR=os.path.join(work_dir, 'cache'),
+        TTS_ARTIFACT_DIR=os.path.join(work_dir, 'artifacts'),
+        TTS_BATCH_DIR=os.path.join(work_dir, 'batches'),
+        TTS_JOB_DB=os.path.join(work_dir, 'jobs.sqlite3'),
+        TTS_ARTIFACT_DB=os.path.join(work_dir, 'artifacts.sqlite3')
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_DIR, 'gunicorn.conf.py'), 'app:create_app()'],
+        cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{base_url}/health/ready', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'Server with {workers} workers did not become ready')
+
+
+def drive(base_url, concurrency, duration, text_chars):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    deadline = time.time() + duration
+    filler = ('lorem ipsum ' * (text_chars // 12 + 1))[:text_chars]
+
+    def client():
+        nonlocal errors
+        while time.time() < deadline:
+            with lock:
+                number = next(counter)
+            started = time.perf_counter()
+            try:
+                # A fresh connection per request: gthread workers keep a keep-alive
+                # connection to themselves, which would pin each client to one worker
+                response = requests.post(
+                    f'{base_url}/generate_speech',
+                    json={'text': f'Request {number}. {filler}', 'engine': 'gtts'},
+                    headers={'Connection': 'close'},
+                    timeout=60
+                )
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors, time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=1, help='threads per server worker')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per worker count')
+    parser.add_argument('--upstream-latency', type=float, default=0.1, help='seconds the gTTS stand-in waits per request')
+    parser.add_argument('--text-chars', type=int, default=80)
+    args = parser.parse_args()
+
+    upstream = serve(port=0, latency=args.upstream_latency)
+    upstream_url = f'http://127.0.0.1:{upstream.server_address[1]}'
+
+    results = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as work_dir:
+            process, base_url = start_server(workers, args.threads, upstream_url, work_dir)
+            try:
+                latencies, errors, elapsed = drive(base_url, args.concurrency, args.duration, args.text_chars)
+            finally:
+                drain_started = time.time()
+                process.send_signal(signal.SIGTERM)
+                process.wait(timeout=120)
+                drain_seconds = time.time() - drain_started
+        result = {
+            'workers': workers,
+            'threads': args.threads,
+            'cpus': os.cpu_count(),
+            'requests': len(latencies),
+            'errors': errors,
+            'requests_per_second': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+            'shutdown_seconds': round(drain_seconds, 2)
+        }
+        results.append(result)
+        print(json.dumps(result))
+
+    upstream.shutdown()
+    if len(results) > 1 and results[0]['requests_per_second']:
+        scaling = {r['workers']: round(r['requests_per_second'] / results[0]['requests_per_second'], 2) for r in results}
+        print(json.dumps({'speedup_vs_first': scaling}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Latency of short offline (pyttsx3) syntheses: legacy in-process path vs the worker pool.
+
+Runs the same short texts through the path generate_with_pyttsx3 used to take
+(one in-process engine, save_to_file + runAndWait, a fixed 0.5 s sleep, then a
+size check on the output file) and through a pyttsx3 worker pool that relies
+on the worker's completion signal. Prints p50/p99 for both as JSON.
+
+    python benchmarks/pyttsx3_latency.py --runs 50
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyttsx3_pool import Pyttsx3WorkerPool
+
+SHORT_TEXTS = [
+    "Hello there.",
+    "Your order has shipped.",
+    "Press one to continue.",
+    "Good morning!",
+    "The meeting starts at noon."
+]
+
+LEGACY_SLEEP_SECONDS = 0.5
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def legacy_synthesizer(work_dir):
+    """The pre-pool path: a shared in-process engine and a fixed wait for the file to land"""
+    import pyttsx3
+    engine = pyttsx3.init()
+
+    def synthesize(text):
+        output_path = os.path.join(work_dir, 'legacy_output.wav')
+        engine.save_to_file(text, output_path)
+        engine.runAndWait()
+        time.sleep(LEGACY_SLEEP_SECONDS)
+        if not (os.path.exists(output_path) and os.path.getsize(output_path) > 0):
+            return None
+        with open(output_path, 'rb') as audio_file:
+            audio_bytes = audio_file.read()
+        os.remove(output_path)
+        return audio_bytes
+
+    return synthesize
+
+
+def run(synthesize, runs):
+    latencies = []
+    for i in range(runs):
+        started = time.perf_counter()
+        audio_bytes = synthesize(SHORT_TEXTS[i % len(SHORT_TEXTS)])
+        if not audio_bytes:
+            raise RuntimeError(f'Run {i} produced no audio')
+        latencies.append(time.perf_counter() - started)
+    return {
+        'runs': runs,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=30, help='syntheses per mode')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed syntheses before measuring')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        legacy = legacy_synthesizer(work_dir)
+        run(legacy, args.warmup)
+        before = run(legacy, args.runs)
+
+    pool = Pyttsx3WorkerPool(1)
+    pool.start()
+    try:
+        run(pool.synthesize, args.warmup)
+        after = run(pool.synthesize, args.runs)
+    finally:
+        pool.shutdown()
+
+    print(json.dumps({
+        'before_in_process_fixed_sleep': before,
+        'after_worker_pool': after,
+        'p50_saved_ms': round(before['p50_ms'] - after['p50_ms'], 2),
+        'p99_saved_ms': round(before['p99_ms'] - after['p99_ms'], 2)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
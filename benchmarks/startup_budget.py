@@ -0,0 +1,101 @@
+"""Startup budget check: import time, time to ready, and which heavy modules load eagerly.
+
+Imports app.py in fresh interpreters (so nothing is already cached in
+sys.modules) and fails with exit status 1 when the median import time exceeds
+the budget, when the service is not ready in time, or when a heavy module is
+imported before first use.
+
+    python benchmarks/startup_budget.py --runs 5 --import-budget-ms 500 --ready-budget-ms 1000
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load on first use (or in the background warm-up)
+HEAVY_MODULES = ['numpy', 'soundfile', 'gtts', 'requests', 'pyttsx3', 'torch']
+
+PROBE = '''
+import sys, time, json
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+eager = [name for name in HEAVY_MODULES if name in sys.modules]
+ready = None
+if WAIT_READY:
+    client = app.app.test_client()
+    while time.perf_counter() - started < 30:
+        if client.get('/health/ready').status_code == 200:
+            ready = time.perf_counter() - started
+            break
+        time.sleep(0.005)
+# Written to a file rather than stdout, which the app's background warm-up also prints to
+with open(RESULT_PATH, 'w') as result_file:
+    json.dump({'import': imported - started, 'ready': ready, 'eager': eager}, result_file)
+'''
+
+
+def measure(wait_ready, work_dir):
+    env = dict(
+        os.environ,
+        PYTHONPATH=REPO_DIR,
+        TTS_WARM_UP='1' if wait_ready else '0',
+        TTS_CACHE_DIR=os.path.join(work_dir, 'cache'),
+        TTS_ARTIFACT_DIR=os.path.join(work_dir, 'artifacts'),
+        TTS_BATCH_DIR=os.path.join(work_dir, 'batches'),
+        TTS_JOB_DB=os.path.join(work_dir, 'jobs.sqlite3')
+    )
+    result_path = os.path.join(work_dir, 'startup.json')
+    code = f'HEAVY_MODULES = {HEAVY_MODULES!r}\nWAIT_READY = {wait_ready!r}\nRESULT_PATH = {result_path!r}\n' + PROBE
+    subprocess.run(
+        [sys.executable, '-c', code], cwd=work_dir, env=env,
+        capture_output=True, text=True, timeout=60, check=True
+    )
+    with open(result_path) as result_file:
+        return json.load(result_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=500)
+    parser.add_argument('--ready-budget-ms', type=float, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Run from a scratch directory so the directories app.py creates stay out of the repo
+        lazy_runs = [measure(False, work_dir) for _ in range(args.runs)]
+        warm_runs = [measure(True, work_dir) for _ in range(args.runs)]
+
+    import_ms = statistics.median(run['import'] for run in lazy_runs) * 1000
+    ready_times = [run['ready'] for run in warm_runs]
+    ready_ms = statistics.median(ready_times) * 1000 if None not in ready_times else None
+    eager = sorted({name for run in lazy_runs for name in run['eager']})
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f'import took {import_ms:.0f} ms (budget {args.import_budget_ms:.0f} ms)')
+    if ready_ms is None or ready_ms > args.ready_budget_ms:
+        failures.append(f'ready after {ready_ms} ms (budget {args.ready_budget_ms:.0f} ms)')
+    if eager:
+        failures.append(f"heavy modules imported eagerly: {', '.join(eager)}")
+
+    print(json.dumps({
+        'runs': args.runs,
+        'import_ms_median': round(import_ms, 1),
+        'ready_ms_median': round(ready_ms, 1) if ready_ms is not None else None,
+        'eager_heavy_modules': eager,
+        'passed': not failures,
+        'failures': failures
+    }, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
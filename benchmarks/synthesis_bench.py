@@ -0,0 +1,373 @@
+"""Reproducible throughput/latency benchmark for speech synthesis, with regression checks.
+
+'run' starts the app under gunicorn for each concurrency level, with the gTTS
+client pointed at a local stand-in server and pyttsx3 replaced by the
+deterministic fake engine in benchmarks/fake_engine, so it runs offline and
+gives the same workload every time for a given seed. Requests mix engines,
+languages/accents and text lengths by weight; a share of them (the cache hit
+ratio) repeat texts warmed before measuring. Results are JSON: throughput,
+p50/p95/p99 latency, observed cache hit ratio and peak RSS of the server
+process tree.
+
+'compare' reads two result files and exits with status 1 when the candidate
+is slower, has higher latency or uses more memory than the baseline by more
+than the tolerance at any concurrency level.
+
+    python benchmarks/synthesis_bench.py run --concurrency 1 8 --requests 200 --output before.json
+    python benchmarks/synthesis_bench.py run --concurrency 1 8 --requests 200 --output after.json
+    python benchmarks/synthesis_bench.py compare before.json after.json --tolerance 0.1
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import signal
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from gtts_standin_server import serve
+
+WORDS = {
+    'english': (
+        'the quick brown fox jumps over a lazy dog while seven bright stars shine above '
+        'our quiet town and every morning people walk to work along the river'
+    ).split(),
+    'marathi': 'आज सकाळी आम्ही बाजारात गेलो आणि ताजी फळे भाजी दूध घेतले नंतर घरी परत आलो'.split()
+}
+
+# Metric name -> whether a larger value is better
+COMPARED_METRICS = {
+    'requests_per_second': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'peak_rss_mb': False
+}
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def parse_weights(spec, convert=str):
+    """'a:3,b:1' -> ([a, b], [3.0, 1.0])"""
+    values, weights = [], []
+    for part in spec.split(','):
+        value, _, weight = part.strip().rpartition(':')
+        if not value:
+            value, weight = weight, '1'
+        values.append(convert(value))
+        weights.append(float(weight))
+    return values, weights
+
+
+def make_text(rng, language, chars, prefix=''):
+    """Sentences of random words from the language, about chars long"""
+    words, sentence = [prefix] if prefix else [], 0
+    while sum(len(word) + 1 for word in words) < chars:
+        word = rng.choice(WORDS[language])
+        sentence += 1
+        if sentence % 12 == 0:
+            word += '.'
+        words.append(word)
+    return ' '.join(words).rstrip('.') + '.'
+
+
+def build_workload(args, rng):
+    """Deterministic (hot set, measured requests) for one run"""
+    engines, engine_weights = parse_weights(args.engines)
+    voices, voice_weights = parse_weights(args.voices)
+    lengths, length_weights = parse_weights(args.text_chars, int)
+
+    def draw(prefix):
+        engine = rng.choices(engines, engine_weights)[0]
+        language, accent = rng.choices(voices, voice_weights)[0].split('/')
+        chars = rng.choices(lengths, length_weights)[0]
+        return {
+            'text': make_text(rng, language, chars, prefix),
+            'engine': engine,
+            'language': language,
+            'accent': accent,
+            'voice_gender': rng.choice(['female', 'male'])
+        }
+
+    hot = [draw(f'Hot {i}.') for i in range(args.hot_texts)]
+    workload = []
+    for number in range(args.requests):
+        if hot and rng.random() < args.cache_hit_ratio:
+            workload.append(dict(rng.choice(hot), hot=True))
+        else:
+            workload.append(dict(draw(f'Request {number}.'), hot=False))
+    return hot, workload
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, threads, upstream_url, work_dir):
+    port = free_port()
+    env = dict(
+        os.environ,
+        # The fake engine shadows pyttsx3 in the app and in its worker processes
+        PYTHONPATH=os.pathsep.join([os.path.join(BENCH_DIR, 'fake_engine'), REPO_DIR]),
+        FAKE_PYTTSX3_MS_PER_CHAR=str(args.pyttsx3_ms_per_char),
+        TTS_BIND=f'127.0.0.1:{port}',
+        TTS_SERVER_WORKERS=str(args.server_workers),
+        TTS_SERVER_THREADS=str(threads),
+        TTS_PYTTSX3_WORKERS=str(args.pyttsx3_workers),
+        TTS_ACCESS_LOG='',
+        TTS_GTTS_BASE_URL=upstream_url,
+        TTS_GTTS_MAX_CONCURRENCY='64',
+        # Every request comes from 127.0.0.1: measure throughput, not the per-client rate limit or load shedding
+        TTS_RATE_LIMIT_CHARS_PER_SECOND='0',
+        TTS_GTTS_MAX_INFLIGHT='256',
+        TTS_PYTTSX3_MAX_INFLIGHT='256',
+        TTS_ADMISSION_MAX_WAITING='1024',
+        TTS_CACHE_DIR=os.path.join(work_dir, 'cache'),
+        TTS_ARTIFACT_DIR=os.path.join(work_dir, 'artifacts'),
+        TTS_ARTIFACT_DB=os.path.join(work_dir, 'artifacts.sqlite3'),
+        TTS_BATCH_DIR=os.path.join(work_dir, 'batches'),
+        TTS_JOB_DB=os.path.join(work_dir, 'jobs.sqlite3')
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_DIR, 'gunicorn.conf.py'), 'app:create_app()'],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{base_url}/health/ready', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('Benchmark server did not become ready')
+
+
+def process_tree(pid):
+    pids = [pid]
+    for current in pids:
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as children:
+                pids.extend(int(child) for child in children.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def peak_rss_mb(pid):
+    """Sum of peak resident memory over the server and its descendants (Linux only)"""
+    total_kb, found = 0, False
+    for current in process_tree(pid):
+        try:
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        total_kb += int(line.split()[1])
+                        found = True
+        except OSError:
+            pass
+    return round(total_kb / 1024, 1) if found else None
+
+
+def cache_counts(base_url):
+    cache = requests.get(f'{base_url}/health', timeout=10).json()['cache']
+    return cache['memory_hits'] + cache['disk_hits'], cache['misses']
+
+
+def post_speech(base_url, item):
+    payload = {key: value for key, value in item.items() if key != 'hot'}
+    # A fresh connection per request spreads load over every server worker
+    return requests.post(f'{base_url}/generate_speech', json=payload, headers={'Connection': 'close'}, timeout=300)
+
+
+def drive(base_url, workload, concurrency):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    items = iter(workload)
+
+    def client():
+        nonlocal errors
+        while True:
+            with lock:
+                item = next(items, None)
+            if item is None:
+                return
+            started = time.perf_counter()
+            try:
+                ok = post_speech(base_url, item).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_level(args, concurrency, upstream_url):
+    rng = random.Random(args.seed)
+    hot, workload = build_workload(args, rng)
+    with tempfile.TemporaryDirectory() as work_dir:
+        process, base_url = start_server(args, max(concurrency, 1), upstream_url, work_dir)
+        try:
+            for item in hot:
+                post_speech(base_url, item)
+            hits_before, misses_before = cache_counts(base_url)
+            latencies, errors, elapsed = drive(base_url, workload, concurrency)
+            hits_after, misses_after = cache_counts(base_url)
+            rss = peak_rss_mb(process.pid)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=120)
+
+    lookups = (hits_after - hits_before) + (misses_after - misses_before)
+    return {
+        'concurrency': concurrency,
+        'requests': len(workload),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+        'hot_requests': sum(item['hot'] for item in workload),
+        'segment_cache_hit_ratio': round((hits_after - hits_before) / lookups, 3) if lookups else None,
+        'peak_rss_mb': rss
+    }
+
+
+def run(args):
+    upstream = serve(port=0, latency=args.gtts_latency)
+    upstream_url = f'http://127.0.0.1:{upstream.server_address[1]}'
+    config = {
+        key: value for key, value in vars(args).items()
+        if key not in ('command', 'func', 'output')
+    }
+    config['cpus'] = os.cpu_count()
+
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            result = run_level(args, concurrency, upstream_url)
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr)
+    finally:
+        upstream.shutdown()
+
+    report = json.dumps({'config': config, 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(report + '\n')
+    else:
+        print(report)
+    return 1 if any(result['errors'] for result in results) else 0
+
+
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.candidate, encoding='utf-8') as candidate_file:
+        candidate = json.load(candidate_file)
+
+    # Differences in the workload make the comparison meaningless, so call them out
+    ignored = {'concurrency'}
+    config_changes = {
+        key: [baseline['config'].get(key), candidate['config'].get(key)]
+        for key in set(baseline['config']) | set(candidate['config'])
+        if key not in ignored and baseline['config'].get(key) != candidate['config'].get(key)
+    }
+
+    candidate_levels = {result['concurrency']: result for result in candidate['results']}
+    levels, regressions = [], []
+    for before in baseline['results']:
+        after = candidate_levels.get(before['concurrency'])
+        if after is None:
+            continue
+        level = {'concurrency': before['concurrency']}
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            # Tiny absolute latency differences are noise even when the relative change is large
+            noise = metric.endswith('_ms') and abs(new - old) < args.min_latency_delta_ms
+            level[metric] = {'baseline': old, 'candidate': new, 'change': round(change, 4)}
+            if worse > args.tolerance and not noise:
+                level[metric]['regression'] = True
+                regressions.append(f"concurrency {before['concurrency']}: {metric} {old} -> {new} ({change:+.1%})")
+        levels.append(level)
+
+    print(json.dumps({
+        'tolerance': args.tolerance,
+        'config_changes': config_changes,
+        'levels': levels,
+        'regressions': regressions,
+        'passed': not regressions
+    }, indent=2))
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='benchmark the app and write results as JSON')
+    run_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8], help='concurrent clients; one run per level')
+    run_parser.add_argument('--requests', type=int, default=200, help='measured requests per level')
+    run_parser.add_argument('--text-chars', default='60:5,250:3,1200:1', help='text lengths in characters with weights')
+    run_parser.add_argument('--engines', default='gtts:3,pyttsx3:1', help='requested engines with weights')
+    run_parser.add_argument('--voices', default='english/usa:4,english/uk:2,english/india:1,marathi/india:1',
+                            help='language/accent mix with weights')
+    run_parser.add_argument('--cache-hit-ratio', type=float, default=0.3, help='share of requests repeating a warmed text')
+    run_parser.add_argument('--hot-texts', type=int, default=20, help='distinct texts warmed before measuring')
+    run_parser.add_argument('--gtts-latency', type=float, default=0.05, help='seconds the gTTS stand-in waits per request')
+    run_parser.add_argument('--pyttsx3-ms-per-char', type=float, default=0.5, help='fake offline engine cost per character')
+    run_parser.add_argument('--server-workers', type=int, default=1)
+    run_parser.add_argument('--pyttsx3-workers', type=int, default=2)
+    run_parser.add_argument('--seed', type=int, default=1234)
+    run_parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--tolerance', type=float, default=0.1, help='allowed relative slowdown, e.g. 0.1 for 10%%')
+    compare_parser.add_argument('--min-latency-delta-ms', type=float, default=5, help='ignore latency changes smaller than this')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import time
+import threading
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+PROBING = 'probing'
+
+
+class EngineUnavailableError(RuntimeError):
+    """No engine that can serve the request currently has a closed circuit"""
+
+
+class _Circuit:
+    """Rolling outcome window and breaker state for one engine or engine scope"""
+
+    def __init__(self, window_size):
+        self.outcomes = deque(maxlen=window_size)
+        self.latency_ewma = None
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = None
+        self.open_seconds = None
+        self.trips = 0
+        self.last_error = None
+
+    def failure_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def reset(self):
+        self.outcomes.clear()
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = None
+        self.open_seconds = None
+
+
+class EngineRouter:
+    """Circuit breakers and latency-aware ordering for the synthesis engines.
+
+    Outcomes are recorded per scope (for gTTS, a language/TLD pair), or per
+    engine for unscoped calls. A circuit opens after consecutive_failures
+    failures in a row, or when the failure rate over the last window_size
+    calls reaches failure_rate_threshold. Failures in one scope don't count
+    against the engine as a whole: its circuit opens when scope_quorum of its
+    scopes are open at once. Open circuits receive no traffic; once
+    open_seconds have passed, a background thread calls probe(engine, scope)
+    and closes the circuit on success or reopens it for twice as long.
+    """
+
+    def __init__(self, probe, window_size=20, min_samples=5, failure_rate_threshold=0.5,
+                 consecutive_failures=5, open_seconds=30, max_open_seconds=300,
+                 probe_interval=5, latency_alpha=0.2, scope_quorum=3):
+        self.probe = probe
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.failure_rate_threshold = failure_rate_threshold
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe_interval = probe_interval
+        self.latency_alpha = latency_alpha
+        self.scope_quorum = scope_quorum
+
+        self._lock = threading.Lock()
+        self._circuits = {}
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _circuit(self, engine, scope=None):
+        key = (engine, scope)
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit(self.window_size)
+        return circuit
+
+    def register(self, engine, scope=None):
+        """Track a circuit before it sees traffic so it is listed in stats"""
+        with self._lock:
+            self._circuit(engine)
+            if scope is not None:
+                self._circuit(engine, scope)
+
+    def _record_latency(self, circuit, latency):
+        if circuit.latency_ewma is None:
+            circuit.latency_ewma = latency
+        else:
+            circuit.latency_ewma += self.latency_alpha * (latency - circuit.latency_ewma)
+
+    def record(self, engine, scope, ok, latency, error=None):
+        """Record the outcome of one upstream call against its scope, or the engine when unscoped"""
+        with self._lock:
+            engine_circuit = self._circuit(engine)
+            circuit = self._circuit(engine, scope)
+            if ok and scope is not None:
+                # The engine-wide latency still feeds routing for scopes not measured yet
+                self._record_latency(engine_circuit, latency)
+            circuit.outcomes.append(ok)
+            if ok:
+                circuit.consecutive_failures = 0
+                self._record_latency(circuit, latency)
+                return
+            circuit.consecutive_failures += 1
+            circuit.last_error = error
+            if circuit.state != CLOSED or not self._should_trip(circuit):
+                return
+            self._trip(circuit, self.open_seconds)
+            print(f"Circuit opened for {f'{engine} {scope}' if scope else engine}: {error}")
+            if scope is None or engine_circuit.state != CLOSED:
+                return
+            failing = [key[1] for key, other in self._circuits.items()
+                       if key[0] == engine and key[1] is not None and other.state != CLOSED]
+            if len(failing) >= self.scope_quorum:
+                engine_circuit.last_error = f"{len(failing)} scopes failing ({', '.join(sorted(failing))}): {error}"
+                self._trip(engine_circuit, self.open_seconds)
+                print(f"Circuit opened for {engine}: {engine_circuit.last_error}")
+
+    def _should_trip(self, circuit):
+        if circuit.consecutive_failures >= self.consecutive_failures:
+            return True
+        return len(circuit.outcomes) >= self.min_samples and circuit.failure_rate() >= self.failure_rate_threshold
+
+    def _trip(self, circuit, open_seconds):
+        circuit.state = OPEN
+        circuit.opened_at = time.time()
+        circuit.open_seconds = open_seconds
+        circuit.trips += 1
+
+    def available(self, engine, scope=None):
+        """False while the engine's circuit, or the scope's, is open"""
+        with self._lock:
+            keys = [(engine, None)] + ([(engine, scope)] if scope is not None else [])
+            return all(
+                self._circuits[key].state == CLOSED
+                for key in keys if key in self._circuits
+            )
+
+    def expected_latency(self, engine, scope=None):
+        """Typical seconds per call, inflated by the recent failure rate; None until measured"""
+        with self._lock:
+            for key in ((engine, scope), (engine, None)):
+                circuit = self._circuits.get(key)
+                if circuit is not None and circuit.latency_ewma is not None:
+                    return circuit.latency_ewma / max(1 - circuit.failure_rate(), 0.1)
+        return None
+
+    def route(self, candidates, preferred=None):
+        """Order candidate engines ({engine: scope}) for a request, leaving out open circuits.
+
+        The preferred engine goes first when it is healthy; the rest follow by
+        expected latency, with unmeasured engines last in their given order.
+        """
+        healthy = [engine for engine, scope in candidates.items() if self.available(engine, scope)]
+        latencies = {engine: self.expected_latency(engine, candidates[engine]) for engine in healthy}
+        ranked = sorted(
+            (engine for engine in healthy if engine != preferred),
+            key=lambda engine: (latencies[engine] is None, latencies[engine] or 0)
+        )
+        if preferred in healthy:
+            ranked.insert(0, preferred)
+        return ranked
+
+    def start(self):
+        """Start the background recovery prober"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._probe_loop, name='tts-router-probe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _due_for_probe(self):
+        now = time.time()
+        due = []
+        with self._lock:
+            for key, circuit in self._circuits.items():
+                if circuit.state == OPEN and now - circuit.opened_at >= circuit.open_seconds:
+                    circuit.state = PROBING
+                    due.append((key, circuit))
+        return due
+
+    def _probe_loop(self):
+        while not self._stopping.wait(self.probe_interval):
+            for (engine, scope), circuit in self._due_for_probe():
+                try:
+                    self.probe(engine, scope)
+                    recovered, error = True, None
+                except Exception as e:
+                    recovered, error = False, str(e)
+                with self._lock:
+                    if recovered:
+                        circuit.reset()
+                    else:
+                        circuit.last_error = error
+                        self._trip(circuit, min(circuit.open_seconds * 2, self.max_open_seconds))
+                label = f"{engine} {scope}" if scope else engine
+                print(f"Circuit for {label} {'closed after successful probe' if recovered else 'still open: ' + error}")
+
+    def stats(self):
+        """Breaker state, failure rate and latency for every tracked circuit"""
+        now = time.time()
+        stats = {}
+        with self._lock:
+            for (engine, scope), circuit in sorted(self._circuits.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+                entry = {
+                    'state': circuit.state,
+                    'samples': len(circuit.outcomes),
+                    'failure_rate': round(circuit.failure_rate(), 3),
+                    'latency_ewma': round(circuit.latency_ewma, 4) if circuit.latency_ewma is not None else None,
+                    'trips': circuit.trips,
+                    'last_error': circuit.last_error
+                }
+                if circuit.state == OPEN:
+                    entry['retry_in'] = round(max(0, circuit.opened_at + circuit.open_seconds - now), 1)
+                engine_stats = stats.setdefault(engine, {'scopes': {}})
+                if scope is None:
+                    engine_stats.update(entry)
+                else:
+                    engine_stats['scopes'][scope] = entry
+        return stats
@@ -0,0 +1,178 @@
+import re
+import time
+import base64
+import random
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urlunsplit
+
+# requests and gtts are imported on first use to keep them out of the app's startup path
+
+# gTTS's batchexecute response carries each audio part as base64 inside a jQ1olc RPC line
+AUDIO_LINE_PATTERN = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GTTSRequestError(RuntimeError):
+    """Upstream TTS request failed after all retries"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GTTSClient:
+    """Shared, connection-pooled client for the Google Translate TTS endpoint.
+
+    gTTS opens a new session (and TLS connection) per token chunk and never
+    retries. This client reuses gTTS's request preparation but sends through
+    one keep-alive session, caps concurrent upstream calls, retries transient
+    failures with exponential backoff and full jitter, and coalesces
+    concurrent identical requests onto a single upstream call.
+
+    base_url redirects requests to a stand-in server (scheme://host:port),
+    keeping the path gTTS would use.
+    """
+
+    def __init__(self, base_url=None, pool_size=16, max_concurrency=8, timeout=10,
+                 max_retries=3, backoff_base=0.25, backoff_max=4.0):
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.pool_size = pool_size
+        self._session = None
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.counters = {
+            'requests': 0,
+            'upstream_calls': 0,
+            'retries': 0,
+            'coalesced': 0,
+            'failures': 0
+        }
+
+    @property
+    def session(self):
+        """The shared keep-alive session, created on first use"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def synthesize(self, text, lang='en', tld='com'):
+        """Return MP3 bytes for text, sharing the upstream call with identical in-flight requests"""
+        key = (text, lang, tld)
+        with self._lock:
+            self.counters['requests'] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                owner = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            audio_bytes = self._fetch(text, lang, tld)
+            future.set_result(audio_bytes)
+            return audio_bytes
+        except Exception as e:
+            with self._lock:
+                self.counters['failures'] += 1
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _rewrite(self, url):
+        if not self.base_url:
+            return url
+        base = urlsplit(self.base_url)
+        original = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, original.path, original.query, original.fragment))
+
+    def _fetch(self, text, lang, tld):
+        from gtts import gTTS
+
+        tts = gTTS(text=text, lang=lang, slow=False, tld=tld)
+        parts = []
+        for prepared in tts._prepare_requests():
+            prepared.url = self._rewrite(prepared.url)
+            parts.append(self._send(prepared))
+        audio_bytes = b''.join(parts)
+        if not audio_bytes:
+            raise GTTSRequestError('gTTS returned no audio')
+        return audio_bytes
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            delay = min(retry_after, self.backoff_max)
+        else:
+            # Full jitter: spread retries of concurrent callers across the whole window
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        time.sleep(delay)
+
+    def _send(self, prepared):
+        """Send one token-chunk request with retries; returns the decoded audio part"""
+        import requests
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    self.counters['retries'] += 1
+
+            retry_after = None
+            try:
+                with self._semaphore:
+                    with self._lock:
+                        self.counters['upstream_calls'] += 1
+                    response = self.session.send(prepared, timeout=self.timeout)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    last_error = GTTSRequestError(f'Upstream returned {response.status_code}', response.status_code)
+                    header = response.headers.get('Retry-After')
+                    retry_after = float(header) if header and header.isdigit() else None
+                elif response.status_code >= 400:
+                    raise GTTSRequestError(f'Upstream returned {response.status_code}', response.status_code)
+                else:
+                    return self._decode(response)
+            except requests.RequestException as e:
+                last_error = GTTSRequestError(f'Failed to reach TTS upstream: {e}')
+
+            if attempt < self.max_retries:
+                self._backoff(attempt, retry_after)
+        raise last_error
+
+    def _decode(self, response):
+        parts = []
+        for line in response.iter_lines(chunk_size=1024):
+            decoded_line = line.decode('utf-8')
+            if 'jQ1olc' in decoded_line:
+                match = AUDIO_LINE_PATTERN.search(decoded_line)
+                if not match:
+                    raise GTTSRequestError('Upstream response contained no audio')
+                parts.append(base64.b64decode(match.group(1).encode('ascii')))
+        return b''.join(parts)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, inflight=len(self._inflight))
@@ -0,0 +1,57 @@
+"""Production server settings: gunicorn -c gunicorn.conf.py 'app:create_app()'
+
+Every value can be overridden through the environment variables below.
+"""
+import os
+import time
+import signal
+
+bind = os.environ.get('TTS_BIND', f"0.0.0.0:{os.environ.get('FLASK_PORT', 5000)}")
+
+# Threads suit this workload: most of a request is spent waiting on gTTS or on a
+# pyttsx3 worker process, not holding the GIL
+workers = int(os.environ.get('TTS_SERVER_WORKERS', 2))
+threads = int(os.environ.get('TTS_SERVER_THREADS', 8))
+worker_class = 'gthread'
+
+# Long texts can take a while to synthesize. On shutdown, in-flight requests drain first and
+# then queued jobs and batches (worker_exit); gunicorn SIGKILLs the worker once graceful_timeout
+# has passed since SIGTERM, so it leaves room for both phases
+timeout = int(os.environ.get('TTS_SERVER_TIMEOUT', 120))
+drain_timeout = int(os.environ.get('TTS_DRAIN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('TTS_GRACEFUL_TIMEOUT', 2 * drain_timeout + 5))
+# Kept back from the drain budget for stopping engine processes after the drain
+SHUTDOWN_MARGIN_SECONDS = 3
+keepalive = 5
+
+# Each server worker calls create_app() after forking, so it owns its engines, caches and pools
+preload_app = False
+
+# Split the pyttsx3 processes between server workers instead of giving each worker one per CPU
+os.environ.setdefault('TTS_PYTTSX3_WORKERS', str(max(1, (os.cpu_count() or 2) // workers)))
+
+# '-' logs requests to stdout; an empty value disables the access log
+accesslog = os.environ.get('TTS_ACCESS_LOG', '-') or None
+
+
+def post_worker_init(worker):
+    """Note when the worker is asked to stop, so worker_exit knows how much of graceful_timeout is left"""
+    handle_exit = worker.handle_exit
+
+    def handle_exit_timed(sig, frame):
+        worker.exit_requested_at = time.monotonic()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, handle_exit_timed)
+    signal.siginterrupt(signal.SIGTERM, False)
+
+
+def worker_exit(server, worker):
+    """Drain queued jobs and batches and stop engine processes before the worker exits"""
+    import app
+    budget = drain_timeout
+    requested_at = getattr(worker, 'exit_requested_at', None)
+    if requested_at is not None:
+        remaining = graceful_timeout - (time.monotonic() - requested_at) - SHUTDOWN_MARGIN_SECONDS
+        budget = max(0, min(budget, remaining))
+    app.shutdown_services(budget)
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+JOB_ID_LENGTH = 32
+
+# Lanes in priority order. Workers serve their own lane first and, when it is empty, help the
+# higher-priority lanes; they never take lower-priority work, so short jobs always have free workers
+LANES = ('short', 'long')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    lane TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    callback_url TEXT,
+    worker_pid INTEGER,
+    worker_token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_lane_status ON jobs (lane, status, created);
+'''
+
+# Columns added after the first release, for databases created before them
+MIGRATIONS = {
+    'worker_token': 'ALTER TABLE jobs ADD COLUMN worker_token TEXT',
+    'lease_expires': 'ALTER TABLE jobs ADD COLUMN lease_expires REAL'
+}
+
+
+class JobQueue:
+    """SQLite-backed job queue with priority lanes, worker threads and completion webhooks.
+
+    Jobs are persisted before their id is returned, so queued work survives a
+    restart. A running job is leased to the queue instance that claimed it,
+    identified by a random token rather than its pid (pids are reused across
+    container restarts), and that instance renews the lease while it lives.
+    Every instance periodically puts jobs with an expired lease back in the
+    queue (up to max_attempts), so work orphaned by a crashed sibling worker
+    is picked up without waiting for a restart.
+    """
+
+    def __init__(self, db_path, handler, lane_workers=None, max_attempts=3, retention_seconds=86400,
+                 webhook_timeout=10, webhook_retries=3, lease_seconds=60,
+                 callback_validator=None):
+        self.db_path = db_path
+        self.handler = handler
+        self.lane_workers = lane_workers or {'short': 2, 'long': 1}
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.webhook_timeout = webhook_timeout
+        self.webhook_retries = webhook_retries
+        self.lease_seconds = lease_seconds
+        self.callback_validator = callback_validator
+        self.token = uuid.uuid4().hex
+
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            yield conn
+        finally:
+            conn.close()
+
+    def start(self):
+        """Recover orphaned jobs and start the lane workers and the lease keeper"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        self.recover()
+        keeper = threading.Thread(target=self._lease_loop, name='tts-job-leases', daemon=True)
+        keeper.start()
+        self._threads.append(keeper)
+        for lane, count in self.lane_workers.items():
+            for i in range(count):
+                thread = threading.Thread(target=self._worker_loop, args=(lane,), name=f'tts-job-{lane}-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Stop taking new jobs and wait for workers to finish their current one"""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        # One deadline for all of them, so the drain never takes more than timeout in total
+        deadline = None if timeout is None else time.time() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.time()))
+        self._threads = []
+
+    def _lease_loop(self):
+        # Renew well before expiry so a slow database write can't let a live job's lease lapse
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                self.renew_leases()
+                self.recover()
+            except Exception as e:
+                print(f"Job lease upkeep failed: {e}")
+
+    def renew_leases(self):
+        """Extend the lease on every job this instance is running"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE status = 'running' AND worker_token = ?",
+                (time.time() + self.lease_seconds, self.token)
+            )
+
+    def recover(self):
+        """Requeue running jobs whose lease has expired, i.e. whose worker process died mid-job"""
+        requeued = 0
+        now = time.time()
+        with self._connect() as conn:
+            # Rows from before leases existed have none; their process is gone after the upgrade restart
+            expired = "status = 'running' AND (lease_expires IS NULL OR lease_expires < ?)"
+            rows = conn.execute(f"SELECT id, attempts FROM jobs WHERE {expired}", (now,)).fetchall()
+            for row in rows:
+                if row['attempts'] >= self.max_attempts:
+                    conn.execute(
+                        f"UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ? AND {expired}",
+                        ('Worker stopped while processing the job too many times', now, row['id'], now)
+                    )
+                else:
+                    cursor = conn.execute(
+                        "UPDATE jobs SET status = 'queued', worker_pid = NULL, worker_token = NULL, lease_expires = NULL "
+                        f"WHERE id = ? AND {expired}",
+                        (row['id'], now)
+                    )
+                    requeued += cursor.rowcount
+        if requeued:
+            print(f"Requeued {requeued} interrupted job(s)")
+            with self._wakeup:
+                self._wakeup.notify_all()
+        return requeued
+
+    def enqueue(self, payload, lane, callback_url=None):
+        """Persist a job and return its id"""
+        if lane not in LANES:
+            raise ValueError(f'Unknown lane {lane}')
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, lane, status, payload, callback_url, created) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, lane, json.dumps(payload), callback_url, time.time())
+            )
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return job_id
+
+    def _claim(self, lane):
+        """Atomically take the oldest queued job from lane, or from a higher-priority lane when idle"""
+        lanes = [lane] + list(LANES[:LANES.index(lane)])
+        with self._connect() as conn:
+            for candidate_lane in lanes:
+                row = conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_pid = ?, worker_token = ?, lease_expires = ?, "
+                    "started = ?, attempts = attempts + 1 "
+                    "WHERE id = (SELECT id FROM jobs WHERE lane = ? AND status = 'queued' ORDER BY created LIMIT 1) "
+                    "AND status = 'queued' RETURNING id, payload, callback_url",
+                    (os.getpid(), self.token, time.time() + self.lease_seconds, time.time(), candidate_lane)
+                ).fetchone()
+                if row is not None:
+                    return row['id'], json.loads(row['payload']), row['callback_url']
+        return None
+
+    def _worker_loop(self, lane):
+        last_purge = 0
+        while not self._stopping.is_set():
+            claimed = self._claim(lane)
+            if claimed is None:
+                if time.time() - last_purge > 600:
+                    self.purge_finished()
+                    last_purge = time.time()
+                # Poll as well as wait, so jobs enqueued by other processes are picked up
+                with self._wakeup:
+                    self._wakeup.wait(1.0)
+                continue
+
+            job_id, payload, callback_url = claimed
+            try:
+                result = self.handler(payload)
+                self._finish(job_id, 'completed', result=result)
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+                self._finish(job_id, 'failed', error=str(e))
+
+            if callback_url:
+                threading.Thread(target=self._send_webhook, args=(job_id, callback_url), daemon=True).start()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            # Only while still holding the lease: if it lapsed, the job was requeued and belongs to another worker now
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, lease_expires = NULL "
+                "WHERE id = ? AND status = 'running' AND worker_token = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, self.token)
+            )
+        if not cursor.rowcount:
+            print(f"Job {job_id} finished after its lease expired; keeping the state set by its new worker")
+
+    def _send_webhook(self, job_id, callback_url):
+        """POST the final job state to callback_url, retrying with backoff"""
+        import requests
+
+        if self.callback_validator is not None:
+            # Checked again at send time: the host may resolve elsewhere than when the job was accepted
+            try:
+                self.callback_validator(callback_url)
+            except ValueError as e:
+                print(f"Webhook for job {job_id} not sent: {e}")
+                return
+        body = self.get(job_id)
+        for attempt in range(self.webhook_retries):
+            try:
+                # Redirects aren't followed: the target was only validated for callback_url itself
+                response = requests.post(callback_url, json=body, timeout=self.webhook_timeout, allow_redirects=False)
+                if response.is_redirect:
+                    print(f"Webhook for job {job_id} was redirected to {response.headers.get('Location')}; not following it")
+                    return
+                if response.status_code < 500:
+                    return
+                print(f"Webhook for job {job_id} returned {response.status_code}")
+            except requests.RequestException as e:
+                print(f"Webhook for job {job_id} failed: {e}")
+            if attempt + 1 < self.webhook_retries:
+                time.sleep(min(30, 2 ** attempt) + random.random())
+
+    def get(self, job_id):
+        """Public view of a job, or None"""
+        if len(job_id) != JOB_ID_LENGTH or not job_id.isalnum():
+            return None
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = {
+                'job_id': row['id'],
+                'status': row['status'],
+                'lane': row['lane'],
+                'attempts': row['attempts'],
+                'created': row['created'],
+                'started': row['started'],
+                'finished': row['finished'],
+                'result': json.loads(row['result']) if row['result'] else None,
+                'error': row['error']
+            }
+            if row['status'] == 'queued':
+                job['queue_position'] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE lane = ? AND status = 'queued' AND created <= ?",
+                    (row['lane'], row['created'])
+                ).fetchone()[0]
+        return job
+
+    def stats(self):
+        with self._connect() as conn:
+            rows = conn.execute('SELECT lane, status, COUNT(*) AS count FROM jobs GROUP BY lane, status').fetchall()
+        stats = {lane: {} for lane in LANES}
+        for row in rows:
+            stats.setdefault(row['lane'], {})[row['status']] = row['count']
+        return stats
+
+    def purge_finished(self):
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention_seconds
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished < ?", (cutoff,))
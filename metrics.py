@@ -0,0 +1,248 @@
+import sys
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Seconds; spans cache hits (sub-millisecond) up to long multi-segment syntheses
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Labels bound for the current request or job, and the trace being collected for it (if sampled)
+_bound_labels = contextvars.ContextVar('tts_metric_labels', default={})
+_current_trace = contextvars.ContextVar('tts_trace', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(labelnames, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        # Missing labels render as empty strings so every series has the same label set
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Gauge(_Metric):
+    """A value set directly, or read from collect() (returning {label tuple: value}) at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labelnames=(), collect=None, kind=None):
+        super().__init__(name, help_text, labelnames)
+        self.collect = collect
+        if kind:
+            self.kind = kind  # e.g. 'counter' for totals another component already keeps
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        if self.collect is not None:
+            values = sorted(self.collect().items())
+        else:
+            with self._lock:
+                values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, dict(series, counts=list(series['counts']))) for key, series in self._values.items())
+        lines = []
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", _format_value(bound))])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", "+Inf")])} {series["count"]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {series["count"]}')
+        return lines
+
+
+class Metrics:
+    """In-process metrics registry rendered in the Prometheus text exposition format.
+
+    Stage timings go through stage(), which labels them with whatever bind()
+    set for the current request or job (engine, language, accent) and, when
+    the request was sampled for tracing, also records them as a trace span.
+    Values are per process: with several server workers each reports its own.
+    """
+
+    def __init__(self, trace_sample_rate=0.0, trace_log=None):
+        self.trace_sample_rate = trace_sample_rate
+        self.trace_log = trace_log
+        self._metrics = []
+        self._trace_lock = threading.Lock()
+        self.stage_seconds = self.histogram(
+            'tts_stage_duration_seconds',
+            'Time spent in each synthesis stage',
+            ('stage', 'engine', 'language', 'accent')
+        )
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=(), collect=None, kind=None):
+        return self._add(Gauge(name, help_text, labelnames, collect, kind))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.render()
+            except Exception as e:
+                # One broken collector shouldn't take down the whole scrape
+                print(f"Metric {metric.name} failed to render: {e}")
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    @contextmanager
+    def bind(self, **labels):
+        """Label every stage timed inside this block (and in threads started with its context)"""
+        token = _bound_labels.set(dict(_bound_labels.get(), **labels))
+        try:
+            yield
+        finally:
+            _bound_labels.reset(token)
+
+    def labels(self):
+        return _bound_labels.get()
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """Time a block of the hot path into tts_stage_duration_seconds"""
+        labels = dict(_bound_labels.get(), **labels)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stage_seconds.observe(elapsed, stage=name, **labels)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.span(name, started, elapsed, labels)
+
+    def start_trace(self, **fields):
+        """Begin collecting spans for this request if it is sampled; returns the trace or None"""
+        if self.trace_sample_rate <= 0 or random.random() >= self.trace_sample_rate:
+            _current_trace.set(None)
+            return None
+        trace = Trace(fields)
+        _current_trace.set(trace)
+        return trace
+
+    def finish_trace(self, trace, **fields):
+        """Write a sampled trace as one JSON line"""
+        _current_trace.set(None)
+        if trace is None:
+            return
+        line = json.dumps(trace.finish(**fields), ensure_ascii=False)
+        with self._trace_lock:
+            if self.trace_log and self.trace_log != '-':
+                with open(self.trace_log, 'a', encoding='utf-8') as log_file:
+                    log_file.write(line + '\n')
+            else:
+                print(f"TRACE {line}", file=sys.stdout, flush=True)
+
+
+class Trace:
+    """Spans recorded for one sampled request, possibly from several segment threads"""
+
+    def __init__(self, fields):
+        self.id = uuid.uuid4().hex
+        self.fields = fields
+        self.started = time.perf_counter()
+        self.timestamp = time.time()
+        self._lock = threading.Lock()
+        self._spans = []
+
+    def span(self, name, started, elapsed, labels):
+        with self._lock:
+            self._spans.append({
+                'stage': name,
+                'offset_ms': round((started - self.started) * 1000, 3),
+                'duration_ms': round(elapsed * 1000, 3),
+                **{key: value for key, value in labels.items() if value not in (None, '')}
+            })
+
+    def finish(self, **fields):
+        with self._lock:
+            spans = sorted(self._spans, key=lambda span: span['offset_ms'])
+        return dict(
+            self.fields,
+            **fields,
+            trace_id=self.id,
+            timestamp=self.timestamp,
+            duration_ms=round((time.perf_counter() - self.started) * 1000, 3),
+            spans=spans
+        )
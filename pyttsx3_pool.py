@@ -0,0 +1,377 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+
+
+def default_scratch_root():
+    """RAM-backed tmpfs when the host has one, so rendered audio never reaches a disk"""
+    shm = '/dev/shm'
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return None
+
+
+def audio_file_complete(path):
+    """True once a rendered WAV/AIFF file is fully written according to its own header"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as audio_file:
+            header = audio_file.read(12)
+    except OSError:
+        return False
+
+    if len(header) < 12:
+        return False
+    # RIFF (WAV) and FORM (AIFF) both store the remaining container length after the tag
+    if header[:4] == b'RIFF':
+        return int.from_bytes(header[4:8], 'little') + 8 <= size
+    if header[:4] == b'FORM':
+        return int.from_bytes(header[4:8], 'big') + 8 <= size
+    return size > 0
+
+
+def wait_for_audio_file(path, timeout, poll_interval=0.005):
+    """Wait until the driver has finished writing path, without a fixed sleep"""
+    deadline = time.monotonic() + timeout
+    while not audio_file_complete(path):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
+    return True
+
+
+def _worker_main(conn, voice_id, rate, volume, scratch_dir, file_timeout=5):
+    """Worker process loop: owns one pyttsx3 engine and renders jobs sent over conn.
+
+    pyttsx3 can only render to a file, so each worker renders into a private
+    scratch file and sends the audio bytes back instead of a path.
+    """
+    output_path = os.path.join(scratch_dir, 'utterance.wav')
+    try:
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.setProperty('rate', rate)
+        engine.setProperty('volume', volume)
+        if voice_id:
+            engine.setProperty('voice', voice_id)
+        voices = [(voice.id, voice.name) for voice in (engine.getProperty('voices') or [])]
+
+        # Some drivers (e.g. NSSpeechSynthesizer) keep writing after runAndWait returns,
+        # but all of them report the end of an utterance through this callback
+        utterance_done = threading.Event()
+        engine.connect('finished-utterance', lambda name, completed: utterance_done.set())
+    except Exception as e:
+        conn.send(('error', str(e)))
+        return
+
+    conn.send(('ready', voices))
+    current_voice = voice_id
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        text, job_voice = job
+        try:
+            # The engine is private to this process, so switching voices cannot race
+            if job_voice and job_voice != current_voice:
+                engine.setProperty('voice', job_voice)
+                current_voice = job_voice
+            utterance_done.clear()
+            engine.save_to_file(text, output_path)
+            engine.runAndWait()
+            if not utterance_done.wait(file_timeout):
+                raise RuntimeError('pyttsx3 never reported the utterance as finished')
+            if not wait_for_audio_file(output_path, file_timeout):
+                raise RuntimeError('pyttsx3 did not finish writing the audio file')
+            with open(output_path, 'rb') as audio_file:
+                audio_bytes = audio_file.read()
+            conn.send(('ok', audio_bytes))
+        except Exception as e:
+            conn.send(('error', str(e)))
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+
+class _Worker:
+    def __init__(self, process, conn, voice_id, generation=0, scratch_dir=None):
+        self.process = process
+        self.conn = conn
+        self.scratch_dir = scratch_dir
+        self.voice_id = voice_id
+        self.generation = generation
+        self.jobs_done = 0
+
+    def stop(self, graceful=True, timeout=2):
+        # A hung worker will never read the shutdown message, so skip straight to terminate
+        if graceful:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+        if self.scratch_dir:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+
+class Pyttsx3WorkerPool:
+    """Long-lived worker processes, each with its own pyttsx3 engine, fed through a shared wait queue.
+
+    Callers block until a worker is idle (preferring one already set to the
+    requested voice), send it a single job and wait for it with a timeout.
+    Workers that hang, die or reach max_jobs_per_worker are replaced in the
+    background; a replacement that fails to start is retried with backoff
+    (up to max_spawn_backoff seconds apart) until the pool shuts down.
+    on_voices, if given, receives the (id, name) voices each replacement
+    worker reports, so callers can pick up system voice changes.
+    Audio comes back as bytes; workers render into scratch files under
+    scratch_root (tmpfs by default), never into the caller's directories.
+    """
+
+    def __init__(self, size, job_timeout=60, queue_timeout=120, max_jobs_per_worker=200,
+                 startup_timeout=30, rate=180, volume=1.0, on_voices=None, scratch_root=None,
+                 spawn_backoff=1.0, max_spawn_backoff=60.0):
+        self.size = max(1, size)
+        self.job_timeout = job_timeout
+        self.queue_timeout = queue_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.startup_timeout = startup_timeout
+        self.spawn_backoff = spawn_backoff
+        self.max_spawn_backoff = max_spawn_backoff
+        self.rate = rate
+        self.volume = volume
+        self.on_voices = on_voices
+        self.scratch_root = scratch_root or default_scratch_root()
+        self.default_voice_id = None
+
+        # spawn keeps each engine's native driver state out of the parent process
+        self._context = multiprocessing.get_context('spawn')
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._live = 0
+        self._pending_spawns = 0
+        self._spawns_failing = 0
+        self._waiting = 0
+        self._closed = False
+        self._generation = 0
+        self.counters = {
+            'jobs_completed': 0,
+            'jobs_failed': 0,
+            'timeouts': 0,
+            'recycled': 0,
+            'spawn_failures': 0
+        }
+
+    def start(self, default_voice_selector=None):
+        """Start the first worker synchronously and return the voices it reports.
+
+        default_voice_selector receives the reported (id, name) voices and
+        returns the voice id every worker should start with.
+        """
+        worker, voices = self._spawn(None)
+        if default_voice_selector is not None:
+            self.default_voice_id = default_voice_selector(voices)
+        with self._cond:
+            self._live = 1
+            self._idle.append(worker)
+            self._pending_spawns = self.size - 1
+        for _ in range(self.size - 1):
+            threading.Thread(target=self._spawn_replacement, daemon=True).start()
+        return voices
+
+    def _spawn(self, voice_id):
+        parent_conn, child_conn = self._context.Pipe()
+        # Created here rather than in the worker so it is removed even if the worker is killed
+        scratch_dir = tempfile.mkdtemp(prefix='tts-pyttsx3-', dir=self.scratch_root)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, voice_id, self.rate, self.volume, scratch_dir),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        worker = _Worker(process, parent_conn, voice_id, self._generation, scratch_dir)
+        if not parent_conn.poll(self.startup_timeout):
+            worker.stop()
+            raise RuntimeError('pyttsx3 worker did not start in time')
+        try:
+            status, detail = parent_conn.recv()
+        except EOFError:
+            worker.stop()
+            raise RuntimeError('pyttsx3 worker exited during startup')
+        if status != 'ready':
+            worker.stop()
+            raise RuntimeError(f'pyttsx3 worker failed to start: {detail}')
+        return worker, detail
+
+    def _spawn_replacement(self):
+        delay = self.spawn_backoff
+        failing = False
+        while True:
+            try:
+                worker, voices = self._spawn(self.default_voice_id)
+                break
+            except Exception as e:
+                print(f"pyttsx3 worker spawn failed, retrying in {delay:.1f}s: {e}")
+                with self._cond:
+                    self.counters['spawn_failures'] += 1
+                    if not failing:
+                        # Counted until this replacement succeeds, so waiters fail fast while no worker is left
+                        failing = True
+                        self._spawns_failing += 1
+                        self._cond.notify_all()
+                    if self._cond.wait_for(lambda: self._closed, timeout=delay):
+                        self._spawns_failing -= 1
+                        self._pending_spawns -= 1
+                        return
+                delay = min(delay * 2, self.max_spawn_backoff)
+
+        with self._cond:
+            self._pending_spawns -= 1
+            if failing:
+                self._spawns_failing -= 1
+            if self._closed:
+                worker.stop()
+                return
+            self._live += 1
+            self._idle.append(worker)
+            self._cond.notify_all()
+
+        if self.on_voices is not None:
+            try:
+                self.on_voices(voices)
+            except Exception as e:
+                print(f"pyttsx3 voice update failed: {e}")
+
+    def _acquire(self, voice_id):
+        with self._cond:
+            self._waiting += 1
+            try:
+                ready = self._cond.wait_for(
+                    lambda: self._closed or self._idle or (self._live == 0 and (
+                        self._pending_spawns == 0 or self._spawns_failing
+                    )),
+                    timeout=self.queue_timeout
+                )
+                if self._closed:
+                    raise RuntimeError('pyttsx3 worker pool is shut down')
+                if not ready:
+                    raise TimeoutError('Timed out waiting for a free pyttsx3 worker')
+                if not self._idle:
+                    raise RuntimeError('No pyttsx3 workers available')
+
+                # Prefer a worker whose engine is already set to this voice
+                for worker in self._idle:
+                    if worker.voice_id == voice_id:
+                        self._idle.remove(worker)
+                        return worker
+                return self._idle.popleft()
+            finally:
+                self._waiting -= 1
+
+    def _release(self, worker, healthy):
+        with self._cond:
+            recycle = (
+                not healthy
+                or worker.jobs_done >= self.max_jobs_per_worker
+                or worker.generation != self._generation
+            )
+            if not recycle and not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+            self._live -= 1
+            if recycle:
+                self.counters['recycled'] += 1
+            respawn = not self._closed
+            if respawn:
+                self._pending_spawns += 1
+
+        worker.stop(graceful=healthy)
+        if respawn:
+            threading.Thread(target=self._spawn_replacement, daemon=True).start()
+
+    def synthesize(self, text, voice_id=None):
+        """Render text on a worker and return the audio bytes, raising on failure or timeout"""
+        worker = self._acquire(voice_id)
+        healthy = False
+        try:
+            worker.conn.send((text, voice_id))
+            if not worker.conn.poll(self.job_timeout):
+                with self._cond:
+                    self.counters['timeouts'] += 1
+                raise TimeoutError(f'pyttsx3 job exceeded {self.job_timeout}s')
+            try:
+                status, detail = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f'pyttsx3 worker died: {e}')
+            healthy = True
+            worker.jobs_done += 1
+            if voice_id:
+                worker.voice_id = voice_id
+            if status != 'ok':
+                raise RuntimeError(detail)
+            with self._cond:
+                self.counters['jobs_completed'] += 1
+            return detail
+        except Exception:
+            with self._cond:
+                self.counters['jobs_failed'] += 1
+            raise
+        finally:
+            self._release(worker, healthy)
+
+    def recycle_all(self):
+        """Replace every worker: idle ones now, busy ones after their current job.
+
+        New workers re-read the system voices, which on_voices then reports.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._generation += 1
+            idle = list(self._idle)
+            self._idle.clear()
+            self._live -= len(idle)
+            self._pending_spawns += len(idle)
+            self.counters['recycled'] += len(idle)
+
+        for worker in idle:
+            worker.stop()
+            threading.Thread(target=self._spawn_replacement, daemon=True).start()
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self.counters,
+                size=self.size,
+                live=self._live,
+                idle=len(self._idle),
+                busy=self._live - len(self._idle),
+                waiting=self._waiting,
+                starting=self._pending_spawns
+            )
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
@@ -7,6 +7,8 @@ document.addEventListener('DOMContentLoaded', function() {
     const accentSelect = document.getElementById('accentSelect');
     const voiceGenderSelect = document.getElementById('voiceGenderSelect');
     const engineSelect = document.getElementById('engineSelect');
+    const playbackSelect = document.getElementById('playbackSelect');
+    const playbackDescription = document.getElementById('playbackDescription');
     const languageInfo = document.getElementById('languageInfo');
     const accentInfo = document.getElementById('accentInfo');
     const voiceInfo = document.getElementById('voiceInfo');
@@ -77,6 +79,14 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     };
 
+    // Progressive playback needs MediaSource with MP3 support
+    const streamingSupported = !!(window.MediaSource && MediaSource.isTypeSupported('audio/mpeg'));
+
+    // URL of the last generated artifact, used by the download button
+    let currentAudioUrl = null;
+    // Streamed audio is never stored on the server, so the download button saves the copy received here
+    let streamedAudioUrl = null;
+
     // Voice capabilities (will be loaded from server)
     let voiceCapabilities = {};
 
@@ -126,6 +136,11 @@ document.addEventListener('DOMContentLoaded', function() {
         updateVoiceWarning();
     });
 
+    // Playback mode change
+    playbackSelect.addEventListener('change', function() {
+        updatePlaybackInfo();
+    });
+
     // Clear button functionality
     clearBtn.addEventListener('click', function() {
         textInput.value = '';
@@ -154,7 +169,11 @@ document.addEventListener('DOMContentLoaded', function() {
         const selectedVoiceGender = voiceGenderSelect.value;
         const selectedEngine = engineSelect.value;
         
-        generateSpeech(text, selectedEngine, selectedVoiceGender, selectedLanguage, selectedAccent);
+        if (playbackSelect.value === 'stream' && streamingSupported) {
+            streamSpeech(text, selectedEngine, selectedVoiceGender, selectedLanguage, selectedAccent);
+        } else {
+            generateSpeech(text, selectedEngine, selectedVoiceGender, selectedLanguage, selectedAccent);
+        }
     });
 
     // Play button functionality
@@ -166,7 +185,16 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Download button functionality
     downloadBtn.addEventListener('click', function() {
-        window.open('/download_audio', '_blank');
+        if (currentAudioUrl) {
+            window.open(`${currentAudioUrl}?download=1`, '_blank');
+        } else if (streamedAudioUrl) {
+            const link = document.createElement('a');
+            link.href = streamedAudioUrl;
+            link.download = 'generated_speech.mp3';
+            link.click();
+        } else {
+            window.open('/download_audio', '_blank');
+        }
     });
 
     // Enter key to generate (Ctrl+Enter or Cmd+Enter)
@@ -383,6 +411,18 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    function updatePlaybackInfo() {
+        if (!streamingSupported) {
+            playbackSelect.value = 'full';
+            playbackSelect.disabled = true;
+            playbackDescription.textContent = 'Streaming is not supported by this browser';
+        } else if (playbackSelect.value === 'stream') {
+            playbackDescription.textContent = 'Audio starts after the first sentence';
+        } else {
+            playbackDescription.textContent = 'Audio plays once generation finishes';
+        }
+    }
+
     function updateSampleText() {
         const selectedLanguage = languageSelect.value;
         
@@ -393,13 +433,155 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    function generateSpeech(text, engine, voiceGender, language, accent) {
-        // Show loading state
+    function showGenerationDetails(data) {
+        const engineName = data.engine_used === 'gtts' ? 'Google TTS' : 'System TTS';
+        const voiceGenderIcon = data.voice_gender === 'female' ? '👩' : '👨';
+        const voiceGenderText = data.voice_gender.charAt(0).toUpperCase() + data.voice_gender.slice(1);
+        const languageName = languageConfig[data.language]?.name || data.language;
+        const accentName = languageConfig[data.language]?.accents[data.accent]?.name || data.accent;
+        const accentFlag = languageConfig[data.language]?.accents[data.accent]?.flag || '🌍';
+        
+        engineUsed.innerHTML = `<i class="fas fa-cog"></i> ${engineName}`;
+        voiceUsed.innerHTML = `<i class="fas fa-user"></i> ${voiceGenderIcon} ${voiceGenderText}`;
+        languageUsed.innerHTML = `<i class="fas fa-language"></i> ${languageName}`;
+        accentUsed.innerHTML = `<i class="fas fa-map-marker-alt"></i> ${accentFlag} ${accentName}`;
+        
+        if (data.voice_used) {
+            voiceUsed.innerHTML += ` (${data.voice_used})`;
+        }
+    }
+
+    function showGeneratingState() {
         loading.style.display = 'block';
         outputSection.style.display = 'none';
         generateBtn.disabled = true;
         generateBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Generating...';
         hideMessages();
+    }
+
+    function resetGenerateButton() {
+        loading.style.display = 'none';
+        generateBtn.disabled = false;
+        generateBtn.innerHTML = '<i class="fas fa-play"></i> Generate Speech';
+    }
+
+    function clearStreamedAudio() {
+        if (streamedAudioUrl) {
+            URL.revokeObjectURL(streamedAudioUrl);
+            streamedAudioUrl = null;
+        }
+    }
+
+    function streamSpeech(text, engine, voiceGender, language, accent) {
+        showGeneratingState();
+        currentAudioUrl = null;
+        clearStreamedAudio();
+        // Nothing to download until the whole stream has arrived
+        downloadBtn.disabled = true;
+
+        const mediaSource = new MediaSource();
+        audioPlayer.src = URL.createObjectURL(mediaSource);
+
+        mediaSource.addEventListener('sourceopen', function() {
+            const sourceBuffer = mediaSource.addSourceBuffer('audio/mpeg');
+            const pendingChunks = [];
+            let streamDone = false;
+
+            // SourceBuffer accepts one append at a time, so queue chunks until it is idle
+            function appendNext() {
+                if (sourceBuffer.updating || mediaSource.readyState !== 'open') {
+                    return;
+                }
+                if (pendingChunks.length > 0) {
+                    sourceBuffer.appendBuffer(pendingChunks.shift());
+                } else if (streamDone) {
+                    mediaSource.endOfStream();
+                }
+            }
+            sourceBuffer.addEventListener('updateend', appendNext);
+
+            fetch('/stream_speech', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    text: text,
+                    engine: engine,
+                    voice_gender: voiceGender,
+                    language: language,
+                    accent: accent
+                })
+            })
+            .then(response => {
+                if (!response.ok) {
+                    return response.json().then(data => {
+                        throw new Error(data.error || 'An error occurred while generating speech.');
+                    });
+                }
+
+                showGenerationDetails({
+                    engine_used: response.headers.get('X-Engine-Used'),
+                    voice_used: decodeURIComponent(response.headers.get('X-Voice-Used') || ''),
+                    voice_gender: voiceGender,
+                    language: language,
+                    accent: accent
+                });
+
+                const reader = response.body.getReader();
+                const receivedChunks = [];
+                let firstChunk = true;
+
+                function readChunk() {
+                    return reader.read().then(({ done, value }) => {
+                        if (done) {
+                            streamDone = true;
+                            appendNext();
+                            if (firstChunk) {
+                                throw new Error('Failed to generate speech with both engines');
+                            }
+                            streamedAudioUrl = URL.createObjectURL(new Blob(receivedChunks, { type: 'audio/mpeg' }));
+                            downloadBtn.disabled = false;
+                            showSuccess('Speech streamed successfully!');
+                            return;
+                        }
+                        receivedChunks.push(value);
+                        pendingChunks.push(value);
+                        appendNext();
+
+                        if (firstChunk) {
+                            // Start playback as soon as the first segment arrives
+                            firstChunk = false;
+                            resetGenerateButton();
+                            outputSection.style.display = 'block';
+                            audioPlayer.play().catch(() => {});
+                        }
+                        return readChunk();
+                    }, error => {
+                        // The server aborts the transfer when a later segment fails
+                        if (!firstChunk) {
+                            streamDone = true;
+                            appendNext();
+                            throw new Error('The stream ended early, so the audio is incomplete. Please try again.');
+                        }
+                        throw error;
+                    });
+                }
+                return readChunk();
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                showError(error.message || 'Network error. Please check your connection and try again.');
+            })
+            .finally(() => {
+                resetGenerateButton();
+            });
+        }, { once: true });
+    }
+
+    function generateSpeech(text, engine, voiceGender, language, accent) {
+        // Show loading state
+        showGeneratingState();
 
         // Make API request
         fetch('/generate_speech', {
@@ -418,41 +600,26 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                // Create audio blob from base64 data
-                const audioData = atob(data.audio_data);
-                const audioArray = new Uint8Array(audioData.length);
-                for (let i = 0; i < audioData.length; i++) {
-                    audioArray[i] = audioData.charCodeAt(i);
-                }
-                
-                // Detect file type and create appropriate blob
-                let mimeType = 'audio/wav';
-                if (data.engine_used === 'gtts') {
-                    mimeType = 'audio/mpeg';
+                if (data.audio_url) {
+                    // Let the browser fetch the artifact directly (supports Range requests and caching)
+                    audioPlayer.src = data.audio_url;
+                } else {
+                    // Legacy response with the audio inlined as base64
+                    const audioData = atob(data.audio_data);
+                    const audioArray = new Uint8Array(audioData.length);
+                    for (let i = 0; i < audioData.length; i++) {
+                        audioArray[i] = audioData.charCodeAt(i);
+                    }
+                    
+                    const mimeType = data.mimetype || (data.engine_used === 'gtts' ? 'audio/mpeg' : 'audio/wav');
+                    const audioBlob = new Blob([audioArray], { type: mimeType });
+                    audioPlayer.src = URL.createObjectURL(audioBlob);
                 }
+                currentAudioUrl = data.audio_url || null;
+                clearStreamedAudio();
+                downloadBtn.disabled = false;
                 
-                const audioBlob = new Blob([audioArray], { type: mimeType });
-                const audioUrl = URL.createObjectURL(audioBlob);
-                
-                // Update audio player
-                audioPlayer.src = audioUrl;
-                
-                // Show generation details
-                const engineName = data.engine_used === 'gtts' ? 'Google TTS' : 'System TTS';
-                const voiceGenderIcon = data.voice_gender === 'female' ? '👩' : '👨';
-                const voiceGenderText = data.voice_gender.charAt(0).toUpperCase() + data.voice_gender.slice(1);
-                const languageName = languageConfig[data.language]?.name || data.language;
-                const accentName = languageConfig[data.language]?.accents[data.accent]?.name || data.accent;
-                const accentFlag = languageConfig[data.language]?.accents[data.accent]?.flag || '🌍';
-                
-                engineUsed.innerHTML = `<i class="fas fa-cog"></i> ${engineName}`;
-                voiceUsed.innerHTML = `<i class="fas fa-user"></i> ${voiceGenderIcon} ${voiceGenderText}`;
-                languageUsed.innerHTML = `<i class="fas fa-language"></i> ${languageName}`;
-                accentUsed.innerHTML = `<i class="fas fa-map-marker-alt"></i> ${accentFlag} ${accentName}`;
-                
-                if (data.voice_used) {
-                    voiceUsed.innerHTML += ` (${data.voice_used})`;
-                }
+                showGenerationDetails(data);
                 
                 // Show output section
                 outputSection.style.display = 'block';
@@ -476,9 +643,7 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .finally(() => {
             // Hide loading state
-            loading.style.display = 'none';
-            generateBtn.disabled = false;
-            generateBtn.innerHTML = '<i class="fas fa-play"></i> Generate Speech';
+            resetGenerateButton();
         });
     }
 
@@ -555,5 +720,6 @@ document.addEventListener('DOMContentLoaded', function() {
     updateAccentInfo();
     updateVoiceInfo();
     updateEngineInfo();
+    updatePlaybackInfo();
     updateSampleText();
 }); 
\ No newline at end of file
@@ -0,0 +1,329 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Script each supported language code is written in, and the language a run of that script is spoken in by default
+LANGUAGE_SCRIPTS = {
+    'en': 'latin',
+    'mr': 'devanagari'
+}
+SCRIPT_LANGUAGES = {script: code for code, script in LANGUAGE_SCRIPTS.items()}
+
+NORMALIZATION_CACHE_SIZE = 1024
+
+# Invisible characters dropped outright; ZWJ/ZWNJ are kept because they change how Devanagari conjuncts render
+_INVISIBLE = dict.fromkeys(map(ord, '\u00ad\u200b\u2060\ufeff'))
+_PUNCTUATION = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '“': '"', '”': '"', '„': '"', '«': '"', '»': '"'
+})
+# Devanagari digits share a canonical (ASCII) form with Latin ones so "२०" and "20" hit the same cache entry
+_DEVANAGARI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+
+_ONES = [
+    'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+    'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen', 'eighteen', 'nineteen'
+]
+_TENS = ['', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety']
+_SCALES = [(10 ** 12, 'trillion'), (10 ** 9, 'billion'), (10 ** 6, 'million'), (1000, 'thousand')]
+_IRREGULAR_ORDINALS = {
+    'one': 'first', 'two': 'second', 'three': 'third', 'five': 'fifth',
+    'eight': 'eighth', 'nine': 'ninth', 'twelve': 'twelfth'
+}
+
+# Symbol -> (singular, plural, minor singular, minor plural)
+_EN_CURRENCIES = {
+    '$': ('dollar', 'dollars', 'cent', 'cents'),
+    '€': ('euro', 'euros', 'cent', 'cents'),
+    '£': ('pound', 'pounds', 'penny', 'pence'),
+    '₹': ('rupee', 'rupees', 'paisa', 'paise')
+}
+_EN_UNITS = {
+    'km': ('kilometer', 'kilometers'),
+    'kg': ('kilogram', 'kilograms'),
+    'cm': ('centimeter', 'centimeters'),
+    'mm': ('millimeter', 'millimeters'),
+    'mg': ('milligram', 'milligrams'),
+    'ml': ('milliliter', 'milliliters'),
+    'hr': ('hour', 'hours'),
+    'hrs': ('hour', 'hours'),
+    'min': ('minute', 'minutes'),
+    'sec': ('second', 'seconds')
+}
+_EN_ABBREVIATIONS = {
+    'Mr.': 'Mister',
+    'Mrs.': 'Missus',
+    'Ms.': 'Miz',
+    'Dr.': 'Doctor',
+    'Prof.': 'Professor',
+    'Sr.': 'Senior',
+    'Jr.': 'Junior',
+    'vs.': 'versus',
+    'etc.': 'et cetera',
+    'e.g.': 'for example',
+    'i.e.': 'that is',
+    'approx.': 'approximately',
+    'Dept.': 'Department',
+    'Inc.': 'Incorporated',
+    'Ltd.': 'Limited'
+}
+# Abbreviations that can also end a sentence; the rest (titles, "e.g.") always run on into the next word
+_EN_SENTENCE_FINAL = {'etc.', 'Sr.', 'Jr.', 'Dept.', 'Inc.', 'Ltd.'}
+
+_MR_ABBREVIATIONS = {
+    'डॉ.': 'डॉक्टर',
+    'प्रा.': 'प्राध्यापक',
+    'कु.': 'कुमारी',
+    'श्री.': 'श्री',
+    'सौ.': 'सौ',
+    'कि.मी.': 'किलोमीटर',
+    'इ.स.': 'इसवी सन'
+}
+
+_URL = re.compile(
+    r'\b(?:https?://|www\.)[^\s"<>]+'
+    r'|\b[\w-]+(?:\.[\w-]+)*\.(?:com|org|net|edu|gov|io|in|co)(?:/[^\s"<>]*)?(?!\w)(?!\.\w)'
+)
+_EMAIL = re.compile(r'\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b')
+_GROUPED_NUMBER = re.compile(r'(?<![\d,])(?:\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})+,\d{3})(?![\d,]*\d)')
+_NUMBER = r'\d+(?:\.\d+)?'
+# Numbers inside dates, phone numbers and version strings are left for the engine to read as written
+_STANDALONE = r'(?<![\w.])(?<!\d[/-])({number})(?![/-]\d)(?!\.\d)(?!\w)'
+
+
+def normalize_unicode(text):
+    """Canonical Unicode form: NFKC, plain quotes, no invisible characters, collapsed whitespace.
+
+    Line breaks are kept (one per non-empty line) because they end sentences.
+    """
+    text = unicodedata.normalize('NFKC', text).translate(_INVISIBLE).translate(_PUNCTUATION)
+    text = text.translate(_DEVANAGARI_DIGITS)
+    lines = (' '.join(''.join(ch for ch in line if unicodedata.category(ch) != 'Cc' or ch == '\t').split())
+             for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def _speak_address(address):
+    """Read a URL or email address out symbol by symbol, dropping the scheme and query string"""
+    trailing = ''
+    while address and address[-1] in '.,;:!?)]\'"':
+        trailing = address[-1] + trailing
+        address = address[:-1]
+    address = re.sub(r'^(?:https?://)?(?:www\.)?', '', address)
+    address = re.split(r'[?#]', address, 1)[0].rstrip('/')
+    spoken = re.sub(r'[./@_-]', lambda m: {'.': ' dot ', '/': ' slash ', '@': ' at ', '_': ' underscore ', '-': ' dash '}[m.group(0)], address)
+    return ' '.join(spoken.split()) + trailing
+
+
+def english_number(n):
+    """Cardinal number words, e.g. 1234 -> one thousand two hundred thirty-four"""
+    if n >= 1000:
+        words = []
+        for scale, name in _SCALES:
+            if n >= scale:
+                words.append(f'{english_number(n // scale)} {name}')
+                n %= scale
+        if n:
+            words.append(english_number(n))
+        return ' '.join(words)
+    words = []
+    if n >= 100:
+        words.append(f'{_ONES[n // 100]} hundred')
+        n %= 100
+    if n >= 20:
+        words.append(_TENS[n // 10] + (f'-{_ONES[n % 10]}' if n % 10 else ''))
+    elif n or not words:
+        words.append(_ONES[n])
+    return ' '.join(words)
+
+
+def english_ordinal(n):
+    """Ordinal number words, e.g. 21 -> twenty-first"""
+    head, last = re.match(r'(.*?)([a-z]+)$', english_number(n)).groups()
+    if last in _IRREGULAR_ORDINALS:
+        last = _IRREGULAR_ORDINALS[last]
+    elif last.endswith('y'):
+        last = last[:-1] + 'ieth'
+    else:
+        last += 'th'
+    return head + last
+
+
+def english_year(n):
+    """Years read in pairs: 1999 -> nineteen ninety-nine, 2005 -> two thousand five"""
+    if 2000 <= n <= 2009:
+        return english_number(n)
+    century, rest = divmod(n, 100)
+    if rest == 0:
+        return f'{english_number(century)} hundred'
+    return f"{english_number(century)} {'oh ' + _ONES[rest] if rest < 10 else english_number(rest)}"
+
+
+def _english_digits(digits):
+    return ' '.join(_ONES[int(digit)] for digit in digits)
+
+
+def _english_cardinal(digits):
+    # Codes with leading zeros and very long numbers are read digit by digit
+    if len(digits) > 15 or (len(digits) > 1 and digits.startswith('0')):
+        return _english_digits(digits)
+    return english_number(int(digits))
+
+
+def _english_amount(number):
+    whole, _, fraction = number.partition('.')
+    if not fraction and len(whole) == 4 and 1100 <= int(whole) <= 2099:
+        spoken = english_year(int(whole))
+    else:
+        spoken = _english_cardinal(whole)
+    if fraction:
+        spoken += f' point {_english_digits(fraction)}'
+    return spoken
+
+
+def _english_currency(match):
+    singular, plural, minor_singular, minor_plural = _EN_CURRENCIES[match.group(1) or '₹']
+    whole, _, fraction = match.group(2).partition('.')
+    if fraction and len(fraction) != 2:
+        return f'{_english_amount(match.group(2))} {plural}'
+    parts = []
+    if int(whole) or not fraction or not int(fraction):
+        parts.append(f'{_english_cardinal(whole)} {singular if int(whole) == 1 else plural}')
+    if fraction and int(fraction):
+        minor = int(fraction)
+        parts.append(f'{english_number(minor)} {minor_singular if minor == 1 else minor_plural}')
+    return ' and '.join(parts)
+
+
+def _english_time(match):
+    hours, minutes = match.groups()
+    if minutes == '00':
+        return f"{english_number(int(hours))} o'clock"
+    if minutes.startswith('0'):
+        return f'{english_number(int(hours))} oh {_ONES[int(minutes)]}'
+    return f'{english_number(int(hours))} {english_number(int(minutes))}'
+
+
+def _expand_abbreviations(text, abbreviations, sentence_final=()):
+    pattern = '|'.join(re.escape(abbreviation) for abbreviation in sorted(abbreviations, key=len, reverse=True))
+
+    def replace(match):
+        abbreviation = match.group(1)
+        # The abbreviation's period doubles as a full stop at the end of a sentence; keep that one
+        ends_sentence = abbreviation in sentence_final and re.match(r'\s*(?:$|[A-Z])', text[match.end():])
+        return abbreviations[abbreviation] + ('.' if ends_sentence else '')
+
+    return re.sub(rf'(?<![^\s(\[\'"])({pattern})', replace, text)
+
+
+def expand_english(text):
+    """Spell out numbers, currency, units and common abbreviations the way an English reader says them"""
+    text = _expand_abbreviations(text, _EN_ABBREVIATIONS, _EN_SENTENCE_FINAL)
+    text = re.sub(r'\bNo\.\s?(?=\d)', 'number ', text)
+    currency = re.escape(''.join(_EN_CURRENCIES))
+    text = re.sub(rf'(?:([{currency}])|\bRs\.?)\s?({_NUMBER})\b', _english_currency, text)
+    text = re.sub(rf'({_NUMBER})\s?%', lambda m: f'{_english_amount(m.group(1))} percent', text)
+    text = re.sub(r'\b(\d{1,2}):(\d{2})\b(?!:)', _english_time, text)
+    text = re.sub(r'\b(\d+)(?:st|nd|rd|th)\b', lambda m: english_ordinal(int(m.group(1))), text)
+    units = '|'.join(sorted(_EN_UNITS, key=len, reverse=True))
+    text = re.sub(
+        rf'\b({_NUMBER})\s?({units})\b(?!\.\w)',
+        lambda m: f"{_english_amount(m.group(1))} {_EN_UNITS[m.group(2)][0 if m.group(1) == '1' else 1]}",
+        text
+    )
+    text = re.sub(_STANDALONE.format(number=_NUMBER), lambda m: _english_amount(m.group(1)), text)
+    return text.replace('&', ' and ')
+
+
+def expand_marathi(text):
+    """Expand abbreviations and symbols; digits are left for the engine, which reads them natively in Marathi"""
+    text = _expand_abbreviations(text, _MR_ABBREVIATIONS)
+    text = re.sub(rf'(?:₹|\bRs\.?|रु\.)\s?({_NUMBER})', r'\1 रुपये', text)
+    text = re.sub(rf'({_NUMBER})\s?%', r'\1 टक्के', text)
+    return text.replace('&', ' आणि ')
+
+
+LANGUAGE_EXPANDERS = {
+    'en': expand_english,
+    'mr': expand_marathi
+}
+
+
+def _word_script(word):
+    for char in word:
+        if '\u0900' <= char <= '\u097f' and char not in '।॥':
+            return 'devanagari'
+        if char.isalpha() and (char < '\u0250' or '\u1e00' <= char <= '\u1eff'):
+            return 'latin'
+    return None
+
+
+def script_runs(text, lang_code='en', min_run_words=3):
+    """Split text into (lang_code, text) runs by writing script.
+
+    Words without letters (numbers, punctuation) stay with the run they
+    follow. A run of another script shorter than min_run_words stays inline
+    with the surrounding text, so an odd loanword doesn't break a sentence
+    into separately synthesized pieces.
+    """
+    runs = []  # [script, text, words with letters]
+    for token in re.findall(r'\s*\S+', text):
+        script = _word_script(token)
+        if runs and (script is None or runs[-1][0] in (None, script)):
+            runs[-1][0] = runs[-1][0] or script
+            runs[-1][1] += token
+            runs[-1][2] += script is not None
+        else:
+            runs.append([script, token, int(script is not None)])
+
+    primary = LANGUAGE_SCRIPTS.get(lang_code)
+    merged = []
+    prefix, prefix_script = '', None
+    for script, run_text, words in runs:
+        if script not in (None, primary) and words < min_run_words:
+            # A short run in another script stays inline with the text around it
+            if merged:
+                merged[-1][1] += run_text
+            else:
+                prefix, prefix_script = prefix + run_text, prefix_script or script
+        elif merged and merged[-1][0] == script:
+            merged[-1][1] += run_text
+        else:
+            merged.append([script, prefix + run_text])
+            prefix = ''
+    if prefix:
+        # Text that is entirely in another script is still routed to that script's language
+        merged.append([prefix_script, prefix])
+
+    return [
+        (lang_code if script in (None, primary) else SCRIPT_LANGUAGES.get(script, lang_code), run_text.strip())
+        for script, run_text in merged
+        if run_text.strip()
+    ]
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def normalize_text(text, lang_code='en', min_run_words=None):
+    """Canonical spoken form of text as a tuple of (lang_code, text) runs; memoized.
+
+    Unicode and whitespace are normalized, URLs and emails are read out, then
+    numbers, symbols and abbreviations are expanded per run language. With
+    min_run_words, runs in another script are routed to that script's language;
+    without it the whole text is one run in lang_code. Audio cache keys are
+    derived from this output, so inputs that only differ in spelling of the
+    same speech (e.g. "1,000" and "1000") share cached audio.
+    """
+    text = normalize_unicode(text)
+    text = _EMAIL.sub(lambda m: _speak_address(m.group(0)), text)
+    text = _URL.sub(lambda m: _speak_address(m.group(0)), text)
+    text = _GROUPED_NUMBER.sub(lambda m: m.group(0).replace(',', ''), text)
+    runs = script_runs(text, lang_code, min_run_words) if min_run_words is not None else [(lang_code, text)]
+    normalized = (
+        (run_lang, normalize_unicode(LANGUAGE_EXPANDERS.get(run_lang, lambda run: run)(run_text)))
+        for run_lang, run_text in runs
+    )
+    return tuple((run_lang, run_text) for run_lang, run_text in normalized if run_text)
+
+
+def normalization_stats():
+    info = normalize_text.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize, 'max_entries': info.maxsize}
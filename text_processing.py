@@ -0,0 +1,90 @@
+import re
+
+# Sentence terminators per language code; Marathi uses the Devanagari danda (।) and double danda (॥)
+SENTENCE_TERMINATORS = {
+    'en': '.!?',
+    'mr': '।॥.!?'
+}
+
+# Clause separators used to break up sentences that are still too long
+CLAUSE_SEPARATORS = ',;:—–'
+
+DEFAULT_MAX_SEGMENT_CHARS = 400
+
+
+def split_sentences(text, lang_code='en'):
+    """Split text into sentences, keeping the terminating punctuation with each sentence"""
+    terminators = re.escape(SENTENCE_TERMINATORS.get(lang_code, SENTENCE_TERMINATORS['en']))
+    # A terminator run (plus closing quotes/brackets) ends a sentence when followed by
+    # whitespace or end of text; dandas end a sentence even without trailing space
+    pattern = rf'.+?(?:[{terminators}]+["\'”’)\]]*(?=\s|$)|[।॥]+|$)'
+    sentences = []
+    for line in text.splitlines():
+        for match in re.finditer(pattern, line):
+            sentence = match.group(0).strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def _split_long_sentence(sentence, max_chars):
+    """Break an over-long sentence on clause boundaries, then on whitespace as a last resort"""
+    clauses = re.findall(rf'[^{re.escape(CLAUSE_SEPARATORS)}]+[{re.escape(CLAUSE_SEPARATORS)}]*', sentence)
+    pieces = []
+    for clause in clauses:
+        clause = clause.strip()
+        if not clause:
+            continue
+        while len(clause) > max_chars:
+            cut = clause.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        if clause:
+            pieces.append(clause)
+    return pieces
+
+
+def _pack(pieces, max_chars, first_max_chars=None):
+    """Greedily merge adjacent pieces so each segment stays under max_chars"""
+    segments = []
+    current = ''
+    for piece in pieces:
+        limit = first_max_chars if first_max_chars is not None and not segments else max_chars
+        if current and len(current) + 1 + len(piece) > limit:
+            segments.append(current)
+            current = piece
+        else:
+            current = f'{current} {piece}' if current else piece
+    if current:
+        segments.append(current)
+    return segments
+
+
+def segment_text(text, lang_code='en', max_chars=DEFAULT_MAX_SEGMENT_CHARS, first_max_chars=None):
+    """Split text into synthesis segments on sentence and clause boundaries, in order.
+
+    first_max_chars caps the first segment separately, which lets streaming
+    callers start playback after a short opening sentence.
+    """
+    pieces = []
+    for sentence in split_sentences(text, lang_code):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+        else:
+            pieces.extend(_pack(_split_long_sentence(sentence, max_chars), max_chars))
+    return _pack(pieces, max_chars, first_max_chars)
+
+
+def segment_runs(runs, max_chars=DEFAULT_MAX_SEGMENT_CHARS, first_max_chars=None):
+    """Segment (lang_code, text) runs in order, returning (lang_code, segment) pairs.
+
+    Segments never span runs, so each one can be synthesized in its own
+    language; first_max_chars applies to the very first segment only.
+    """
+    segments = []
+    for lang_code, text in runs:
+        for segment in segment_text(text, lang_code, max_chars, first_max_chars if not segments else None):
+            segments.append((lang_code, segment))
+    return segments
@@ -0,0 +1,123 @@
+import json
+import hashlib
+import threading
+
+GENDER_KEYWORDS = {
+    'female': ['female', 'woman', 'zira', 'hazel', 'susan', 'anna', 'eva', 'cortana'],
+    'male': ['male', 'man', 'david', 'mark', 'george', 'james']
+}
+
+ACCENT_KEYWORDS = {
+    'usa': ['us', 'american', 'united states'],
+    'uk': ['uk', 'british', 'england'],
+    'india': ['india', 'indian']
+}
+
+
+def describe_pyttsx3_voices(voices):
+    """Categorize raw (id, name) system voices by gender and accent"""
+    described = []
+    for i, (voice_id, voice_name) in enumerate(voices):
+        voice_info = {
+            'id': voice_id,
+            'name': voice_name,
+            'index': i,
+            'gender': 'unknown',
+            'language': 'english',  # pyttsx3 mainly supports English
+            'accent': 'system'
+        }
+
+        # Try to determine gender and accent from the voice name
+        name_lower = voice_name.lower()
+        for gender, keywords in GENDER_KEYWORDS.items():
+            if any(keyword in name_lower for keyword in keywords):
+                voice_info['gender'] = gender
+                break
+        for accent, keywords in ACCENT_KEYWORDS.items():
+            if any(keyword in name_lower for keyword in keywords):
+                voice_info['accent'] = accent
+                break
+
+        described.append(voice_info)
+    return described
+
+
+class _Snapshot:
+    """Immutable view of one voice catalog: lookup indexes plus serialized API responses"""
+
+    def __init__(self, voices, build_responses):
+        self.voices = voices
+        self.fingerprint = None if voices is None else tuple((v['id'], v['name']) for v in voices)
+        voices = voices or []
+
+        # Fallback chain for selection, most to least specific; setdefault keeps the first match
+        self.by_language_accent_gender = {}
+        self.by_language_gender = {}
+        self.by_gender = {}
+        self.grouped = {'female': [], 'male': [], 'unknown': []}
+        for voice in voices:
+            self.grouped[voice['gender']].append(voice)
+            self.by_language_accent_gender.setdefault((voice['language'], voice['accent'], voice['gender']), voice)
+            self.by_language_gender.setdefault((voice['language'], voice['gender']), voice)
+            self.by_gender.setdefault(voice['gender'], voice)
+        self.first = voices[0] if voices else None
+        self.distinct_genders = 'female' in self.by_gender and 'male' in self.by_gender
+
+        self.responses = {}
+        for name, payload in build_responses(self).items():
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.responses[name] = (body, hashlib.sha1(body).hexdigest())
+
+    def select(self, gender, language, accent):
+        return (
+            self.by_language_accent_gender.get((language, accent, gender))
+            or self.by_language_gender.get((language, gender))
+            or self.by_gender.get(gender)
+            or self.first
+        )
+
+
+class VoiceRegistry:
+    """System voice catalog indexed once per load, with capability responses prebuilt for serving.
+
+    build_responses(snapshot) returns {name: JSON-serializable payload}; it is
+    called on every load so responses always match the current voices. A
+    snapshot whose voices are None means the offline engine is unavailable.
+    Loads swap in a whole new snapshot, so readers never see a half-built index.
+    """
+
+    def __init__(self, build_responses):
+        self.build_responses = build_responses
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot(None, build_responses)
+        self.version = 0
+
+    def load(self, voices):
+        """Index raw (id, name) voices; returns False if they match the current catalog"""
+        described = describe_pyttsx3_voices(voices)
+        fingerprint = tuple((v['id'], v['name']) for v in described)
+        with self._lock:
+            if fingerprint == self._snapshot.fingerprint:
+                return False
+            self._snapshot = _Snapshot(described, self.build_responses)
+            self.version += 1
+        return True
+
+    @property
+    def available(self):
+        return self._snapshot.voices is not None
+
+    @property
+    def voices(self):
+        return self._snapshot.voices or []
+
+    def select(self, gender='female', language='english', accent='usa'):
+        """Best matching voice: exact match, then language+gender, gender, any voice"""
+        return self._snapshot.select(gender, language, accent)
+
+    def has_distinct_genders(self):
+        return self._snapshot.distinct_genders
+
+    def response(self, name):
+        """Prebuilt (JSON body, ETag) for a capability endpoint"""
+        return self._snapshot.responses[name]